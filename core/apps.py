@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from core.instrumentation import install_query_observer
+
+        connection_created.connect(install_query_observer, dispatch_uid="core.install_query_observer")
+
+        mode = getattr(settings, "DEFERRED_FIELD_ACCESS", None)
+        if mode:
+            from core.deferred_fields import enable_deferred_field_detection
+
+            enable_deferred_field_detection(mode)
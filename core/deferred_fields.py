@@ -0,0 +1,70 @@
+import logging
+import os
+import traceback
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models.query_utils import DeferredAttribute
+
+__all__ = [
+    "DeferredFieldAccess",
+    "enable_deferred_field_detection",
+    "deferred_field_detection",
+]
+
+logger = logging.getLogger(__name__)
+
+MODES = ("raise", "log")
+
+_mode = None
+_original_get = DeferredAttribute.__get__
+
+
+class DeferredFieldAccess(Exception):
+    """Ленивая догрузка поля, исключённого через ``.only()``/``.defer()``."""
+
+
+def _call_site():
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if filename.startswith(base_dir) and "site-packages" not in filename and filename != __file__:
+            return f"{os.path.relpath(filename, base_dir)}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+
+def _detecting_get(self, instance, cls=None):
+    if (
+        _mode is not None
+        and instance is not None
+        and self.field.attname not in instance.__dict__
+        and self._check_parent_chain(instance) is None
+    ):
+        message = (
+            f"Deferred field {instance._meta.label}.{self.field.attname} loaded lazily "
+            f"(pk={instance.pk!r}) at {_call_site()}"
+        )
+        if _mode == "raise":
+            raise DeferredFieldAccess(message)
+        logger.warning(message)
+    return _original_get(self, instance, cls)
+
+
+def enable_deferred_field_detection(mode):
+    """Включает ("raise"/"log") или выключает (None) обнаружение догрузки отложенных полей."""
+    global _mode
+    if mode is not None and mode not in MODES:
+        raise ValueError(f"Unknown deferred field detection mode: {mode!r}")
+    if DeferredAttribute.__get__ is not _detecting_get:
+        DeferredAttribute.__get__ = _detecting_get
+    _mode = mode
+
+
+@contextmanager
+def deferred_field_detection(mode):
+    previous = _mode
+    enable_deferred_field_detection(mode)
+    try:
+        yield
+    finally:
+        enable_deferred_field_detection(previous)
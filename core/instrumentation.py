@@ -0,0 +1,197 @@
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+__all__ = [
+    "RequestTimings",
+    "PerformanceInstrumentationMiddleware",
+    "InstrumentedSerializerMixin",
+    "timed",
+    "get_current_timings",
+    "observe_queries",
+    "install_query_observer",
+    "query_observer",
+]
+
+logger = logging.getLogger(__name__)
+
+_current_timings: ContextVar["RequestTimings | None"] = ContextVar("request_timings", default=None)
+_query_observers: ContextVar[tuple] = ContextVar("query_observers", default=())
+
+
+def observe_queries(execute, sql, params, many, context):
+    """Постоянная обёртка соединения: передаёт длительность запроса наблюдателям текущего контекста.
+
+    Наблюдатели хранятся в ContextVar, поэтому обёртка работает и для ORM-вызовов из async-кода,
+    которые выполняются в отдельном потоке с копией контекста.
+    """
+    observers = _query_observers.get()
+    if not observers:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        for observer in observers:
+            observer(duration)
+
+
+def install_query_observer(sender, connection, **kwargs):
+    """Обработчик ``connection_created``: подключает ``observe_queries`` к новому соединению."""
+    if observe_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(observe_queries)
+
+
+@contextmanager
+def query_observer(callback):
+    token = _query_observers.set(_query_observers.get() + (callback,))
+    try:
+        yield
+    finally:
+        _query_observers.reset(token)
+
+
+class RequestTimings:
+    """Накопитель метрик одного запроса: SQL-запросы и именованные участки кода."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_count = 0
+        self.db_time = 0.0
+        self.spans = {}
+        self._depth = {}
+
+    def add_span(self, name, duration):
+        self.spans[name] = self.spans.get(name, 0.0) + duration
+
+    def add_query(self, duration):
+        self.db_time += duration
+        self.db_count += 1
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total):
+        parts = [f'db;dur={self.db_time * 1000:.2f};desc="{self.db_count} queries"']
+        parts += [f"{name};dur={duration * 1000:.2f}" for name, duration in self.spans.items()]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+    def as_dict(self, total):
+        return {
+            "total_ms": round(total * 1000, 2),
+            "db_queries": self.db_count,
+            "db_ms": round(self.db_time * 1000, 2),
+            **{f"{name}_ms": round(duration * 1000, 2) for name, duration in self.spans.items()},
+        }
+
+
+def get_current_timings():
+    return _current_timings.get()
+
+
+@contextmanager
+def timed(name):
+    """Учитывает время выполнения блока в метриках текущего запроса.
+
+    Вложенные участки с тем же именем учитываются один раз (по внешнему блоку).
+    Если инструментирование для запроса не включено, накладные расходы сводятся к чтению ContextVar.
+    """
+    timings = _current_timings.get()
+    if timings is None or timings._depth.get(name):
+        yield
+        return
+
+    timings._depth[name] = 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._depth[name] = 0
+        timings.add_span(name, time.perf_counter() - start)
+
+
+class InstrumentedSerializerMixin:
+    """Учитывает время сериализации в метрике ``serializer``."""
+
+    def to_representation(self, instance):
+        with timed("serializer"):
+            return super().to_representation(instance)
+
+
+class PerformanceInstrumentationMiddleware:
+    """Собирает метрики запроса и отдаёт их в заголовке ``Server-Timing`` и в логе.
+
+    Включается настройкой ``PERF_INSTRUMENTATION_ENABLED``, доля инструментируемых запросов
+    задаётся ``PERF_INSTRUMENTATION_SAMPLE_RATE``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._should_sample():
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        try:
+            with query_observer(timings.add_query):
+                response = self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self._finish(request, response, timings)
+
+    async def __acall__(self, request):
+        if not self._should_sample():
+            return await self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        try:
+            with query_observer(timings.add_query):
+                response = await self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self._finish(request, response, timings)
+
+    def _finish(self, request, response, timings):
+        total = timings.total
+        response["Server-Timing"] = timings.server_timing(total)
+        self._log(request, response, timings, total)
+        return response
+
+    @staticmethod
+    def _should_sample():
+        if not getattr(settings, "PERF_INSTRUMENTATION_ENABLED", False):
+            return False
+        rate = getattr(settings, "PERF_INSTRUMENTATION_SAMPLE_RATE", 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+    @staticmethod
+    def _log(request, response, timings, total):
+        match = getattr(request, "resolver_match", None)
+        payload = {
+            "method": request.method,
+            "path": request.path,
+            "view": match.url_name if match else None,
+            "status": response.status_code,
+            **timings.as_dict(total),
+        }
+        logger.info(json.dumps(payload, ensure_ascii=False))
@@ -0,0 +1,99 @@
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+
+from core.instrumentation import query_observer
+
+__all__ = [
+    "REQUEST_LATENCY",
+    "REQUEST_DB_QUERIES",
+    "CACHE_LOOKUPS",
+    "METADATA_FETCHES",
+    "SCHEDULED_PUBLISH_LAG",
+    "PENDING_VIEWS",
+    "MetricsMiddleware",
+    "record_cache_lookup",
+    "render_metrics",
+]
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки запроса по имени URL",
+    ["view", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Количество SQL-запросов на один HTTP-запрос",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Обращения к кэшу", ["cache", "result"])
+METADATA_FETCHES = Counter("video_metadata_fetch_total", "Загрузка метаданных видео", ["provider", "outcome"])
+SCHEDULED_PUBLISH_LAG = Histogram(
+    "scheduled_publish_lag_seconds",
+    "Задержка публикации запланированного контента относительно scheduled_at",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+
+# Сумма по живым воркерам: просмотры, накопленные в памяти и ещё не записанные в БД
+PENDING_VIEWS = Gauge(
+    "news_pending_views", "Просмотры в буфере процесса, ещё не записанные в БД", multiprocess_mode="livesum"
+)
+
+
+def record_cache_lookup(cache_name, hit):
+    CACHE_LOOKUPS.labels(cache=cache_name, result="hit" if hit else "miss").inc()
+
+
+def render_metrics():
+    """Возвращает метрики в текстовом формате Prometheus.
+
+    Если задан ``PROMETHEUS_MULTIPROC_DIR``, значения собираются из файлов всех воркеров.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
+
+
+class MetricsMiddleware:
+    """Замеряет время ответа и количество SQL-запросов для каждого имени URL."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        queries = []
+        start = time.perf_counter()
+        with query_observer(queries.append):
+            response = self.get_response(request)
+        self._observe(request, start, len(queries))
+        return response
+
+    async def __acall__(self, request):
+        queries = []
+        start = time.perf_counter()
+        with query_observer(queries.append):
+            response = await self.get_response(request)
+        self._observe(request, start, len(queries))
+        return response
+
+    @staticmethod
+    def _observe(request, start, queries):
+        match = getattr(request, "resolver_match", None)
+        view = (match.url_name or match.view_name) if match else "unmatched"
+        REQUEST_LATENCY.labels(view=view, method=request.method).observe(time.perf_counter() - start)
+        REQUEST_DB_QUERIES.labels(view=view).observe(queries)
@@ -0,0 +1,61 @@
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+__all__ = [
+    "ORJSONRenderer",
+    "MessagePackRenderer",
+]
+
+# Даты, ленивые строки и Decimal приводятся так же, как в стандартном JSONRenderer DRF
+_encoder = encoders.JSONEncoder()
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+class ORJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` на orjson с байт-в-байт тем же выводом для компактного UTF-8 JSON.
+
+    Отступы (Browsable API, ``; indent=``) и нестандартные ``COMPACT_JSON``/``UNICODE_JSON``
+    обрабатывает родительский класс.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            not api_settings.COMPACT_JSON
+            or not api_settings.UNICODE_JSON
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Например, целые вне 64 бит
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Как и DRF, экранируем U+2028/U+2029, чтобы ответ оставался валидным JavaScript
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """MessagePack для клиентов, запросивших ``Accept: application/msgpack`` или ``?format=msgpack``.
+
+    Значения приводятся так же, как в JSON: даты — строками ISO 8601.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
@@ -0,0 +1,212 @@
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+__all__ = [
+    "PrimaryReplicaRouter",
+    "ReplicaPinningMiddleware",
+    "pin_to_primary",
+    "replica_lag",
+    "arefresh_replica_lags",
+]
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = "db_pin"
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+class _RoutingState:
+    __slots__ = ("pinned", "wrote")
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state: ContextVar[_RoutingState | None] = ContextVar("replica_routing_state", default=None)
+_lag_cache: dict[str, tuple[float, float]] = {}
+
+
+def pin_to_primary():
+    """Направляет все последующие чтения текущего запроса (или процесса вне запроса) на primary."""
+    state = _state.get()
+    if state is None:
+        state = _RoutingState()
+        _state.set(state)
+    state.pinned = True
+    state.wrote = True
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _stale_replicas():
+    now = time.monotonic()
+    return [
+        alias
+        for alias in getattr(settings, "DATABASE_REPLICAS", [])
+        if alias not in _lag_cache or now - _lag_cache[alias][0] >= settings.REPLICA_LAG_CHECK_INTERVAL
+    ]
+
+
+def replica_lag(alias):
+    """Отставание реплики в секундах, кэшируется на ``REPLICA_LAG_CHECK_INTERVAL``; недоступная реплика — inf.
+
+    В цикле событий синхронный запрос к БД запрещён: там возвращается последнее известное значение,
+    а без него — inf (чтение уходит в primary). Кэш для async-запросов обновляет ``arefresh_replica_lags``.
+    """
+    now = time.monotonic()
+    cached = _lag_cache.get(alias)
+    if cached and now - cached[0] < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return cached[1]
+    if _in_event_loop():
+        return cached[1] if cached else float("inf")
+
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            lag = float(cursor.fetchone()[0])
+    except DatabaseError:
+        logger.warning(f"Replica {alias} is unavailable; routing reads to primary")
+        lag = float("inf")
+    _lag_cache[alias] = (now, lag)
+    return lag
+
+
+def _refresh_replica_lags(aliases):
+    # Внутри транзакции primary чтения не уходят на реплики (см. db_for_read), проверять нечего
+    if not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        for alias in aliases:
+            replica_lag(alias)
+
+
+async def arefresh_replica_lags():
+    """Обновляет устаревшие значения отставания реплик из потока, до маршрутизации async-запросов."""
+    stale = _stale_replicas()
+    if stale:
+        await sync_to_async(_refresh_replica_lags)(stale)
+
+
+class PrimaryReplicaRouter:
+    """Читает с реплик из ``DATABASE_REPLICAS``, пишет в primary.
+
+    После записи чтения текущего запроса идут в primary; между запросами закрепление
+    обеспечивает ``ReplicaPinningMiddleware``. Реплики с отставанием больше
+    ``REPLICA_MAX_LAG_SECONDS`` пропускаются.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+
+        state = _state.get()
+        if (state is not None and state.pinned) or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+
+        healthy = [alias for alias in replicas if replica_lag(alias) <= settings.REPLICA_MAX_LAG_SECONDS]
+        return random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    """Закрепляет клиента за primary на ``REPLICA_PIN_SECONDS`` после записи (read-your-writes).
+
+    Клиент опознаётся по cookie, а клиенты без cookie — по заголовку Authorization.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, "DATABASE_REPLICAS", []):
+            return self.get_response(request)
+
+        key = self.identity_key(request)
+        state = _RoutingState(pinned=self.has_pin_cookie(request) or bool(key and cache.get(key)))
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if state.wrote:
+            self.set_pin_cookie(response)
+            if key:
+                cache.set(key, True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, "DATABASE_REPLICAS", []):
+            return await self.get_response(request)
+
+        key = self.identity_key(request)
+        state = _RoutingState(pinned=self.has_pin_cookie(request) or bool(key and await cache.aget(key)))
+        if not state.pinned:
+            await arefresh_replica_lags()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if state.wrote:
+            self.set_pin_cookie(response)
+            if key:
+                await cache.aset(key, True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    @staticmethod
+    def has_pin_cookie(request):
+        try:
+            return int(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    @staticmethod
+    def set_pin_cookie(response):
+        pin_seconds = settings.REPLICA_PIN_SECONDS
+        response.set_cookie(PIN_COOKIE, str(int(time.time() + pin_seconds)), max_age=pin_seconds, httponly=True)
+
+    @staticmethod
+    def identity_key(request):
+        authorization = request.META.get("HTTP_AUTHORIZATION")
+        if not authorization:
+            return None
+        return f"db_pin:{hashlib.sha256(authorization.encode()).hexdigest()}"
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+from core.deferred_fields import enable_deferred_field_detection
+
+
+class MediaServiceTestRunner(DiscoverRunner):
+    """Тестовый раннер: любая ленивая догрузка отложенного поля роняет тест.
+
+    Фоновая запись буфера просмотров и отложенная пересборка снимков ленты выключены: поток работал бы
+    с БД вне транзакции теста.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.NEWS_VIEWS_FLUSH_THREAD = False
+        settings.NEWS_FEED_SNAPSHOT_REBUILD_DELAY = 0
+        enable_deferred_field_detection("raise")
+
+    def teardown_test_environment(self, **kwargs):
+        enable_deferred_field_detection(None)
+        super().teardown_test_environment(**kwargs)
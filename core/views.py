@@ -1,3 +1,8 @@
-from django.shortcuts import render
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST
 
-# Create your views here.
+from core.metrics import render_metrics
+
+
+def metrics_view(request):
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE_LATEST)
@@ -30,11 +30,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.metrics.MetricsMiddleware",
+    "core.instrumentation.PerformanceInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.replicas.ReplicaPinningMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -58,8 +61,24 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "media_service.wsgi.application"
 
+TEST_RUNNER = "core.test_runner.MediaServiceTestRunner"
+
 DATABASES = {"default": env.db("DATABASE_URL")}
 
+# Реплики только для чтения: DATABASE_REPLICA_URLS=postgres://...,postgres://...
+DATABASE_REPLICAS = []
+for index, url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[])):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {**env.db_url_config(url), "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["core.replicas.PrimaryReplicaRouter"]
+REPLICA_PIN_SECONDS = env.int("REPLICA_PIN_SECONDS", default=5)
+REPLICA_MAX_LAG_SECONDS = env.float("REPLICA_MAX_LAG_SECONDS", default=2.0)
+REPLICA_LAG_CHECK_INTERVAL = env.float("REPLICA_LAG_CHECK_INTERVAL", default=5.0)
+
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
 AUTH_USER_MODEL = "auth.User"
 
 REST_FRAMEWORK = {
@@ -73,6 +92,11 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.TokenAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.ORJSONRenderer",
+        "core.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
 }
 
 LANGUAGE_CODE = "ru-ru"
@@ -101,3 +125,74 @@ SPECTACULAR_SETTINGS = {
 }
 
 YOUTUBE_API_KEY = env.str("YOUTUBE_API_KEY", default="")
+
+# Инструментирование запросов (Server-Timing + структурированный лог)
+PERF_INSTRUMENTATION_ENABLED = env.bool("PERF_INSTRUMENTATION_ENABLED", default=False)
+PERF_INSTRUMENTATION_SAMPLE_RATE = env.float("PERF_INSTRUMENTATION_SAMPLE_RATE", default=1.0)
+
+# Обнаружение догрузки полей, исключённых через .only()/.defer(): "raise", "log" или пусто
+DEFERRED_FIELD_ACCESS = env.str("DEFERRED_FIELD_ACCESS", default="")
+
+# Списки в админке: ниже этого числа строк (по оценке PostgreSQL) выполняется точный COUNT(*)
+ADMIN_EXACT_COUNT_LIMIT = env.int("ADMIN_EXACT_COUNT_LIMIT", default=10000)
+
+# Асинхронные представления API v2 (для развёртывания под ASGI)
+NEWS_ASYNC_VIEWS = env.bool("NEWS_ASYNC_VIEWS", default=False)
+
+# SSE-поток событий публикации (news.events)
+NEWS_EVENTS_HISTORY_SIZE = env.int("NEWS_EVENTS_HISTORY_SIZE", default=1000)
+NEWS_EVENTS_QUEUE_SIZE = env.int("NEWS_EVENTS_QUEUE_SIZE", default=100)
+NEWS_EVENTS_HEARTBEAT_SECONDS = env.float("NEWS_EVENTS_HEARTBEAT_SECONDS", default=15.0)
+NEWS_EVENTS_RETRY_MS = env.int("NEWS_EVENTS_RETRY_MS", default=3000)
+
+# /news/changes/: размер страницы, окно перекрытия курсора и срок хранения отметок об удалении
+NEWS_CHANGES_PAGE_SIZE = env.int("NEWS_CHANGES_PAGE_SIZE", default=500)
+NEWS_CHANGES_OVERLAP_SECONDS = env.int("NEWS_CHANGES_OVERLAP_SECONDS", default=5)
+NEWS_TOMBSTONE_RETENTION_DAYS = env.int("NEWS_TOMBSTONE_RETENTION_DAYS", default=30)
+
+# /news/items/: лимит ID в запросе и время жизни закэшированных элементов
+NEWS_MULTI_GET_MAX_IDS = env.int("NEWS_MULTI_GET_MAX_IDS", default=100)
+NEWS_ITEM_CACHE_TIMEOUT = env.int("NEWS_ITEM_CACHE_TIMEOUT", default=60 * 60)
+
+# POST /apiv3/contents/bulk/: лимит элементов в запросе
+NEWS_BULK_WRITE_MAX_ITEMS = env.int("NEWS_BULK_WRITE_MAX_ITEMS", default=10000)
+
+# Фоновые пакетные операции из админки (run_bulk_jobs): размер пакета и таймаут зависшего воркера
+NEWS_BULK_JOB_BATCH_SIZE = env.int("NEWS_BULK_JOB_BATCH_SIZE", default=1000)
+NEWS_BULK_JOB_STALE_SECONDS = env.int("NEWS_BULK_JOB_STALE_SECONDS", default=600)
+
+# Похожие элементы (news.related): длина списка, порог частоты тега и период полураспада свежести
+NEWS_RELATED_LIMIT = env.int("NEWS_RELATED_LIMIT", default=10)
+NEWS_RELATED_MAX_TAG_ITEMS = env.int("NEWS_RELATED_MAX_TAG_ITEMS", default=1000)
+NEWS_RELATED_HALF_LIFE_DAYS = env.float("NEWS_RELATED_HALF_LIFE_DAYS", default=30.0)
+
+# Просмотры копятся в памяти процесса и пишутся в БД раз в NEWS_VIEWS_FLUSH_SECONDS (фоновым потоком, если новых
+# просмотров нет) или при NEWS_VIEWS_FLUSH_MAX_ITEMS элементах в буфере; незаписанные просмотры теряются при
+# аварийном завершении процесса. Период полураспада рейтинга ленты sort=trending
+NEWS_VIEWS_FLUSH_SECONDS = env.float("NEWS_VIEWS_FLUSH_SECONDS", default=5.0)
+NEWS_VIEWS_FLUSH_THREAD = env.bool("NEWS_VIEWS_FLUSH_THREAD", default=True)
+NEWS_VIEWS_FLUSH_MAX_ITEMS = env.int("NEWS_VIEWS_FLUSH_MAX_ITEMS", default=1000)
+NEWS_TRENDING_HALF_LIFE_HOURS = env.float("NEWS_TRENDING_HALF_LIFE_HOURS", default=24.0)
+
+# Аналитика просмотров (news.analytics): срок хранения событий и наибольший период графика в API
+NEWS_VIEW_EVENTS_RETENTION_DAYS = env.int("NEWS_VIEW_EVENTS_RETENTION_DAYS", default=7)
+NEWS_VIEW_ANALYTICS_MAX_DAYS = env.int("NEWS_VIEW_ANALYTICS_MAX_DAYS", default=90)
+
+# Фасеты ленты и /apiv3/contents/: сколько самых частых тегов возвращать
+NEWS_FACETS_MAX_TAGS = env.int("NEWS_FACETS_MAX_TAGS", default=50)
+
+# Похожие по тексту (news.similar): каталог индекса, длина списка, число слов на документ и документов на слово
+NEWS_SIMILAR_INDEX_DIR = env.str("NEWS_SIMILAR_INDEX_DIR", default=str(BASE_DIR / "var" / "similar-index"))
+NEWS_SIMILAR_LIMIT = env.int("NEWS_SIMILAR_LIMIT", default=10)
+NEWS_SIMILAR_MAX_TERMS = env.int("NEWS_SIMILAR_MAX_TERMS", default=64)
+NEWS_SIMILAR_MAX_POSTINGS = env.int("NEWS_SIMILAR_MAX_POSTINGS", default=2000)
+
+# Статические снимки первых страниц ленты и дерева категорий (news.snapshots)
+NEWS_FEED_SNAPSHOTS = env.bool("NEWS_FEED_SNAPSHOTS", default=False)
+NEWS_FEED_SNAPSHOT_PAGES = env.int("NEWS_FEED_SNAPSHOT_PAGES", default=3)
+NEWS_FEED_SNAPSHOT_PAGE_SIZE = env.int("NEWS_FEED_SNAPSHOT_PAGE_SIZE", default=20)
+NEWS_FEED_SNAPSHOT_STORAGE = env.str(
+    "NEWS_FEED_SNAPSHOT_STORAGE", default="news.snapshots.FileSystemFeedSnapshotStorage"
+)
+# Пересборка снимков после изменений — в фоновом потоке не чаще раза в столько секунд (0 — сразу)
+NEWS_FEED_SNAPSHOT_REBUILD_DELAY = env.float("NEWS_FEED_SNAPSHOT_REBUILD_DELAY", default=5.0)
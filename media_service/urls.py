@@ -5,13 +5,16 @@ from django.urls import path, include
 from rest_framework.authtoken.views import obtain_auth_token
 from drf_spectacular.views import SpectacularSwaggerView, SpectacularAPIView
 
+from core.views import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("", include("news.urls.apiv2_urls")),
+    path("", include("news.urls.apiv2_async_urls" if settings.NEWS_ASYNC_VIEWS else "news.urls.apiv2_urls")),
     path("apiv3/", include("news.urls.api_urls")),
     path("api-token-auth/", obtain_auth_token),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
+    path("metrics", metrics_view, name="metrics"),
 ]
 
 if settings.DEBUG:
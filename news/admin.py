@@ -1,25 +1,36 @@
+from urllib.parse import urlencode
+
 from django.contrib import admin
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import Count
+from django.http import HttpRequest, QueryDict
 from django.utils.translation import gettext_lazy as _
 from django.utils.html import format_html
 
-from django.utils import timezone
+from django.urls import reverse
 
-from .models import Category, Tag, ContentItem
+from .models import BulkJob, Category, Tag, ContentItem
 from core.admin import BaseAdmin
+from core.paginator import EstimatedCountPaginator
 
 
 @admin.register(Category)
 class CategoryAdmin(BaseAdmin):
     list_display = ("name", "slug", "parent", "children_count")
     list_filter = ("parent",)
+    list_select_related = ("parent",)
     search_fields = ("name", "slug")
     prepopulated_fields = {"slug": ("name",)}
     ordering = ("name",)
     list_per_page = 50
 
-    @admin.display(description=_("Количество подкатегорий"))
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(children_count=Count("category"))
+
+    @admin.display(description=_("Количество подкатегорий"), ordering="children_count")
     def children_count(self, obj):
-        return obj.category_set.count()
+        return obj.children_count
 
 
 @admin.register(Tag)
@@ -30,14 +41,12 @@ class TagAdmin(BaseAdmin):
     ordering = ("name",)
     list_per_page = 100
 
-    @admin.display(description=_("Количество материалов"))
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(contents_count=Count("contentitem"))
+
+    @admin.display(description=_("Количество материалов"), ordering="contents_count")
     def contents_count(self, obj):
-        total = 0
-        for rel in obj._meta.related_objects:
-            rel_name = rel.get_accessor_name()
-            if hasattr(obj, rel_name):
-                total += getattr(obj, rel_name).count()
-        return total
+        return obj.contents_count
 
 
 @admin.register(ContentItem)
@@ -65,6 +74,9 @@ class ContentItemAdmin(BaseAdmin):
     readonly_fields = ("views", "updated_at", "title_picture_url")
     list_per_page = 25
     save_on_top = True
+    # Точный COUNT(*) по миллионам строк заменяется оценкой, полный счётчик без фильтров не запрашивается
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     fieldsets = (
         (_("Основное"), {"fields": ("title", "slug", "content_type", "category", "tags", "author")}),
@@ -74,7 +86,7 @@ class ContentItemAdmin(BaseAdmin):
         (_("Метаданные"), {"fields": ("views", "updated_at", "title_picture_url")}),
     )
 
-    actions = ("make_published", "make_draft")
+    actions = ("make_published", "make_draft", "refresh_video_metadata")
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
@@ -87,14 +99,27 @@ class ContentItemAdmin(BaseAdmin):
 
     @admin.action(description=_("Отметить выбранные элементы как опубликованные"))
     def make_published(self, request, queryset):
-        updated = queryset.update(status=ContentItem.Status.PUBLISHED)
-        queryset.filter(published_at__isnull=True).update(published_at=timezone.now())
-        self.message_user(request, _("%(count)d items marked as published.") % {"count": updated})
+        self.enqueue_bulk_job(request, BulkJob.Action.PUBLISH, queryset)
 
     @admin.action(description=_("Отметить выбранные элементы как черновики"))
     def make_draft(self, request, queryset):
-        updated = queryset.update(status=ContentItem.Status.DRAFT)
-        self.message_user(request, _("%(count)d items marked as draft.") % {"count": updated})
+        self.enqueue_bulk_job(request, BulkJob.Action.DRAFT, queryset)
+
+    @admin.action(description=_("Обновить метаданные видео"))
+    def refresh_video_metadata(self, request, queryset):
+        self.enqueue_bulk_job(request, BulkJob.Action.REFRESH_METADATA, queryset)
+
+    def enqueue_bulk_job(self, request, action, queryset):
+        # Выборка может содержать миллионы строк: в задаче сохраняются только отмеченные ID или, при
+        # «выбрать все», фильтры списка, а элементы читает и изменяет run_bulk_jobs пакетами
+        if request.POST.get("select_across") == "1":
+            job = BulkJob.enqueue(action, changelist=dict(request.GET.lists()), user=request.user)
+        else:
+            job = BulkJob.enqueue(action, ids=map(int, request.POST.getlist(ACTION_CHECKBOX_NAME)), user=request.user)
+        url = reverse("admin:news_bulkjob_change", args=[job.pk])
+        self.message_user(
+            request, format_html(_('Задача {} поставлена в очередь: <a href="{}">прогресс</a>'), job, url)
+        )
 
     @admin.display(description=_("Превью"))
     def thumbnail_preview(self, obj):
@@ -118,3 +143,60 @@ class ContentItemAdmin(BaseAdmin):
         if url:
             return format_html('<a href="{}" target="_blank" rel="noopener noreferrer">{}</a>', url, _("Open"))
         return "-"
+
+
+@admin.register(BulkJob)
+class BulkJobAdmin(BaseAdmin):
+    list_display = (
+        "__str__",
+        "status",
+        "progress_bar",
+        "processed",
+        "total",
+        "changed",
+        "failed",
+        "created_by",
+        "created_at",
+    )
+    list_filter = ("action", "status")
+    list_select_related = ("created_by",)
+    readonly_fields = (
+        "action",
+        "status",
+        "progress_bar",
+        "total",
+        "processed",
+        "changed",
+        "failed",
+        "last_id",
+        "batch_size",
+        "error",
+        "created_by",
+        "created_at",
+        "updated_at",
+        "finished_at",
+    )
+    exclude = ("selection", "owner")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description=_("Прогресс"))
+    def progress_bar(self, obj):
+        return format_html('<progress value="{}" max="100"></progress> {}%', obj.progress, obj.progress)
+
+
+def content_changelist_queryset(params, user=None):
+    """Выборка списка контента в админке с фильтрами и поиском из ``params`` (параметры GET списка).
+
+    Используется задачами ``BulkJob`` при «выбрать все»: фильтры разбирает сам ``ChangeList``, как в админке.
+    """
+    request = HttpRequest()
+    request.method = "GET"
+    request.GET = QueryDict(urlencode(params, doseq=True))
+    request.user = user or AnonymousUser()
+    model_admin = ContentItemAdmin(ContentItem, admin.site)
+    return model_admin.get_changelist_instance(request).get_queryset(request)
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from news.models import ContentItem, ContentViewsDaily, ContentViewsHourly, ViewRollupState
+
+__all__ = [
+    "EVENTS_TABLE",
+    "write_view_events",
+    "ensure_view_event_partitions",
+    "rollup_view_events",
+    "drop_expired_view_partitions",
+    "get_views_series",
+]
+
+# Секционированная по суткам (UTC) таблица событий просмотров из миграции 0009
+EVENTS_TABLE = "news_viewevent"
+# Секции создаются заранее на столько суток вперёд, чтобы запись буфера не ждала DDL
+PARTITIONS_AHEAD = 3
+# События записываются при сбросе буфера процесса; более поздние, чем через сутки после просмотра, не агрегируются
+LATE_EVENTS_WINDOW = timedelta(days=1)
+# Запас на транзакции записи, начатые до границы агрегации, но ещё не завершённые
+COMMIT_SLACK = timedelta(minutes=1)
+
+# Пакет — события, записанные после прошлой агрегации; оба уровня увеличиваются в одной транзакции.
+# Секции отсекаются по viewed_at, внутри секции поиск по recorded_at идёт по BRIN-индексу.
+ROLLUP_SQL = """
+WITH batch AS (
+    SELECT e.item_id, date_trunc('hour', e.viewed_at) AS hour, COUNT(*) AS views
+    FROM {events} e
+    JOIN {items} i ON i.id = e.item_id
+    WHERE e.viewed_at >= %(since)s AND e.recorded_at > %(after)s AND e.recorded_at <= %(until)s
+    GROUP BY 1, 2
+),
+hourly AS (
+    INSERT INTO {hourly} AS h (item_id, hour, views)
+    SELECT item_id, hour, views FROM batch
+    ON CONFLICT (item_id, hour) DO UPDATE SET views = h.views + EXCLUDED.views
+)
+INSERT INTO {daily} AS d (item_id, day, views)
+SELECT item_id, (hour AT TIME ZONE %(time_zone)s)::date, SUM(views) FROM batch GROUP BY 1, 2
+ON CONFLICT (item_id, day) DO UPDATE SET views = d.views + EXCLUDED.views
+"""
+
+
+def _partition_name(day):
+    return f"{EVENTS_TABLE}_p{day:%Y%m%d}"
+
+
+def _create_partitions(cursor, days):
+    # Для существующей секции IF NOT EXISTS завершается до блокировки родительской таблицы
+    for day in sorted(set(days)):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {_partition_name(day)} PARTITION OF {EVENTS_TABLE} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [
+                datetime.combine(day, datetime.min.time(), dt_timezone.utc),
+                datetime.combine(day + timedelta(days=1), datetime.min.time(), dt_timezone.utc),
+            ],
+        )
+
+
+def write_view_events(cursor, events):
+    """Пишет события ``(item_id, viewed_at)`` через ``COPY`` в транзакции курсора, создавая недостающие секции.
+
+    Вызывается из сброса буфера просмотров (``news.trending.flush_views``).
+    """
+    _create_partitions(cursor, {viewed_at.astimezone(dt_timezone.utc).date() for _, viewed_at in events})
+    with cursor.copy(f"COPY {EVENTS_TABLE} (item_id, viewed_at) FROM STDIN") as copy:
+        for event in events:
+            copy.write_row(event)
+
+
+def ensure_view_event_partitions(using=DEFAULT_DB_ALIAS):
+    """Создаёт секции событий с сегодняшнего дня на ``PARTITIONS_AHEAD`` суток вперёд."""
+    today = timezone.now().astimezone(dt_timezone.utc).date()
+    days = [today + timedelta(days=offset) for offset in range(PARTITIONS_AHEAD + 1)]
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        _create_partitions(cursor, days)
+
+
+def rollup_view_events(using=DEFAULT_DB_ALIAS):
+    """Добавляет к почасовым и суточным счётчикам события, записанные с прошлой агрегации.
+
+    Возвращает новую границу агрегации.
+    """
+    until = timezone.now() - COMMIT_SLACK
+    with transaction.atomic(using=using):
+        state = ViewRollupState.objects.using(using).select_for_update().filter(id=1).first()
+        after = state.rolled_up_to if state else datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+        if until <= after:
+            return after
+        sql = ROLLUP_SQL.format(
+            events=EVENTS_TABLE,
+            items=ContentItem._meta.db_table,
+            hourly=ContentViewsHourly._meta.db_table,
+            daily=ContentViewsDaily._meta.db_table,
+        )
+        params = {"since": after - LATE_EVENTS_WINDOW, "after": after, "until": until}
+        with connections[using].cursor() as cursor:
+            cursor.execute(sql, {**params, "time_zone": settings.TIME_ZONE})
+        ViewRollupState.objects.using(using).update_or_create(id=1, defaults={"rolled_up_to": until})
+    return until
+
+
+def drop_expired_view_partitions(using=DEFAULT_DB_ALIAS):
+    """Удаляет секции событий старше ``NEWS_VIEW_EVENTS_RETENTION_DAYS`` суток — ``DROP TABLE`` вместо ``DELETE``.
+
+    Секции, которые ещё может затронуть агрегация, не удаляются. Возвращает имена удалённых секций.
+    """
+    state = ViewRollupState.objects.using(using).filter(id=1).first()
+    cutoff = timezone.now() - timedelta(days=settings.NEWS_VIEW_EVENTS_RETENTION_DAYS)
+    if state is None:
+        return []
+    cutoff = min(cutoff, state.rolled_up_to - LATE_EVENTS_WINDOW).astimezone(dt_timezone.utc).date()
+
+    dropped = []
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass ORDER BY c.relname",
+            [EVENTS_TABLE],
+        )
+        for (name,) in cursor.fetchall():
+            day = datetime.strptime(name.rsplit("_p", 1)[1], "%Y%m%d").date()
+            # Секция покрывает сутки целиком: удаляется, если закончилась до границы
+            if day + timedelta(days=1) <= cutoff:
+                cursor.execute(f"DROP TABLE {name}")
+                dropped.append(name)
+    return dropped
+
+
+def get_views_series(item_id, interval="day", days=30):
+    """Просмотры элемента за последние ``days`` суток по дням или часам (``TIME_ZONE``), без пропусков.
+
+    Один запрос по уникальному индексу ``(item_id, day)`` или ``(item_id, hour)``; события, ещё не
+    агрегированные ``rollup_view_events``, не учитываются.
+    """
+    now = timezone.localtime()
+    if interval == "day":
+        start = now.date() - timedelta(days=days - 1)
+        periods = [start + timedelta(days=offset) for offset in range(days)]
+        counts = ContentViewsDaily.objects.filter(item_id=item_id, day__gte=start).values_list("day", "views")
+    else:
+        start = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=days * 24 - 1)
+        periods = [start + timedelta(hours=offset) for offset in range(days * 24)]
+        counts = ContentViewsHourly.objects.filter(item_id=item_id, hour__gte=start).values_list("hour", "views")
+    counts = dict(counts)
+    return [{"period": period.isoformat(), "views": counts.get(period, 0)} for period in periods]
@@ -0,0 +1,221 @@
+import asyncio
+import json
+import logging
+from collections import deque
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+__all__ = [
+    "PUBLISHED",
+    "UPDATED",
+    "ContentEventBroker",
+    "broker",
+    "format_sse",
+    "notify_content_events",
+]
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "news_content_events"
+SEQUENCE = "news_content_event_seq"
+
+PUBLISHED = "published"
+UPDATED = "updated"
+RESET = "reset"
+
+# Каждый элемент получает номер из общей последовательности: один и тот же Last-Event-ID
+# понимают все процессы, а NOTIFY доставляется им в одном (порядок коммитов) порядке
+NOTIFY_SQL = f"""
+    SELECT pg_notify(%s, (item || jsonb_build_object('eventId', nextval('{SEQUENCE}')))::text)
+    FROM jsonb_array_elements(%s::jsonb) AS item
+"""
+
+
+def notify_content_events(event, items, using=DEFAULT_DB_ALIAS):
+    """Отправляет NOTIFY о событиях контента; ``items`` — итерируемое ``(id, category_id, published_at)``.
+
+    NOTIFY выполняется в текущей транзакции, поэтому подписчики получат событие только после коммита.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return
+
+    payload = [
+        {
+            "event": event,
+            "id": item_id,
+            "category": category_id,
+            "publishedAt": published_at.isoformat() if published_at else None,
+        }
+        for item_id, category_id, published_at in items
+    ]
+    if not payload:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(NOTIFY_SQL, [CHANNEL, json.dumps(payload)])
+
+
+def format_sse(event_type, data, event_id=None):
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def listen_conninfo(using=DEFAULT_DB_ALIAS):
+    """Параметры подключения Django (включая OPTIONS) в виде строки для отдельного async-соединения."""
+    from psycopg.conninfo import make_conninfo
+
+    params = connections[using].get_connection_params()
+    return make_conninfo(
+        **{
+            key: value
+            for key, value in params.items()
+            if isinstance(value, (str, int)) and key not in ("prepare_threshold", "server_side_binding")
+        }
+    )
+
+
+class Subscriber:
+    """Очередь событий одного SSE-соединения с ограниченной длиной."""
+
+    __slots__ = ("pending", "limit", "wakeup", "overflowed")
+
+    def __init__(self, limit):
+        self.pending = deque()
+        self.limit = limit
+        self.wakeup = asyncio.Event()
+        self.overflowed = False
+
+    def push(self, event):
+        if len(self.pending) >= self.limit:
+            self.overflowed = True
+        else:
+            self.pending.append(event)
+        self.wakeup.set()
+
+
+class ContentEventBroker:
+    """Одно LISTEN-соединение на процесс и раздача событий всем SSE-подписчикам.
+
+    Память ограничена: кольцевой буфер последних ``history_size`` событий для возобновления
+    по ``Last-Event-ID`` и не больше ``queue_size`` событий в очереди каждого подписчика.
+    Переполненный подписчик отключается и при переподключении дочитывает пропущенное из буфера.
+    """
+
+    def __init__(self, history_size=None, queue_size=None):
+        self.history_size = history_size or settings.NEWS_EVENTS_HISTORY_SIZE
+        self.queue_size = queue_size or settings.NEWS_EVENTS_QUEUE_SIZE
+        self.history = deque(maxlen=self.history_size)
+        self.subscribers = set()
+        self.listening = None
+        self._loop = None
+        self._task = None
+
+    def _ensure_listener(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Новый цикл событий (перезапуск воркера, тесты): состояние прежнего цикла недействительно
+            self._loop = loop
+            self._task = None
+            self.subscribers = set()
+            self.listening = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._listen())
+
+    async def _listen(self):
+        import psycopg
+
+        delay = 1
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(listen_conninfo(), autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {CHANNEL}")
+                    if self.history:
+                        # Пока соединения не было, события могли быть пропущены
+                        self.reset()
+                    self.listening.set()
+                    delay = 1
+                    async for notify in conn.notifies():
+                        self.dispatch(json.loads(notify.payload))
+            except psycopg.Error as exc:
+                logger.warning(f"Content events listener disconnected: {exc}; retrying in {delay}s")
+            self.listening.clear()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    async def aclose(self):
+        """Останавливает LISTEN-соединение (завершение воркера, тесты)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def dispatch(self, event):
+        self.history.append(event)
+        for subscriber in self.subscribers:
+            subscriber.push(event)
+
+    def reset(self):
+        self.history.clear()
+        for subscriber in self.subscribers:
+            subscriber.push(None)
+
+    def backlog(self, last_event_id):
+        """События после ``last_event_id`` или ``None``, если их уже нет в буфере."""
+        try:
+            last_event_id = int(last_event_id)
+        except (TypeError, ValueError):
+            return None
+        events = list(self.history)
+        for position, event in enumerate(events):
+            if event["eventId"] == last_event_id:
+                return events[position + 1 :]
+        return None
+
+    def subscribe(self, last_event_id=None, listen=True):
+        if listen:
+            self._ensure_listener()
+        subscriber = Subscriber(self.queue_size)
+        if last_event_id is not None:
+            backlog = self.backlog(last_event_id)
+            if backlog is None:
+                subscriber.push(None)
+            else:
+                for event in backlog:
+                    subscriber.push(event)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    async def stream(self, subscriber, heartbeat=None):
+        """SSE-поток подписчика; ``None`` в очереди означает событие ``reset`` (перечитать ленту)."""
+        heartbeat = heartbeat or settings.NEWS_EVENTS_HEARTBEAT_SECONDS
+        try:
+            yield f"retry: {settings.NEWS_EVENTS_RETRY_MS}\n\n"
+            while True:
+                while subscriber.pending:
+                    event = subscriber.pending.popleft()
+                    if event is None:
+                        yield format_sse(RESET, {})
+                    else:
+                        data = {key: event[key] for key in ("id", "category", "publishedAt")}
+                        yield format_sse(event["event"], data, event["eventId"])
+                if subscriber.overflowed:
+                    return
+                subscriber.wakeup.clear()
+                try:
+                    await asyncio.wait_for(subscriber.wakeup.wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+
+broker = ContentEventBroker()
@@ -0,0 +1,360 @@
+import asyncio
+import gzip
+import json
+import math
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from contextlib import ExitStack
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+from news.models import Category, ContentItem
+from news.ndjson import export_content, import_content
+
+DEFAULT_SIZES = "10000,100000,1000000"
+METRICS = ("p50_ms", "p95_ms", "p99_ms")
+RENDERERS = {"drf_json": JSONRenderer, "orjson": ORJSONRenderer, "msgpack": MessagePackRenderer}
+
+
+def percentile(samples, q):
+    """Перцентиль методом ближайшего ранга."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def compare_results(baseline, current, threshold):
+    """Возвращает список регрессий: метрика ухудшилась больше чем на ``threshold`` (доля)."""
+    regressions = []
+    for size, scenarios in current.get("results", {}).items():
+        for name, stats in scenarios.items():
+            base = baseline.get("results", {}).get(size, {}).get(name)
+            if not base:
+                continue
+            for metric in METRICS:
+                if base.get(metric) and stats[metric] > base[metric] * (1 + threshold):
+                    regressions.append(
+                        {
+                            "size": size,
+                            "scenario": name,
+                            "metric": metric,
+                            "baseline": base[metric],
+                            "current": stats[metric],
+                            "change": stats[metric] / base[metric] - 1,
+                        }
+                    )
+    return regressions
+
+
+class Command(BaseCommand):
+    help = "Benchmark API endpoints against generated datasets of increasing size (uses a separate test database)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated dataset sizes")
+        parser.add_argument("--iterations", type=int, default=50, help="Measured requests per scenario")
+        parser.add_argument("--heavy-iterations", type=int, default=3, help="Requests for full-feed scenarios")
+        parser.add_argument("--warmup", type=int, default=3, help="Unmeasured requests per scenario")
+        parser.add_argument("--scenarios", default="", help="Comma-separated scenario names to run (default: all)")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--workers", type=int, default=4, help="COPY workers for dataset generation")
+        parser.add_argument("--output", help="Write JSON results to this file")
+        parser.add_argument("--compare", help="Baseline JSON file to compare against")
+        parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative slowdown (0.15 = 15%%)")
+        parser.add_argument("--asgi", action="store_true", help="Send requests through the ASGI handler (AsyncClient)")
+        parser.add_argument("--concurrency", type=int, default=1, help="Concurrent in-flight requests (with --asgi)")
+        parser.add_argument(
+            "--renderers", action="store_true", help="Also compare size and CPU of each renderer on the response data"
+        )
+        parser.add_argument(
+            "--transfer", action="store_true", help="Also measure NDJSON export_content/import_content on each dataset"
+        )
+        parser.add_argument("--keepdb", action="store_true", help="Keep the benchmark database between runs")
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options["sizes"].split(",") if size)
+        selected = {name for name in options["scenarios"].split(",") if name}
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as fh:
+                baseline = json.load(fh)
+
+        setup_test_environment()
+        # Все алиасы, а не только default: реплики из DATABASE_REPLICAS становятся зеркалами тестовой БД,
+        # иначе чтения ушли бы на настоящие реплики
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options["keepdb"])
+        try:
+            results, transfer = {}, {}
+            for size in sizes:
+                self.ensure_dataset(size, options)
+                results[str(size)] = self.run_scenarios(size, selected, options)
+                if options["transfer"]:
+                    transfer[str(size)] = self.measure_transfer(size)
+        finally:
+            connections.close_all()  # соединения зеркал держат тестовую БД и не дают её удалить
+            teardown_databases(old_config, verbosity=0, keepdb=options["keepdb"])
+            teardown_test_environment()
+
+        report = {"meta": self.meta(options), "results": results}
+        if transfer:
+            report["transfer"] = transfer
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(report, fh, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Результаты сохранены в {options['output']}")
+
+        if baseline is not None:
+            regressions = compare_results(baseline, report, options["threshold"])
+            for r in regressions:
+                self.stdout.write(
+                    self.style.ERROR(
+                        f"REGRESSION {r['size']} {r['scenario']} {r['metric']}: "
+                        f"{r['baseline']:.2f} -> {r['current']:.2f} ms ({r['change']:+.0%})"
+                    )
+                )
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) above {options['threshold']:.0%}")
+            self.stdout.write(self.style.SUCCESS("Регрессий не обнаружено"))
+
+    def ensure_dataset(self, size, options):
+        """Догенерирует элементы до нужного размера, не пересоздавая уже загруженные."""
+        current = ContentItem.objects.count()
+        missing = size - current
+        if missing <= 0:
+            return
+        self.stdout.write(f"Генерация {missing} элементов (до {size})...")
+        call_command(
+            "generate_test_data",
+            articles=missing * 7 // 10,
+            videos=missing - missing * 7 // 10,
+            seed=options["seed"] + current,
+            workers=options["workers"],
+            stdout=StringIO(),
+        )
+
+    def scenarios(self):
+        published = ContentItem.objects.filter(status=ContentItem.Status.PUBLISHED)
+        published_count = published.count()
+        item = published.order_by("-published_at").only("id", "slug").first()
+        root = Category.objects.filter(parent__isnull=True).order_by("id").first()
+        deep_page = max(published_count // 20 * 9 // 10, 1)
+        excluded = list(published.order_by("-published_at").values_list("id", flat=True)[:200])
+
+        yield "feed_first_page", "get", "/news/feed/", {"pageSize": 20}, False
+        yield "feed_first_page_sideloaded", "get", "/news/feed/", {"pageSize": 20, "include": "categories"}, False
+        yield "feed_deep_page", "get", "/news/feed/", {"pageSize": 20, "pageNumber": deep_page}, False
+        if root:
+            yield "feed_category", "get", "/news/feed/", {"pageSize": 20, "categoryId": root.id}, False
+        yield "feed_all_news", "get", "/news/feed/", {"allNews": True}, True
+        yield "feed_post_excluded", "post", "/news/feed/", {"excluded": excluded}, True
+        yield "categories", "get", "/news/categories/", {}, False
+        if excluded:
+            yield "news_items", "get", "/news/items/", {"ids": ",".join(map(str, excluded[:20]))}, False
+        if item:
+            yield "news_detail", "get", f"/news/{item.id}/", {}, False
+            yield "v3_contents_detail", "get", f"/apiv3/contents/{item.slug}/", {}, False
+        yield "v3_contents_list", "get", "/apiv3/contents/", {}, False
+
+    def run_scenarios(self, size, selected, options):
+        client = Client()
+        async_client = AsyncClient()
+        results = {}
+        for name, method, url, data, heavy in self.scenarios():
+            if selected and name not in selected:
+                continue
+
+            def request():
+                if method == "post":
+                    return client.post(url, data, content_type="application/json")
+                return client.get(url, data)
+
+            def arequest():
+                if method == "post":
+                    return async_client.post(url, data, content_type="application/json")
+                return async_client.get(url, data)
+
+            for _ in range(options["warmup"]):
+                request()
+
+            iterations = options["heavy_iterations"] if heavy else options["iterations"]
+            if options["asgi"]:
+                latencies, cpu_times, wall = asyncio.run(
+                    self.measure_async(arequest, iterations, max(options["concurrency"], 1))
+                )
+            else:
+                latencies, cpu_times, wall = self.measure(request, iterations)
+
+            # Запросы всех алиасов: с репликами чтения идут не через default
+            with ExitStack() as stack:
+                captures = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+                tracemalloc.start()
+                response = request()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            if response.status_code != 200:
+                raise CommandError(f"{name}: unexpected status {response.status_code}")
+
+            results[name] = {
+                "iterations": iterations,
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p95_ms": round(percentile(latencies, 95), 3),
+                "p99_ms": round(percentile(latencies, 99), 3),
+                "cpu_p50_ms": round(percentile(cpu_times, 50), 3),
+                "rps": round(iterations / wall, 2) if wall else None,
+                "peak_memory_kb": round(peak / 1024, 1),
+                "queries": sum(len(capture.captured_queries) for capture in captures),
+                "response_bytes": len(response.content),
+            }
+            stats = results[name]
+            self.stdout.write(
+                f"{size:>9} {name:<22} p50={stats['p50_ms']:>9.2f}ms p95={stats['p95_ms']:>9.2f}ms "
+                f"p99={stats['p99_ms']:>9.2f}ms rps={stats['rps']:>8} mem={stats['peak_memory_kb']:>9}KB "
+                f"queries={stats['queries']}"
+            )
+            if options["renderers"] and hasattr(response, "data"):
+                stats["renderers"] = self.measure_renderers(response.data, iterations)
+                for renderer_name, renderer_stats in stats["renderers"].items():
+                    self.stdout.write(
+                        f"{'':>9} {'':<22} {renderer_name:<8} bytes={renderer_stats['bytes']:>10} "
+                        f"gzip={renderer_stats['gzip_bytes']:>9} cpu={renderer_stats['cpu_ms']:>8.3f}ms"
+                    )
+        return results
+
+    @staticmethod
+    def measure(request, iterations):
+        latencies, cpu_times = [], []
+        wall_start = time.perf_counter()
+        for _ in range(iterations):
+            start, cpu_start = time.perf_counter(), time.process_time()
+            request()
+            latencies.append((time.perf_counter() - start) * 1000)
+            cpu_times.append((time.process_time() - cpu_start) * 1000)
+        return latencies, cpu_times, time.perf_counter() - wall_start
+
+    @staticmethod
+    def measure_renderers(data, iterations):
+        """Размер ответа (как есть и после gzip) и CPU на один рендеринг для каждого рендерера."""
+        results, iterations = {}, max(iterations, 1)
+        for name, renderer_class in RENDERERS.items():
+            renderer = renderer_class()
+            cpu_start = time.process_time()
+            for _ in range(iterations):
+                body = renderer.render(data, renderer.media_type)
+            results[name] = {
+                "bytes": len(body),
+                "gzip_bytes": len(gzip.compress(body)),
+                "cpu_ms": round((time.process_time() - cpu_start) * 1000 / iterations, 3),
+            }
+        return results
+
+    def measure_transfer(self, size):
+        """Время и пиковая память выгрузки и повторной загрузки (upsert) всех элементов через NDJSON.
+
+        Время и память снимаются разными прогонами, чтобы tracemalloc не искажал скорость.
+        """
+        fd, path = tempfile.mkstemp(suffix=".ndjson")
+        os.close(fd)
+        try:
+            with open(path, "wb") as fh:
+                start = time.perf_counter()
+                rows = export_content(fh)
+                export_s = time.perf_counter() - start
+            with open(os.devnull, "wb") as fh:
+                export_peak = self.traced_peak(lambda: export_content(fh))
+
+            with open(path, "rb") as fh:
+                start = time.perf_counter()
+                import_content(fh)
+                import_s = time.perf_counter() - start
+            with open(path, "rb") as fh:
+                import_peak = self.traced_peak(lambda: import_content(fh))
+            file_bytes = os.path.getsize(path)
+        finally:
+            os.unlink(path)
+
+        stats = {
+            "rows": rows,
+            "file_bytes": file_bytes,
+            "export_s": round(export_s, 3),
+            "export_rows_per_s": round(rows / export_s) if export_s else None,
+            "export_peak_memory_kb": round(export_peak / 1024, 1),
+            "import_s": round(import_s, 3),
+            "import_rows_per_s": round(rows / import_s) if import_s else None,
+            "import_peak_memory_kb": round(import_peak / 1024, 1),
+        }
+        self.stdout.write(
+            f"{size:>9} {'transfer':<22} export={stats['export_s']:>8.2f}s ({stats['export_rows_per_s']} rows/s, "
+            f"mem={stats['export_peak_memory_kb']}KB) import={stats['import_s']:>8.2f}s "
+            f"({stats['import_rows_per_s']} rows/s, mem={stats['import_peak_memory_kb']}KB)"
+        )
+        return stats
+
+    @staticmethod
+    def traced_peak(func):
+        tracemalloc.start()
+        try:
+            func()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    @staticmethod
+    async def measure_async(arequest, iterations, concurrency):
+        """Держит ``concurrency`` запросов в полёте; CPU на запрос — среднее по всему прогону."""
+        latencies = []
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                await arequest()
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        await asyncio.gather(*(one() for _ in range(iterations)))
+        wall = time.perf_counter() - wall_start
+        cpu_per_request = (time.process_time() - cpu_start) * 1000 / max(iterations, 1)
+        # ORM под asyncio.run работает в отдельном потоке; его соединение иначе помешает удалить тестовую БД
+        await sync_to_async(connections.close_all)()
+        return latencies, [cpu_per_request], wall
+
+    @staticmethod
+    def meta(options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "commit": commit,
+            "created_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "iterations": options["iterations"],
+            "seed": options["seed"],
+            "asgi": options["asgi"],
+            "concurrency": options["concurrency"],
+            "async_views": settings.NEWS_ASYNC_VIEWS,
+        }
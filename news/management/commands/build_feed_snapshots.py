@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from news.snapshots import build_feed_snapshots
+
+
+class Command(BaseCommand):
+    help = "Rebuild static JSON snapshots of the first feed pages and the category tree (NEWS_FEED_SNAPSHOT_STORAGE)"
+
+    def handle(self, *args, **options):
+        written = build_feed_snapshots()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} feed snapshot files"))
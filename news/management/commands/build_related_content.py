@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from news.related import build_related_content
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the related-content index (top NEWS_RELATED_LIMIT neighbours by shared tags, category "
+        "proximity and recency) for all published items; run periodically so recency scores stay current"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Items recomputed per query and transaction")
+
+    def handle(self, *args, **options):
+        processed = build_related_content(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Recomputed related content for {processed} items"))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from news.similar import build_similar_index, update_similar_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the text-similarity index (TF-IDF vectors of title, lead and body) for all published items into "
+        "NEWS_SIMILAR_INDEX_DIR; with --incremental only items published or changed since the last full build "
+        "are re-indexed into a delta segment"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Rebuild only the delta segment against the current vocabulary (full build if there is none)",
+        )
+
+    def handle(self, *args, **options):
+        if options["incremental"]:
+            indexed = update_similar_index()
+            self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} new or changed items into the delta segment"))
+        else:
+            indexed = build_similar_index()
+            self.stdout.write(self.style.SUCCESS(f"Built the similarity index for {indexed} items"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from news.tag_arrays import check_tag_arrays
+
+SHOWN_IDS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the denormalized tag_ids/tag_slugs arrays of content items with the tags join table. "
+        "Exits with an error when they drifted; with --fix rewrites the drifted arrays instead"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Rewrite drifted arrays from the join table")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Item ID range checked per query")
+
+    def handle(self, *args, **options):
+        drifted = check_tag_arrays(fix=options["fix"], batch_size=options["batch_size"])
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("Tag arrays are consistent"))
+            return
+        shown = ", ".join(map(str, drifted[:SHOWN_IDS])) + (", ..." if len(drifted) > SHOWN_IDS else "")
+        if options["fix"]:
+            self.stdout.write(self.style.SUCCESS(f"Fixed tag arrays of {len(drifted)} items: {shown}"))
+        else:
+            raise CommandError(f"Tag arrays drifted for {len(drifted)} items: {shown}. Run with --fix")
@@ -0,0 +1,66 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from news.models import ContentItem
+from news.ndjson import export_content, split_id_range
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream content items (with category, author and tag slugs) as NDJSON through a server-side cursor; "
+        "with --workers the ID range is split into parallel part files"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default="-", help="Output file ('-' for stdout)")
+        parser.add_argument("--min-id", type=int, help="Export items with ID >= this value")
+        parser.add_argument("--max-id", type=int, help="Export items with ID <= this value")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Rows fetched from the cursor at once")
+        parser.add_argument(
+            "--workers", type=int, default=1, help="Split the ID range into this many files exported in parallel"
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        # Сводка не должна попадать в поток данных
+        log = self.stderr if output == "-" else self.stdout
+
+        if options["workers"] > 1:
+            if output == "-":
+                raise CommandError("--workers requires --output")
+            qs = ContentItem.objects.all()
+            if options["min_id"] is not None:
+                qs = qs.filter(id__gte=options["min_id"])
+            if options["max_id"] is not None:
+                qs = qs.filter(id__lte=options["max_id"])
+            path = Path(output)
+            parts = [
+                (path.with_name(f"{path.stem}.{number}{path.suffix}"), low, high)
+                for number, (low, high) in enumerate(split_id_range(qs, options["workers"]))
+            ]
+            with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+                written = sum(executor.map(lambda part: self.export_part_in_thread(*part, options), parts))
+            for part_path, low, high in parts:
+                log.write(f"  {part_path}: ID {low}-{high}")
+        elif output == "-":
+            written = export_content(sys.stdout.buffer, options["min_id"], options["max_id"], options["chunk_size"])
+            sys.stdout.buffer.flush()
+        else:
+            written = self.export_part(output, options["min_id"], options["max_id"], options)
+
+        log.write(self.style.SUCCESS(f"Exported {written} content items"))
+
+    @staticmethod
+    def export_part(path, min_id, max_id, options):
+        with open(path, "wb") as fh:
+            return export_content(fh, min_id, max_id, options["chunk_size"])
+
+    def export_part_in_thread(self, path, min_id, max_id, options):
+        try:
+            return self.export_part(path, min_id, max_id, options)
+        finally:
+            connections.close_all()
@@ -1,91 +1,235 @@
-from django.core.management.base import BaseCommand
-from news.models import ContentItem, Category
-from django.contrib.auth import get_user_model
-from faker import Faker
 import random
-from django.utils.text import slugify
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, transaction
 from django.utils import timezone as dj_timezone
+from faker import Faker
+
+from news.models import Category, ContentItem, Tag
+from news.tag_arrays import sync_tag_arrays
 
 User = get_user_model()
 
+FAKE_YT_IDS = ["98_5V4TxDa4", "dQw4w9WgXcQ", "oHg5SJYRHA0", "jNQXAC9IVRw", "M7lc1UVf-VE"]
+FAKE_RT_IDS = ["a1b2c3d4e5f6g7h8i9j0", "k1l2m3n4o5p6q7r8s9t0", "u1v2w3x4y5z6a7b8c9d0"]
+POOL_SIZE = 2000
+
 
 class Command(BaseCommand):
-    help = "Generate test data for ContentItem (Articles and Videos)"
+    help = (
+        "Generate a deterministic benchmark dataset: category tree, Zipf-distributed tags and "
+        "published/draft/scheduled articles and videos (loaded via COPY on PostgreSQL)"
+    )
 
     def add_arguments(self, parser):
         parser.add_argument("--articles", type=int, default=5000, help="Number of articles to create")
         parser.add_argument("--videos", type=int, default=5000, help="Number of videos to create")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed; the same seed yields the same data")
+        parser.add_argument("--category-depth", type=int, default=3, help="Depth of the generated category tree")
+        parser.add_argument("--category-fanout", type=int, default=4, help="Children per category node")
+        parser.add_argument("--tags", type=int, default=200, help="Number of tags to create")
+        parser.add_argument("--max-tags-per-item", type=int, default=5, help="Maximum tags assigned to one item")
+        parser.add_argument("--zipf-exponent", type=float, default=1.1, help="Exponent of the Zipf tag popularity")
+        parser.add_argument("--draft-ratio", type=float, default=0.05, help="Share of draft items")
+        parser.add_argument("--scheduled-ratio", type=float, default=0.02, help="Share of scheduled draft items")
+        parser.add_argument("--chunk-size", type=int, default=50000, help="Items per COPY chunk")
+        parser.add_argument("--workers", type=int, default=4, help="Parallel COPY workers (PostgreSQL only)")
 
     def handle(self, *args, **options):
-        fake = Faker("ru_RU")
-        categories = list(Category.objects.all())
-        if not categories:
-            self.stdout.write(self.style.WARNING("Нет категорий!"))
-            return
+        self.options = options
+        self.fake = Faker("ru_RU")
+        self.fake.seed_instance(options["seed"])
+        self.now = dj_timezone.now()
+        # Пулы текстов генерируются первыми, чтобы не зависеть от уже существующих категорий и тегов
+        self.pools = {
+            "titles": [self.fake.sentence(nb_words=6).rstrip(".") for _ in range(POOL_SIZE)],
+            "leads": [self.fake.text(max_nb_chars=200) for _ in range(POOL_SIZE)],
+            "bodies": [self.fake.text(max_nb_chars=1000) for _ in range(POOL_SIZE // 4)],
+        }
+
+        author_ids = list(User.objects.values_list("id", flat=True))
+        if not author_ids:
+            author_ids = [User.objects.create_user(username="generator").id]
+
+        category_ids = self.create_categories()
+        tag_ids = self.create_tags()
+        self.stdout.write(f"Категорий: {len(category_ids)}, тегов: {len(tag_ids)}")
+
+        self.author_ids = author_ids
+        self.category_ids = category_ids
+        self.tag_ids = tag_ids
+        self.tag_cum_weights = list(
+            accumulate(1 / rank ** options["zipf_exponent"] for rank in range(1, len(tag_ids) + 1))
+        )
 
-        authors = list(User.objects.all())
-        if not authors:
-            self.stdout.write(self.style.WARNING("Нет пользователей! Создай хотя бы одного пользователя."))
+        total = options["articles"] + options["videos"]
+        if total <= 0:
             return
 
-        num_articles = options["articles"]
-        num_videos = options["videos"]
-
-        # --- Генерация статей (ARTICLE) ---
-        self.stdout.write(f"Генерация {num_articles} статей...")
-        articles = []
-        for i in range(num_articles):
-            title = fake.sentence(nb_words=6).rstrip(".")
-            slug = slugify(title) + f"-{i}"
-            articles.append(
-                ContentItem(
-                    title=title,
-                    lead=fake.text(max_nb_chars=200),
-                    body=fake.text(max_nb_chars=1000),
-                    content_type=ContentItem.ContentType.ARTICLE,
-                    status=ContentItem.Status.PUBLISHED,
-                    published_at=fake.date_time_between(start_date="-1y", end_date="now", tzinfo=dj_timezone.utc),
-                    category=random.choice(categories),
-                    author=random.choice(authors),
-                    slug=slug,
-                    is_featured=random.choices([True, False], weights=[1, 3], k=1)[0],
+        first_id = self.reserve_ids(total)
+        chunk_size = options["chunk_size"]
+        chunks = [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+
+        self.stdout.write(f"Генерация {total} элементов контента ({len(chunks)} чанков)...")
+        if connection.vendor == "postgresql" and options["workers"] > 1:
+            with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+                list(executor.map(lambda chunk: self.load_chunk_in_thread(first_id, *chunk), chunks))
+        else:
+            for chunk in chunks:
+                self.load_chunk(first_id, *chunk)
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {ContentItem._meta.db_table}")
+                cursor.execute(f"ANALYZE {ContentItem.tags.through._meta.db_table}")
+
+        self.stdout.write(self.style.SUCCESS(f"Успешно сгенерировано {total} элементов в ContentItem!"))
+
+    def create_categories(self):
+        """Создаёт дерево категорий заданной глубины и ветвистости (повторный запуск переиспользует его)."""
+        depth, fanout = self.options["category_depth"], self.options["category_fanout"]
+        existing = dict(Category.objects.filter(slug__startswith="gen-").values_list("slug", "id"))
+
+        ids = []
+        level = [(None, "gen")]
+        for _ in range(depth):
+            next_level = []
+            for parent_id, parent_slug in level:
+                for i in range(fanout):
+                    slug = f"{parent_slug}-{i}"
+                    if slug not in existing:
+                        category = Category.objects.create(
+                            name=f"{self.fake.word().capitalize()} {slug[4:]}",
+                            slug=slug,
+                            parent_id=parent_id,
+                            type=Category.CategoryType.VIDEO if i % 2 else Category.CategoryType.ARTICLE,
+                        )
+                        existing[slug] = category.id
+                    ids.append(existing[slug])
+                    next_level.append((existing[slug], slug))
+            level = next_level
+        return ids or list(Category.objects.values_list("id", flat=True))
+
+    def create_tags(self):
+        existing = set(Tag.objects.filter(slug__startswith="gen-tag-").values_list("slug", flat=True))
+        Tag.objects.bulk_create(
+            [
+                Tag(name=f"{self.fake.word()} {i}", slug=f"gen-tag-{i}")
+                for i in range(self.options["tags"])
+                if f"gen-tag-{i}" not in existing
+            ],
+            batch_size=1000,
+        )
+        slugs = [f"gen-tag-{i}" for i in range(self.options["tags"])]
+        by_slug = dict(Tag.objects.filter(slug__in=slugs).values_list("slug", "id"))
+        # Порядок определяет ранг тега в распределении Ципфа
+        return [by_slug[slug] for slug in slugs]
+
+    def reserve_ids(self, count):
+        """Резервирует непрерывный диапазон первичных ключей ContentItem и возвращает первый из них."""
+        table = ContentItem._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "SELECT setval(pg_get_serial_sequence(%s, 'id'), nextval(pg_get_serial_sequence(%s, 'id')) + %s)",
+                    [table, table, count - 1],
                 )
-            )
-        ContentItem.objects.bulk_create(articles, batch_size=500)
-
-        # --- Генерация видео (VIDEO) ---
-        self.stdout.write(f"Генерация {num_videos} видео...")
-        videos = []
-        fake_yt_ids = ["98_5V4TxDa4", "dQw4w9WgXcQ", "oHg5SJYRHA0", "jNQXAC9IVRw", "M7lc1UVf-VE"]
-        fake_rt_ids = ["a1b2c3d4e5f6g7h8i9j0", "k1l2m3n4o5p6q7r8s9t0", "u1v2w3x4y5z6a7b8c9d0"]
-
-        for i in range(num_videos):
-            title = fake.sentence(nb_words=6).rstrip(".")
-            slug = slugify(title) + f"-{num_articles + i}"
-            # Случайно выбираем платформу
-            platform = random.choice(["youtube", "rutube", "vk"])
-            item = ContentItem(
-                title=title,
-                lead=fake.text(max_nb_chars=200),
-                content_type=ContentItem.ContentType.VIDEO,
-                status=ContentItem.Status.PUBLISHED,
-                published_at=fake.date_time_between(start_date="-1y", end_date="now", tzinfo=dj_timezone.utc),
-                category=random.choice(categories),
-                author=random.choice(authors),
-                slug=slug,
-                is_featured=random.choices([True, False], weights=[1, 4], k=1)[0],
-            )
-            if platform == "youtube":
-                item.youtube_id = random.choice(fake_yt_ids)
-            elif platform == "rutube":
-                item.rutube_id = random.choice(fake_rt_ids)
+                return cursor.fetchone()[0] - count + 1
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+            return cursor.fetchone()[0] + 1
+
+    def load_chunk_in_thread(self, first_id, start, end):
+        try:
+            self.load_chunk(first_id, start, end)
+        finally:
+            connections.close_all()
+
+    def load_chunk(self, first_id, start, end):
+        rng = random.Random(f"{self.options['seed']}:{start}")
+        items, item_tags = [], []
+        for ordinal in range(start, end):
+            item_id = first_id + ordinal
+            items.append(self.build_item(rng, item_id, ordinal))
+            item_tags.extend((item_id, tag_id) for tag_id in self.pick_tags(rng))
+
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                self.copy_rows(ContentItem._meta.db_table, items)
+                self.copy_rows(ContentItem.tags.through._meta.db_table, item_tags, ["contentitem_id", "tag_id"])
             else:
-                item.vkvideo_id = f"{random.randint(100000000, 999999999)}_{random.randint(100000000, 999999999)}"
+                attnames = [field.attname for field in ContentItem._meta.concrete_fields]
+                ContentItem.objects.bulk_create(
+                    [ContentItem(**dict(zip(attnames, row))) for row in items], batch_size=1000
+                )
+                through = ContentItem.tags.through
+                through.objects.bulk_create(
+                    [through(contentitem_id=item_id, tag_id=tag_id) for item_id, tag_id in item_tags],
+                    batch_size=5000,
+                )
+            sync_tag_arrays(range(first_id + start, first_id + end))
+        self.stdout.write(f"  чанк {start}-{end} загружен")
+
+    def copy_rows(self, table, rows, columns=None):
+        columns = columns or self.item_columns
+        with connection.cursor() as cursor:
+            with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(row)
+
+    @property
+    def item_columns(self):
+        return [field.column for field in ContentItem._meta.concrete_fields]
 
-            videos.append(item)
+    def build_item(self, rng, item_id, ordinal):
+        is_video = ordinal >= self.options["articles"]
+        published_at = scheduled_at = None
+        roll = rng.random()
+        if roll < self.options["draft_ratio"]:
+            status = ContentItem.Status.DRAFT
+        elif roll < self.options["draft_ratio"] + self.options["scheduled_ratio"]:
+            status = ContentItem.Status.DRAFT
+            scheduled_at = self.now + timedelta(minutes=rng.randint(1, 7 * 24 * 60))
+        else:
+            status = ContentItem.Status.PUBLISHED
+            published_at = self.now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+        created_at = (published_at or self.now) - timedelta(minutes=rng.randint(0, 24 * 60))
 
-        ContentItem.objects.bulk_create(videos, batch_size=500)
+        values = {
+            "id": item_id,
+            "title": rng.choice(self.pools["titles"]),
+            "lead": rng.choice(self.pools["leads"]),
+            "body": "" if is_video else rng.choice(self.pools["bodies"]),
+            "content_type": ContentItem.ContentType.VIDEO if is_video else ContentItem.ContentType.ARTICLE,
+            "status": status,
+            "created_at": created_at,
+            "scheduled_at": scheduled_at,
+            "published_at": published_at,
+            "updated_at": published_at or created_at,
+            "category_id": rng.choice(self.category_ids),
+            "author_id": rng.choice(self.author_ids),
+            "slug": f"gen-{self.options['seed']}-{ordinal}",
+            "is_featured": rng.random() < (0.2 if is_video else 0.25),
+        }
+        if is_video:
+            platform = rng.choice(["youtube", "rutube", "vk"])
+            if platform == "youtube":
+                values["youtube_id"] = rng.choice(FAKE_YT_IDS)
+            elif platform == "rutube":
+                values["rutube_id"] = rng.choice(FAKE_RT_IDS)
+            else:
+                values["vkvideo_id"] = f"{rng.randint(100000000, 999999999)}_{rng.randint(100000000, 999999999)}"
 
-        self.stdout.write(
-            self.style.SUCCESS(f"Успешно сгенерировано {num_articles} статей и {num_videos} видео в ContentItem!")
+        return tuple(
+            values[field.attname] if field.attname in values else field.get_default()
+            for field in ContentItem._meta.concrete_fields
         )
+
+    def pick_tags(self, rng):
+        if not self.tag_ids:
+            return set()
+        count = rng.randint(0, self.options["max_tags_per_item"])
+        return set(rng.choices(self.tag_ids, cum_weights=self.tag_cum_weights, k=count))
@@ -0,0 +1,60 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from news.ndjson import finish_import, import_content
+
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Load NDJSON produced by export_content, upserting content items on slug via COPY into a staging table; "
+        "several files (e.g. export parts) are loaded in parallel with --workers"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="NDJSON files ('-' for stdin)")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Lines per COPY batch and transaction")
+        parser.add_argument("--workers", type=int, default=1, help="Files loaded in parallel")
+        parser.add_argument("--default-author", help="Username assigned to items whose author does not exist")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("import_content requires PostgreSQL (COPY and INSERT ... ON CONFLICT)")
+        paths = options["paths"]
+        if "-" in paths and len(paths) > 1:
+            raise CommandError("stdin ('-') cannot be combined with other files")
+
+        if options["workers"] > 1 and len(paths) > 1:
+            with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+                results = list(executor.map(lambda path: self.import_file_in_thread(path, options), paths))
+        else:
+            results = [self.import_file(path, options) for path in paths]
+        finish_import()
+
+        created = sum(stats["created"] for _, stats in results)
+        updated = sum(stats["updated"] for _, stats in results)
+        errors = [(path, number, reason) for path, stats in results for number, reason in stats["errors"]]
+        for path, number, reason in errors[:MAX_REPORTED_ERRORS]:
+            self.stderr.write(f"{path}:{number}: {reason}")
+        message = f"Created {created}, updated {updated} content items, skipped {len(errors)} lines"
+        self.stdout.write(self.style.ERROR(message) if errors else self.style.SUCCESS(message))
+
+    def import_file(self, path, options):
+        def progress(line, stats):
+            self.stdout.write(f"  {path}: {line} строк, создано {stats['created']}, обновлено {stats['updated']}")
+
+        kwargs = {"batch_size": options["batch_size"], "default_author": options["default_author"]}
+        if path == "-":
+            return path, import_content(sys.stdin.buffer, progress=progress, **kwargs)
+        with open(path, "rb") as fh:
+            return path, import_content(fh, progress=progress, **kwargs)
+
+    def import_file_in_thread(self, path, options):
+        try:
+            return self.import_file(path, options)
+        finally:
+            connections.close_all()
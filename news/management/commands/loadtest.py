@@ -0,0 +1,260 @@
+import json
+import random
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from prometheus_client.parser import text_string_to_metric_families
+
+from news.management.commands.bench import percentile
+from news.models import ContentItem
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate an access log with the production traffic mix or replay one against a running server, "
+        "reporting latency histograms, cache hit rate and DB load over time"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--generate", metavar="PATH", help="Write a synthetic access log (JSONL) to PATH")
+        parser.add_argument("--replay", metavar="PATH", help="Replay the access log at PATH")
+        parser.add_argument("--duration", type=float, default=60, help="Generated log length in seconds")
+        parser.add_argument("--sessions-per-second", type=float, default=20, help="New feed sessions per second")
+        parser.add_argument("--publish-every", type=float, default=10, help="Seconds between publishes (0 = never)")
+        parser.add_argument("--zipf-exponent", type=float, default=1.2, help="Popularity skew of hit targets")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--base-url", default="http://localhost:8000", help="Server to replay against")
+        parser.add_argument("--concurrency", type=int, default=16, help="Concurrent in-flight requests")
+        parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier (2 = twice as fast)")
+        parser.add_argument("--token", help="API token for admin writes (publishes are skipped without it)")
+        parser.add_argument("--report-interval", type=float, default=5, help="Seconds between timeline reports")
+        parser.add_argument("--pg-stats", action="store_true", help="Sample pg_stat_database via the Django DB")
+        parser.add_argument("--output", help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        if bool(options["generate"]) == bool(options["replay"]):
+            raise CommandError("Specify exactly one of --generate or --replay")
+        if options["generate"]:
+            count = self.generate(options)
+            self.stdout.write(self.style.SUCCESS(f"Записано {count} запросов в {options['generate']}"))
+        else:
+            self.replay(options)
+
+    def generate(self, options):
+        """Строит журнал: прокрутка ленты с растущим списком excluded, хиты по Ципфу и периодические публикации."""
+        rng = random.Random(options["seed"])
+        published = list(
+            ContentItem.objects.filter(status=ContentItem.Status.PUBLISHED)
+            .order_by("-published_at")
+            .values_list("id", "slug")[:10000]
+        )
+        drafts = list(ContentItem.objects.filter(status=ContentItem.Status.DRAFT).values_list("slug", flat=True)[:1000])
+        if not published:
+            raise CommandError("Нет опубликованных элементов для генерации журнала")
+        cum_weights = list(accumulate(1 / rank ** options["zipf_exponent"] for rank in range(1, len(published) + 1)))
+
+        entries = []
+        t = 0.0
+        while t < options["duration"]:
+            t += rng.expovariate(options["sessions_per_second"])
+            entries.append(
+                {"t": t, "label": "feed", "method": "GET", "path": "/news/feed/", "params": {"pageSize": 20}}
+            )
+            seen = [item_id for item_id, _ in published[:20]]
+            session_t = t
+            for _ in range(rng.randint(0, 5)):
+                session_t += rng.uniform(1, 8)
+                entries.append(
+                    {
+                        "t": session_t,
+                        "label": "feed_scroll",
+                        "method": "POST",
+                        "path": "/news/feed/",
+                        "json": {"excluded": list(seen)},
+                    }
+                )
+                seen.extend(item_id for item_id, _ in published[len(seen) : len(seen) + 20])
+            for _ in range(rng.randint(0, 3)):
+                session_t += rng.uniform(0.5, 5)
+                item_id, slug = rng.choices(published, cum_weights=cum_weights)[0]
+                entries.append(
+                    {"t": session_t, "label": "hit", "method": "POST", "path": f"/apiv3/contents/{slug}/hit/"}
+                )
+                entries.append({"t": session_t, "label": "detail", "method": "GET", "path": f"/news/{item_id}/"})
+
+        if options["publish_every"] > 0:
+            for i, slug in enumerate(drafts):
+                publish_t = (i + 1) * options["publish_every"]
+                if publish_t >= options["duration"]:
+                    break
+                entries.append(
+                    {
+                        "t": publish_t,
+                        "label": "publish",
+                        "method": "PATCH",
+                        "path": f"/apiv3/contents/{slug}/",
+                        "json": {"status": ContentItem.Status.PUBLISHED},
+                        "auth": True,
+                    }
+                )
+
+        entries.sort(key=lambda entry: entry["t"])
+        with open(options["generate"], "w") as fh:
+            for entry in entries:
+                if entry["t"] <= options["duration"]:
+                    fh.write(json.dumps(entry) + "\n")
+        return len(entries)
+
+    def replay(self, options):
+        with open(options["replay"]) as fh:
+            entries = [json.loads(line) for line in fh if line.strip()]
+        if not options["token"]:
+            entries = [entry for entry in entries if not entry.get("auth")]
+
+        base_url = options["base_url"].rstrip("/")
+        local = threading.local()
+        lock = threading.Lock()
+        window = defaultdict(list)
+        totals = defaultdict(list)
+        errors = defaultdict(int)
+
+        def send(entry):
+            session = getattr(local, "session", None)
+            if session is None:
+                session = local.session = requests.Session()
+            headers = {"Authorization": f"Token {options['token']}"} if entry.get("auth") else {}
+            start = time.perf_counter()
+            try:
+                response = session.request(
+                    entry["method"],
+                    base_url + entry["path"],
+                    params=entry.get("params"),
+                    json=entry.get("json"),
+                    headers=headers,
+                    timeout=30,
+                )
+                failed = response.status_code >= 400
+            except requests.RequestException:
+                failed = True
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                window[entry["label"]].append(elapsed)
+                totals[entry["label"]].append(elapsed)
+                if failed:
+                    errors[entry["label"]] += 1
+
+        timeline = []
+        previous_sample = self.sample_server(base_url, options)
+        started = time.perf_counter()
+        next_report = started + options["report_interval"]
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            for entry in entries:
+                delay = started + entry["t"] / options["speed"] - time.perf_counter()
+                while delay > 0:
+                    time.sleep(min(delay, max(next_report - time.perf_counter(), 0.01)))
+                    if time.perf_counter() >= next_report:
+                        previous_sample = self.report(
+                            timeline, window, lock, previous_sample, started, base_url, options
+                        )
+                        next_report += options["report_interval"]
+                    delay = started + entry["t"] / options["speed"] - time.perf_counter()
+                executor.submit(send, entry)
+        self.report(timeline, window, lock, previous_sample, started, base_url, options)
+
+        summary = {
+            label: {
+                "requests": len(samples),
+                "errors": errors[label],
+                "p50_ms": round(percentile(samples, 50), 2),
+                "p95_ms": round(percentile(samples, 95), 2),
+                "p99_ms": round(percentile(samples, 99), 2),
+                "histogram_ms": self.histogram(samples),
+            }
+            for label, samples in totals.items()
+        }
+        for label, stats in sorted(summary.items()):
+            self.stdout.write(
+                f"{label:<12} n={stats['requests']:<7} err={stats['errors']:<5} p50={stats['p50_ms']:>8.1f}ms "
+                f"p95={stats['p95_ms']:>8.1f}ms p99={stats['p99_ms']:>8.1f}ms"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump({"summary": summary, "timeline": timeline}, fh, indent=2)
+
+    def report(self, timeline, window, lock, previous_sample, started, base_url, options):
+        with lock:
+            samples = {label: list(values) for label, values in window.items()}
+            window.clear()
+        current_sample = self.sample_server(base_url, options)
+        point = {
+            "elapsed_s": round(time.perf_counter() - started, 1),
+            "rps": round(sum(len(values) for values in samples.values()) / options["report_interval"], 1),
+            "p95_ms": {label: round(percentile(values, 95), 1) for label, values in samples.items()},
+            **self.server_delta(previous_sample, current_sample, options["report_interval"]),
+        }
+        timeline.append(point)
+        cache = point.get("cache_hit_rate")
+        self.stdout.write(
+            f"[{point['elapsed_s']:>6}s] rps={point['rps']:<7} "
+            f"cache_hit={'-' if cache is None else f'{cache:.0%}'} db_qps={point.get('db_queries_per_s', '-')} "
+            f"p95={point['p95_ms']}"
+        )
+        return current_sample
+
+    def sample_server(self, base_url, options):
+        """Снимает счётчики кэша и SQL-запросов с /metrics и, по желанию, pg_stat_database."""
+        sample = {}
+        try:
+            response = requests.get(f"{base_url}/metrics", timeout=5)
+            text = response.text if response.ok else ""
+        except requests.RequestException:
+            text = ""
+        for family in text_string_to_metric_families(text):
+            for s in family.samples:
+                if s.name == "cache_lookups_total":
+                    sample[f"cache_{s.labels['result']}"] = sample.get(f"cache_{s.labels['result']}", 0) + s.value
+                elif s.name == "http_request_db_queries_sum":
+                    sample["db_queries"] = sample.get("db_queries", 0) + s.value
+
+        if options["pg_stats"]:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT xact_commit, tup_returned, tup_fetched, blks_read, blks_hit "
+                    "FROM pg_stat_database WHERE datname = current_database()"
+                )
+                row = cursor.fetchone()
+            sample.update(zip(("xact_commit", "tup_returned", "tup_fetched", "blks_read", "blks_hit"), row))
+        return sample
+
+    @staticmethod
+    def server_delta(previous, current, interval):
+        delta = {key: current[key] - previous.get(key, 0) for key in current}
+        result = {}
+        lookups = delta.get("cache_hit", 0) + delta.get("cache_miss", 0)
+        result["cache_hit_rate"] = delta.get("cache_hit", 0) / lookups if lookups else None
+        if "db_queries" in delta:
+            result["db_queries_per_s"] = round(delta["db_queries"] / interval, 1)
+        if "xact_commit" in delta:
+            result["db_commits_per_s"] = round(delta["xact_commit"] / interval, 1)
+            result["db_tuples_per_s"] = round((delta["tup_returned"] + delta["tup_fetched"]) / interval, 1)
+            blocks = delta["blks_read"] + delta["blks_hit"]
+            result["db_buffer_hit_rate"] = round(delta["blks_hit"] / blocks, 4) if blocks else None
+        return result
+
+    @staticmethod
+    def histogram(samples):
+        """Накопительная гистограмма как в Prometheus: ``le_N`` — число запросов не дольше N мс."""
+        samples = sorted(samples)
+        counts = {f"le_{bound}": bisect_right(samples, bound) for bound in LATENCY_BUCKETS_MS}
+        counts["le_inf"] = len(samples)
+        return counts
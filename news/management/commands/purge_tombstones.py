@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from news.models import ContentTombstone
+
+
+class Command(BaseCommand):
+    help = "Delete content tombstones older than the retention period (NEWS_TOMBSTONE_RETENTION_DAYS)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Override the retention period in days")
+
+    def handle(self, *args, **options):
+        days = options["days"] or settings.NEWS_TOMBSTONE_RETENTION_DAYS
+        deleted, _ = ContentTombstone.objects.filter(created_at__lt=timezone.now() - timedelta(days=days)).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstones older than {days} days"))
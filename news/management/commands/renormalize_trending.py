@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from news.trending import renormalize_trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the trending epoch to now and rescale trending scores so they do not overflow; ranking is unchanged. "
+        "Run periodically, e.g. daily"
+    )
+
+    def handle(self, *args, **options):
+        updated = renormalize_trending()
+        self.stdout.write(self.style.SUCCESS(f"Renormalized trending scores of {updated} items"))
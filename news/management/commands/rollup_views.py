@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from news.analytics import drop_expired_view_partitions, ensure_view_event_partitions, rollup_view_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintain view analytics: create upcoming daily partitions of the view-event table, add newly recorded "
+        "events to the hourly and daily rollups, and drop partitions older than NEWS_VIEW_EVENTS_RETENTION_DAYS. "
+        "Run every few minutes"
+    )
+
+    def handle(self, *args, **options):
+        ensure_view_event_partitions()
+        rolled_up_to = rollup_view_events()
+        dropped = drop_expired_view_partitions()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rolled up view events to {rolled_up_to.isoformat()}, dropped {len(dropped)} partitions"
+            )
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from news.models import BulkJob
+
+
+class Command(BaseCommand):
+    help = "Run queued admin bulk jobs in batches until the queue is empty"
+
+    def handle(self, *args, **options):
+        count = 0
+        while (job := BulkJob.claim()) is not None:
+            job.run()
+            count += 1
+            style = self.style.SUCCESS if job.status == BulkJob.Status.DONE else self.style.ERROR
+            self.stdout.write(
+                style(f"{job}: {job.get_status_display()}, {job.processed} processed, {job.changed} changed")
+            )
+        if not count:
+            self.stdout.write("No bulk jobs to run")
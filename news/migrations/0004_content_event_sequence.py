@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0003_alter_category_type"),
+    ]
+
+    operations = [
+        # Номера событий для SSE-потока (news.events): общие для всех процессов, чтобы работал Last-Event-ID
+        migrations.RunSQL(
+            "CREATE SEQUENCE IF NOT EXISTS news_content_event_seq",
+            "DROP SEQUENCE IF EXISTS news_content_event_seq",
+        ),
+    ]
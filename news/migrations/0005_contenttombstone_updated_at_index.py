@@ -0,0 +1,36 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0004_content_event_sequence"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContentTombstone",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("content_id", models.BigIntegerField(verbose_name="ID контента")),
+                (
+                    "reason",
+                    models.CharField(
+                        choices=[("deleted", "Удалён"), ("unpublished", "Снят с публикации")],
+                        verbose_name="Причина",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now, verbose_name="Дата")),
+            ],
+            options={
+                "verbose_name": "Удалённый элемент",
+                "verbose_name_plural": "Удалённые элементы",
+                "indexes": [models.Index(fields=["created_at", "id"], name="news_conten_created_17bcb6_idx")],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="contentitem",
+            index=models.Index(fields=["updated_at", "id"], name="news_conten_updated_f2caed_idx"),
+        ),
+    ]
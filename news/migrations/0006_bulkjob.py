@@ -0,0 +1,72 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0005_contenttombstone_updated_at_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BulkJob",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("publish", "Публикация"),
+                            ("draft", "Перевод в черновики"),
+                            ("refresh_metadata", "Обновление метаданных видео"),
+                        ],
+                        verbose_name="Действие",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "В очереди"),
+                            ("running", "Выполняется"),
+                            ("done", "Завершена"),
+                            ("failed", "Ошибка"),
+                        ],
+                        default="pending",
+                        verbose_name="Статус",
+                    ),
+                ),
+                ("selection", models.JSONField(default=dict, editable=False, verbose_name="Выборка")),
+                ("owner", models.UUIDField(blank=True, editable=False, null=True, verbose_name="Воркер")),
+                ("batch_size", models.PositiveIntegerField(verbose_name="Размер пакета")),
+                ("total", models.PositiveIntegerField(blank=True, null=True, verbose_name="Всего")),
+                ("processed", models.PositiveIntegerField(default=0, verbose_name="Обработано")),
+                ("changed", models.PositiveIntegerField(default=0, verbose_name="Изменено")),
+                ("failed", models.PositiveIntegerField(default=0, verbose_name="С ошибкой")),
+                ("last_id", models.BigIntegerField(default=0, verbose_name="Последний ID")),
+                ("error", models.TextField(blank=True, verbose_name="Ошибка")),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now, verbose_name="Создана")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="Обновлена")),
+                ("finished_at", models.DateTimeField(blank=True, null=True, verbose_name="Завершена")),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Автор",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Пакетная операция",
+                "verbose_name_plural": "Пакетные операции",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
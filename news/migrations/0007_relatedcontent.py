@@ -0,0 +1,45 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0006_bulkjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RelatedContent",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("score", models.FloatField(verbose_name="Оценка сходства")),
+                (
+                    "item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="related_links",
+                        to="news.contentitem",
+                        verbose_name="Элемент",
+                    ),
+                ),
+                (
+                    "related",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="news.contentitem",
+                        verbose_name="Похожий элемент",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Похожий элемент",
+                "verbose_name_plural": "Похожие элементы",
+                "indexes": [models.Index(fields=["item", "-score"], name="news_relate_item_id_b65006_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("item", "related"), name="news_related_content_unique")
+                ],
+            },
+        ),
+    ]
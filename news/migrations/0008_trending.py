@@ -0,0 +1,37 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0007_relatedcontent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrendingEpoch",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("started_at", models.DateTimeField(default=django.utils.timezone.now, verbose_name="Начало эпохи")),
+            ],
+            options={
+                "verbose_name": "Эпоха рейтинга популярности",
+                "verbose_name_plural": "Эпохи рейтинга популярности",
+            },
+        ),
+        migrations.AddField(
+            model_name="contentitem",
+            name="trending_score",
+            field=models.FloatField(
+                db_default=0.0,
+                default=0.0,
+                help_text="Просмотры с экспоненциальным затуханием относительно эпохи TrendingEpoch (news.trending)",
+                verbose_name="Рейтинг популярности",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contentitem",
+            index=models.Index(fields=["status", "-trending_score", "-id"], name="news_conten_status_99bbcd_idx"),
+        ),
+    ]
@@ -0,0 +1,78 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def item_field():
+    return models.ForeignKey(
+        on_delete=django.db.models.deletion.CASCADE,
+        related_name="+",
+        to="news.contentitem",
+        verbose_name="Элемент",
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0008_trending"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContentViewsHourly",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("hour", models.DateTimeField(verbose_name="Час")),
+                ("views", models.PositiveIntegerField(verbose_name="Просмотры")),
+                ("item", item_field()),
+            ],
+            options={
+                "verbose_name": "Просмотры за час",
+                "verbose_name_plural": "Просмотры по часам",
+                "constraints": [
+                    models.UniqueConstraint(fields=("item", "hour"), name="news_content_views_hourly_unique")
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ContentViewsDaily",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField(verbose_name="День")),
+                ("views", models.PositiveIntegerField(verbose_name="Просмотры")),
+                ("item", item_field()),
+            ],
+            options={
+                "verbose_name": "Просмотры за день",
+                "verbose_name_plural": "Просмотры по дням",
+                "constraints": [
+                    models.UniqueConstraint(fields=("item", "day"), name="news_content_views_daily_unique")
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ViewRollupState",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("rolled_up_to", models.DateTimeField(verbose_name="Агрегировано до")),
+            ],
+            options={
+                "verbose_name": "Состояние агрегации просмотров",
+                "verbose_name_plural": "Состояние агрегации просмотров",
+            },
+        ),
+        # События просмотров: только вставка, секции по суткам (UTC) создаёт и удаляет news.analytics.
+        # Модели нет: к таблице обращается только SQL из news.analytics, а первичный ключ секционированной
+        # таблицы должен включать дату, так что обычный id невозможен.
+        migrations.RunSQL(
+            sql=[
+                "CREATE TABLE news_viewevent ("
+                " item_id bigint NOT NULL,"
+                " viewed_at timestamptz NOT NULL,"
+                " recorded_at timestamptz NOT NULL DEFAULT now()"
+                ") PARTITION BY RANGE (viewed_at)",
+                "CREATE INDEX news_viewevent_recorded_at_brin ON news_viewevent USING brin (recorded_at)",
+            ],
+            reverse_sql=["DROP TABLE news_viewevent"],
+        ),
+    ]
@@ -0,0 +1,58 @@
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0009_view_analytics"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contentitem",
+            name="tag_ids",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.BigIntegerField(),
+                db_default=[],
+                default=list,
+                editable=False,
+                help_text="Копия tags по возрастанию ID, поддерживается news.tag_arrays",
+                size=None,
+                verbose_name="ID тегов",
+            ),
+        ),
+        migrations.AddField(
+            model_name="contentitem",
+            name="tag_slugs",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.SlugField(),
+                db_default=[],
+                default=list,
+                editable=False,
+                help_text="Slug тегов в порядке tag_ids",
+                size=None,
+                verbose_name="Slug тегов",
+            ),
+        ),
+        migrations.RunSQL(
+            sql=[
+                "UPDATE news_contentitem i SET tag_ids = t.ids, tag_slugs = t.slugs FROM ("
+                " SELECT ct.contentitem_id, array_agg(tag.id ORDER BY tag.id) AS ids,"
+                " array_agg(tag.slug ORDER BY tag.id) AS slugs"
+                " FROM news_contentitem_tags ct JOIN news_tag tag ON tag.id = ct.tag_id"
+                " GROUP BY ct.contentitem_id"
+                ") t WHERE i.id = t.contentitem_id",
+            ],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name="contentitem",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["tag_ids"], name="news_content_tag_ids_gin"),
+        ),
+        migrations.AddIndex(
+            model_name="contentitem",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["tag_slugs"], name="news_content_tag_slugs_gin"),
+        ),
+    ]
@@ -1,3 +1,8 @@
 from .category import *
 from .tag import *
 from .content_item import *
+from .content_tombstone import *
+from .bulk_job import *
+from .related_content import *
+from .trending_epoch import *
+from .content_views import *
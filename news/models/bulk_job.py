@@ -0,0 +1,179 @@
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from core.models import BaseModel
+from news.models.content_item import ContentItem
+
+__all__ = ["BulkJob", "LeaseLost"]
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLost(Exception):
+    """Задачу подхватил другой воркер: текущий должен прекратить её выполнение."""
+
+
+class BulkJob(BaseModel):
+    """Пакетная операция над элементами контента из админки, выполняемая командой ``run_bulk_jobs``
+
+    Выборка хранится декларативно: явно отмеченные ID (``{"ids": [...]}``) или параметры фильтров и поиска
+    списка контента в админке при «выбрать все» (``{"changelist": {...}}``). Воркер обходит её по возрастанию
+    ``id`` пакетами по ``batch_size`` элементов (keyset), поэтому задача продолжается с ``last_id`` после
+    перезапуска воркера. Прогресс пишет только воркер, владеющий задачей (``owner``): задачу, подхваченную
+    другим воркером как зависшую, прежний владелец бросает.
+    """
+
+    class Action(models.TextChoices):
+        PUBLISH = "publish", _("Публикация")
+        DRAFT = "draft", _("Перевод в черновики")
+        REFRESH_METADATA = "refresh_metadata", _("Обновление метаданных видео")
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("В очереди")
+        RUNNING = "running", _("Выполняется")
+        DONE = "done", _("Завершена")
+        FAILED = "failed", _("Ошибка")
+
+    action = models.CharField(choices=Action.choices, verbose_name=_("Действие"))
+    status = models.CharField(choices=Status.choices, default=Status.PENDING, verbose_name=_("Статус"))
+    selection = models.JSONField(default=dict, editable=False, verbose_name=_("Выборка"))
+    owner = models.UUIDField(null=True, blank=True, editable=False, verbose_name=_("Воркер"))
+    batch_size = models.PositiveIntegerField(verbose_name=_("Размер пакета"))
+    total = models.PositiveIntegerField(null=True, blank=True, verbose_name=_("Всего"))
+    processed = models.PositiveIntegerField(default=0, verbose_name=_("Обработано"))
+    changed = models.PositiveIntegerField(default=0, verbose_name=_("Изменено"))
+    failed = models.PositiveIntegerField(default=0, verbose_name=_("С ошибкой"))
+    last_id = models.BigIntegerField(default=0, verbose_name=_("Последний ID"))
+    error = models.TextField(blank=True, verbose_name=_("Ошибка"))
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name=_("Автор")
+    )
+    created_at = models.DateTimeField(default=timezone.now, verbose_name=_("Создана"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Обновлена"))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Завершена"))
+
+    class Meta:
+        verbose_name = _("Пакетная операция")
+        verbose_name_plural = _("Пакетные операции")
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"#{self.pk} {self.get_action_display()}"
+
+    @classmethod
+    def enqueue(cls, action, ids=None, changelist=None, user=None):
+        """Ставит задачу в очередь: ``ids`` — явно выбранные элементы, ``changelist`` — параметры GET списка
+        контента в админке (фильтры и поиск), когда выбраны все элементы. Сами элементы здесь не читаются."""
+        selection = {"changelist": changelist} if changelist is not None else {"ids": sorted(set(ids))}
+        return cls.objects.create(
+            action=action, selection=selection, batch_size=settings.NEWS_BULK_JOB_BATCH_SIZE, created_by=user
+        )
+
+    @classmethod
+    def claim(cls):
+        """Берёт следующую задачу из очереди или задачу, чей воркер перестал обновлять прогресс."""
+        stale_before = timezone.now() - timedelta(seconds=settings.NEWS_BULK_JOB_STALE_SECONDS)
+        with transaction.atomic():
+            job = (
+                cls.objects.filter(
+                    Q(status=cls.Status.PENDING) | Q(status=cls.Status.RUNNING, updated_at__lt=stale_before)
+                )
+                .order_by("created_at", "id")
+                .select_for_update(skip_locked=True)
+                .first()
+            )
+            if job is not None:
+                job.status = cls.Status.RUNNING
+                job.owner = uuid.uuid4()
+                job.save(update_fields=["status", "owner", "updated_at"])
+        return job
+
+    def get_queryset(self):
+        if "changelist" in self.selection:
+            from news.admin import content_changelist_queryset
+
+            return content_changelist_queryset(self.selection["changelist"], self.created_by)
+        return ContentItem.objects.filter(id__in=self.selection["ids"])
+
+    def _save_progress(self, *fields):
+        """Сохраняет ``fields``, только пока задача принадлежит этому воркеру; иначе — ``LeaseLost``."""
+        self.updated_at = timezone.now()
+        values = {field: getattr(self, field) for field in fields}
+        if not BulkJob.objects.filter(pk=self.pk, owner=self.owner).update(updated_at=self.updated_at, **values):
+            raise LeaseLost(f"Bulk job {self.pk} was claimed by another worker")
+
+    def heartbeat(self):
+        """Продлевает владение задачей между сохранениями прогресса (долгие пакеты)."""
+        self._save_progress()
+
+    @property
+    def progress(self):
+        if not self.total:
+            return 100 if self.status == self.Status.DONE else 0
+        return min(round(self.processed * 100 / self.total), 100)
+
+    def run(self):
+        from news.snapshots import deferred_feed_snapshot_rebuild
+
+        handler = {
+            self.Action.PUBLISH: self._publish_batch,
+            self.Action.DRAFT: self._draft_batch,
+            self.Action.REFRESH_METADATA: self._refresh_metadata_batch,
+        }[self.action]
+        try:
+            qs = self.get_queryset().order_by("id").values_list("id", flat=True).distinct()
+            if self.total is None:
+                self.total = qs.count()
+                self._save_progress("total")
+            while ids := list(qs.filter(id__gt=self.last_id)[: self.batch_size]):
+                # Кэш, события и снимки ленты обновляются один раз на пакет
+                with deferred_feed_snapshot_rebuild():
+                    changed, failed = handler(ids)
+                self.processed += len(ids)
+                self.changed += changed
+                self.failed += failed
+                self.last_id = ids[-1]
+                self._save_progress("processed", "changed", "failed", "last_id")
+        except LeaseLost:
+            logger.warning(f"Bulk job {self.pk} was claimed by another worker, stopping")
+            self.refresh_from_db()
+            return
+        except Exception as exc:
+            logger.exception(f"Bulk job {self.pk} failed")
+            self.status = self.Status.FAILED
+            self.error = str(exc)
+        else:
+            self.status = self.Status.DONE
+        self.finished_at = timezone.now()
+        try:
+            self._save_progress("status", "error", "finished_at")
+        except LeaseLost:
+            self.refresh_from_db()
+
+    @staticmethod
+    def _publish_batch(ids):
+        return len(ContentItem.publish_many(ids)), 0
+
+    @staticmethod
+    def _draft_batch(ids):
+        return len(ContentItem.hide_many(ids)), 0
+
+    def _refresh_metadata_batch(self, ids):
+        # Без общей транзакции: запросы к YouTube/RuTube не должны держать блокировки. Каждый запрос
+        # может идти секунды, поэтому владение задачей продлевается после каждого элемента
+        changed = failed = 0
+        for item in ContentItem.objects.filter(id__in=ids, content_type=ContentItem.ContentType.VIDEO).order_by("id"):
+            try:
+                changed += item.fetch_metadata()
+            except Exception:
+                logger.exception(f"Metadata refresh failed for content item {item.pk}")
+                failed += 1
+            self.heartbeat()
+        return changed, failed
@@ -4,18 +4,30 @@ import time
 
 from django.utils.text import Truncator
 from django.conf import settings
-from django.db import models
-from django.db.models.functions import Now
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.db import DatabaseError, models, router, transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce, Now
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from requests.exceptions import RequestException, Timeout
 
+from core.metrics import METADATA_FETCHES, SCHEDULED_PUBLISH_LAG
 from core.models import BaseModel
+from news.events import PUBLISHED, UPDATED, notify_content_events
+from news.models.content_tombstone import ContentTombstone
 
 __all__ = ["ContentItem"]
 
 logger = logging.getLogger(__name__)
 
+# Копия M2M tags, которую пишет только news.tag_arrays
+TAG_ARRAY_FIELDS = {"tag_ids", "tag_slugs"}
+
+# Поля, значения которых в базе запоминаются при загрузке и сохранении: по ним видны реальные переходы
+TRACKED_FIELDS = ("status", "category_id")
+
 
 class ContentItem(BaseModel):
 
@@ -49,6 +61,22 @@ class ContentItem(BaseModel):
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, verbose_name=_("Автор"))
     tags = models.ManyToManyField("Tag", blank=True, verbose_name=_("Теги"))
     status = models.CharField(choices=Status.choices, default=Status.DRAFT, verbose_name=_("Статус"))  #!
+    tag_ids = ArrayField(
+        models.BigIntegerField(),
+        default=list,
+        db_default=[],
+        editable=False,
+        verbose_name=_("ID тегов"),
+        help_text=_("Копия tags по возрастанию ID, поддерживается news.tag_arrays"),
+    )
+    tag_slugs = ArrayField(
+        models.SlugField(),
+        default=list,
+        db_default=[],
+        editable=False,
+        verbose_name=_("Slug тегов"),
+        help_text=_("Slug тегов в порядке tag_ids"),
+    )
 
     created_at = models.DateTimeField(
         default=timezone.now,
@@ -70,6 +98,12 @@ class ContentItem(BaseModel):
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Обновлено"))
 
     views = models.PositiveIntegerField(default=0, verbose_name=_("Просмотры"))
+    trending_score = models.FloatField(
+        default=0.0,
+        db_default=0.0,
+        verbose_name=_("Рейтинг популярности"),
+        help_text=_("Просмотры с экспоненциальным затуханием относительно эпохи TrendingEpoch (news.trending)"),
+    )
 
     content_type = models.CharField(
         choices=ContentType.choices, default=ContentType.ARTICLE, verbose_name=_("Тип контента")
@@ -94,13 +128,99 @@ class ContentItem(BaseModel):
         indexes = [
             models.Index(fields=["status", "-published_at"]),
             models.Index(fields=["category", "status", "-published_at"]),
+            models.Index(fields=["updated_at", "id"]),
+            models.Index(fields=["status", "-trending_score", "-id"]),
+            GinIndex(fields=["tag_ids"], name="news_content_tag_ids_gin"),
+            GinIndex(fields=["tag_slugs"], name="news_content_tag_slugs_gin"),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_state()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._remember_state(fields)
+
+    def _remember_state(self, fields=None):
+        """Запоминает значения ``TRACKED_FIELDS`` (из ``fields``, если заданы) как сохранённые в базе."""
+        state = self.__dict__.setdefault("_saved_state", {})
+        attnames = None if fields is None else {self._meta.get_field(name).attname for name in fields}
+        for attname in TRACKED_FIELDS:
+            # Отложенные (deferred) поля не загружены, их значение в базе неизвестно
+            if (attnames is None or attname in attnames) and attname in self.__dict__:
+                state[attname] = self.__dict__[attname]
+
+    def saved_value(self, attname, default=None):
+        """Значение поля из ``TRACKED_FIELDS`` на момент загрузки или последнего сохранения."""
+        return self.__dict__.get("_saved_state", {}).get(attname, default)
+
+    def tracked_changes(self):
+        """Поля из ``TRACKED_FIELDS``, изменённые с загрузки; для нового или не загруженного поля — все."""
+        state = self.__dict__.get("_saved_state", {})
+        missing = object()
+        return {attname for attname in TRACKED_FIELDS if state.get(attname, missing) != getattr(self, attname)}
+
     def save(self, *args, **kwargs):
-        if self.status == self.Status.PUBLISHED and not self.published_at:
+        newly_published = self.status == self.Status.PUBLISHED and not self.published_at
+        if newly_published:
             self.published_at = timezone.now()
+        adding = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        implicit_update_fields = (
+            update_fields is None and not adding and self.pk is not None and not kwargs.get("force_insert")
+        )
+        if implicit_update_fields:
+            # Полное сохранение загруженного ранее экземпляра не должно возвращать устаревшие массивы тегов.
+            # Отложенные (deferred) поля не сохраняются, как и в обычном save(), чтобы не догружать их
+            kwargs["update_fields"] = (
+                {field.attname for field in self._meta.concrete_fields if not field.primary_key}
+                - self.get_deferred_fields()
+                - TAG_ARRAY_FIELDS
+            )
+        unpublishing = (
+            not adding
+            and self.status == self.Status.DRAFT
+            and (update_fields is None or "status" in update_fields)
+            and self._saved_status(kwargs.get("using")) == self.Status.PUBLISHED
+        )
+
+        self._implicit_update_fields = implicit_update_fields
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            del self._implicit_update_fields
+        self._remember_state(kwargs.get("update_fields"))
 
-        super().save(*args, **kwargs)
+        if self.status == self.Status.PUBLISHED:
+            # publish() сохраняет статус через update_fields, прямое сохранение определяется по published_at
+            event = PUBLISHED if newly_published or "status" in (update_fields or ()) else UPDATED
+            notify_content_events(event, [(self.pk, self.category_id, self.published_at)], using=self._state.db)
+        elif unpublishing:
+            # Снятие с публикации фиксируется для /news/changes/ один раз, а не при каждом сохранении черновика
+            ContentTombstone.objects.using(self._state.db).create(
+                content_id=self.pk, reason=ContentTombstone.Reason.UNPUBLISHED
+            )
+
+    def _save_table(self, raw=False, cls=None, force_insert=False, force_update=False, using=None, update_fields=None):
+        try:
+            return super()._save_table(raw, cls, force_insert, force_update, using, update_fields)
+        except DatabaseError as exc:
+            # UPDATE по неявным update_fields не нашёл строку (её удалили параллельно): как обычный save(),
+            # вставляем её заново. Перехват здесь, до выхода из atomic() в save_base, не портит транзакцию.
+            # Ошибки самой БД обёрнуты Django и имеют __cause__, их не перехватываем
+            if not self.__dict__.get("_implicit_update_fields") or type(exc) is not DatabaseError or exc.__cause__:
+                raise
+            return super()._save_table(raw, cls, force_insert, force_update, using, None)
+
+    def _saved_status(self, using=None):
+        """Статус в базе до сохранения: запомненный при загрузке, а если он неизвестен — прочитанный из базы."""
+        if "status" in self.__dict__.get("_saved_state", {}):
+            return self.saved_value("status")
+        using = using or router.db_for_write(type(self), instance=self)
+        return type(self)._base_manager.using(using).filter(pk=self.pk).values_list("status", flat=True).first()
 
     def publish(self):
         if self.status == self.Status.PUBLISHED:
@@ -108,7 +228,7 @@ class ContentItem(BaseModel):
 
         self.status = self.Status.PUBLISHED
         self.published_at = timezone.now()
-        self.save(update_fields=["status", "published_at"])
+        self.save(update_fields=["status", "published_at", "updated_at"])
         return True
 
     def hide(self):
@@ -116,7 +236,7 @@ class ContentItem(BaseModel):
             return False
 
         self.status = self.Status.DRAFT
-        self.save(update_fields=["status"])
+        self.save(update_fields=["status", "updated_at"])
         return True
 
     def schedule(self, publish_time):
@@ -125,19 +245,94 @@ class ContentItem(BaseModel):
 
         self.scheduled_at = publish_time
         self.status = self.Status.DRAFT
-        self.save(update_fields=["scheduled_at", "status"])
+        self.save(update_fields=["scheduled_at", "status", "updated_at"])
         return True
 
     def unschedule(self):
         self.scheduled_at = None
-        self.save(update_fields=["scheduled_at"])
+        self.save(update_fields=["scheduled_at", "updated_at"])
         return True
 
     @classmethod
     def publish_scheduled(cls):
-        return cls.objects.filter(
-            status=cls.Status.DRAFT, scheduled_at__isnull=False, scheduled_at__lte=timezone.now()
-        ).update(status=cls.Status.PUBLISHED, published_at=timezone.now())
+        from news.related import schedule_related_content_update
+        from news.snapshots import schedule_feed_snapshot_rebuild
+        from news.utils import invalidate_feed_items
+
+        now = timezone.now()
+        due_qs = cls.objects.filter(status=cls.Status.DRAFT, scheduled_at__isnull=False, scheduled_at__lte=now)
+        due = list(due_qs.values_list("id", "scheduled_at", "category_id"))
+        if not due:
+            return 0
+
+        with transaction.atomic():
+            published = list(
+                cls.objects.filter(id__in=[pk for pk, _, _ in due], status=cls.Status.DRAFT)
+                .select_for_update()
+                .values_list("id", flat=True)
+            )
+            cls.objects.filter(id__in=published).update(status=cls.Status.PUBLISHED, published_at=now, updated_at=now)
+            published = set(published)
+            invalidate_feed_items(published)
+            schedule_feed_snapshot_rebuild()
+            schedule_related_content_update(published)
+            notify_content_events(PUBLISHED, [(pk, category_id, now) for pk, _, category_id in due if pk in published])
+        for pk, scheduled_at, _ in due:
+            if pk in published:
+                SCHEDULED_PUBLISH_LAG.observe((now - scheduled_at).total_seconds())
+        return len(published)
+
+    @classmethod
+    def publish_many(cls, ids):
+        """Публикует черновики из ``ids`` одним UPDATE с теми же побочными эффектами, что ``publish()``.
+
+        Возвращает ID опубликованных элементов.
+        """
+        from news.related import schedule_related_content_update
+        from news.snapshots import schedule_feed_snapshot_rebuild
+        from news.utils import invalidate_feed_items
+
+        now = timezone.now()
+        with transaction.atomic():
+            rows = list(
+                cls.objects.filter(id__in=ids)
+                .exclude(status=cls.Status.PUBLISHED)
+                .select_for_update()
+                .values_list("id", "category_id", "published_at")
+            )
+            published = [pk for pk, _, _ in rows]
+            cls.objects.filter(id__in=published).update(
+                status=cls.Status.PUBLISHED, published_at=Coalesce("published_at", Value(now)), updated_at=now
+            )
+            invalidate_feed_items(published)
+            schedule_feed_snapshot_rebuild()
+            schedule_related_content_update(published)
+            notify_content_events(
+                PUBLISHED, [(pk, category_id, published_at or now) for pk, category_id, published_at in rows]
+            )
+        return published
+
+    @classmethod
+    def hide_many(cls, ids):
+        """Переводит опубликованные элементы из ``ids`` в черновики, как ``hide()``. Возвращает их ID."""
+        from news.related import schedule_related_content_update
+        from news.snapshots import schedule_feed_snapshot_rebuild
+        from news.utils import invalidate_feed_items
+
+        with transaction.atomic():
+            unpublished = list(
+                cls.objects.filter(id__in=ids, status=cls.Status.PUBLISHED)
+                .select_for_update()
+                .values_list("id", flat=True)
+            )
+            cls.objects.filter(id__in=unpublished).update(status=cls.Status.DRAFT, updated_at=timezone.now())
+            ContentTombstone.objects.bulk_create(
+                [ContentTombstone(content_id=pk, reason=ContentTombstone.Reason.UNPUBLISHED) for pk in unpublished]
+            )
+            invalidate_feed_items(unpublished)
+            schedule_feed_snapshot_rebuild()
+            schedule_related_content_update(unpublished)
+        return unpublished
 
     @property
     def is_published(self):
@@ -205,7 +400,7 @@ class ContentItem(BaseModel):
 
         changed_fields = self._fetch_video_metadata()
         if changed_fields:
-            self.save(update_fields=changed_fields)
+            self.save(update_fields=[*changed_fields, "updated_at"])
             return True
         return False
 
@@ -248,6 +443,7 @@ class ContentItem(BaseModel):
             api_key = getattr(settings, "YOUTUBE_API_KEY", None)
             if not api_key:
                 logger.warning("YouTube API key not configured")
+                METADATA_FETCHES.labels(provider="youtube", outcome="not_configured").inc()
                 return None
 
             api_url = f"https://www.googleapis.com/youtube/v3/videos?id={self.youtube_id}&part=snippet&key={api_key}"
@@ -259,6 +455,7 @@ class ContentItem(BaseModel):
 
             if not data.get("items"):
                 logger.info(f"No YouTube video found with ID: {self.youtube_id}")
+                METADATA_FETCHES.labels(provider="youtube", outcome="not_found").inc()
                 return None
 
             item = data["items"][0]
@@ -272,6 +469,7 @@ class ContentItem(BaseModel):
                 or ""
             )
 
+            METADATA_FETCHES.labels(provider="youtube", outcome="success").inc()
             return {
                 "title": snippet.get("title", "")[:255],
                 "lead": Truncator(snippet.get("description", "") or "").chars(500, truncate="..."),
@@ -280,12 +478,15 @@ class ContentItem(BaseModel):
 
         except Timeout:
             logger.error(f"YouTube API timeout for video {self.youtube_id}")
+            METADATA_FETCHES.labels(provider="youtube", outcome="timeout").inc()
             return None
         except RequestException as e:
             logger.error(f"YouTube API request failed for video {self.youtube_id}: {str(e)}")
+            METADATA_FETCHES.labels(provider="youtube", outcome="error").inc()
             return None
         except Exception as e:
             logger.exception(f"Unexpected error fetching YouTube metadata for {self.youtube_id}")
+            METADATA_FETCHES.labels(provider="youtube", outcome="error").inc()
             return None
 
     def _fetch_rutube_metadata(self):
@@ -296,11 +497,13 @@ class ContentItem(BaseModel):
 
             if response.status_code == 404:
                 logger.info(f"RuTube video not found: {self.rutube_id}")
+                METADATA_FETCHES.labels(provider="rutube", outcome="not_found").inc()
                 return None
 
             response.raise_for_status()
             data = response.json()
 
+            METADATA_FETCHES.labels(provider="rutube", outcome="success").inc()
             return {
                 "title": data.get("title", "")[:200],
                 "lead": Truncator(data.get("description", "")).chars(500, truncate="..."),
@@ -309,12 +512,15 @@ class ContentItem(BaseModel):
 
         except Timeout:
             logger.error(f"RuTube API timeout for video {self.rutube_id}")
+            METADATA_FETCHES.labels(provider="rutube", outcome="timeout").inc()
             return None
         except RequestException as e:
             logger.error(f"RuTube API request failed for video {self.rutube_id}: {str(e)}")
+            METADATA_FETCHES.labels(provider="rutube", outcome="error").inc()
             return None
         except Exception as e:
             logger.exception(f"Unexpected error fetching RuTube metadata for {self.rutube_id}")
+            METADATA_FETCHES.labels(provider="rutube", outcome="error").inc()
             return None
 
     def __str__(self):
@@ -0,0 +1,27 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from core.models import BaseModel
+
+__all__ = ["ContentTombstone"]
+
+
+class ContentTombstone(BaseModel):
+    """Отметка об удалённом или снятом с публикации элементе для синхронизации клиентов"""
+
+    class Reason(models.TextChoices):
+        DELETED = "deleted", _("Удалён")
+        UNPUBLISHED = "unpublished", _("Снят с публикации")
+
+    content_id = models.BigIntegerField(verbose_name=_("ID контента"))
+    reason = models.CharField(choices=Reason.choices, verbose_name=_("Причина"))
+    created_at = models.DateTimeField(default=timezone.now, verbose_name=_("Дата"))
+
+    class Meta:
+        verbose_name = _("Удалённый элемент")
+        verbose_name_plural = _("Удалённые элементы")
+        indexes = [models.Index(fields=["created_at", "id"])]
+
+    def __str__(self):
+        return f"{self.content_id} ({self.get_reason_display()})"
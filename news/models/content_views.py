@@ -0,0 +1,51 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from core.models import BaseModel
+
+__all__ = ["ContentViewsHourly", "ContentViewsDaily", "ViewRollupState"]
+
+
+class ContentViewsHourly(BaseModel):
+    """Просмотры элемента за час, собранные из событий просмотров (``news.analytics``)"""
+
+    item = models.ForeignKey("ContentItem", on_delete=models.CASCADE, related_name="+", verbose_name=_("Элемент"))
+    hour = models.DateTimeField(verbose_name=_("Час"))
+    views = models.PositiveIntegerField(verbose_name=_("Просмотры"))
+
+    class Meta:
+        verbose_name = _("Просмотры за час")
+        verbose_name_plural = _("Просмотры по часам")
+        constraints = [models.UniqueConstraint(fields=["item", "hour"], name="news_content_views_hourly_unique")]
+
+    def __str__(self):
+        return f"{self.item_id} @ {self.hour:%Y-%m-%d %H:00}: {self.views}"
+
+
+class ContentViewsDaily(BaseModel):
+    """Просмотры элемента за сутки по ``TIME_ZONE`` (``news.analytics``)"""
+
+    item = models.ForeignKey("ContentItem", on_delete=models.CASCADE, related_name="+", verbose_name=_("Элемент"))
+    day = models.DateField(verbose_name=_("День"))
+    views = models.PositiveIntegerField(verbose_name=_("Просмотры"))
+
+    class Meta:
+        verbose_name = _("Просмотры за день")
+        verbose_name_plural = _("Просмотры по дням")
+        constraints = [models.UniqueConstraint(fields=["item", "day"], name="news_content_views_daily_unique")]
+
+    def __str__(self):
+        return f"{self.item_id} @ {self.day}: {self.views}"
+
+
+class ViewRollupState(BaseModel):
+    """Граница уже агрегированных событий просмотров: единственная строка"""
+
+    rolled_up_to = models.DateTimeField(verbose_name=_("Агрегировано до"))
+
+    class Meta:
+        verbose_name = _("Состояние агрегации просмотров")
+        verbose_name_plural = _("Состояние агрегации просмотров")
+
+    def __str__(self):
+        return self.rolled_up_to.isoformat()
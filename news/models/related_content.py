@@ -0,0 +1,27 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from core.models import BaseModel
+
+__all__ = ["RelatedContent"]
+
+
+class RelatedContent(BaseModel):
+    """Предрассчитанный похожий элемент: до ``NEWS_RELATED_LIMIT`` строк на элемент (``news.related``)"""
+
+    item = models.ForeignKey(
+        "ContentItem", on_delete=models.CASCADE, related_name="related_links", verbose_name=_("Элемент")
+    )
+    related = models.ForeignKey(
+        "ContentItem", on_delete=models.CASCADE, related_name="+", verbose_name=_("Похожий элемент")
+    )
+    score = models.FloatField(verbose_name=_("Оценка сходства"))
+
+    class Meta:
+        verbose_name = _("Похожий элемент")
+        verbose_name_plural = _("Похожие элементы")
+        constraints = [models.UniqueConstraint(fields=["item", "related"], name="news_related_content_unique")]
+        indexes = [models.Index(fields=["item", "-score"])]
+
+    def __str__(self):
+        return f"{self.item_id} -> {self.related_id} ({self.score:.3f})"
@@ -0,0 +1,20 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from core.models import BaseModel
+
+__all__ = ["TrendingEpoch"]
+
+
+class TrendingEpoch(BaseModel):
+    """Точка отсчёта ``ContentItem.trending_score``: единственная строка, сдвигается при перенормировке"""
+
+    started_at = models.DateTimeField(default=timezone.now, verbose_name=_("Начало эпохи"))
+
+    class Meta:
+        verbose_name = _("Эпоха рейтинга популярности")
+        verbose_name_plural = _("Эпохи рейтинга популярности")
+
+    def __str__(self):
+        return self.started_at.isoformat()
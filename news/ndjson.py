@@ -0,0 +1,286 @@
+from itertools import islice
+
+import orjson
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connections, transaction
+from django.db.models import F, Max, Min
+from django.utils import timezone
+
+from news.models import Category, ContentItem, ContentTombstone, Tag
+from news.snapshots import schedule_feed_snapshot_rebuild
+from news.tag_arrays import sync_tag_arrays
+from news.utils.item_cache import invalidate_category_tree
+
+__all__ = [
+    "CONTENT_FIELDS",
+    "export_content",
+    "import_content",
+    "split_id_range",
+    "finish_import",
+]
+
+# Собственные поля элемента; категория, автор и теги выгружаются отдельно — по slug и имени пользователя.
+# Рейтинг популярности отсчитывается от эпохи своей базы и не переносится (при загрузке — значение по умолчанию в БД),
+# массивы тегов — копия связующей таблицы и пересчитываются после загрузки тегов
+DERIVED_FIELDS = {"trending_score", "tag_ids", "tag_slugs"}
+CONTENT_FIELDS = [
+    field.attname
+    for field in ContentItem._meta.concrete_fields
+    if not field.primary_key and not field.is_relation and field.attname not in DERIVED_FIELDS
+]
+
+
+def split_id_range(queryset, parts):
+    """Делит диапазон ID выборки на ``parts`` непересекающихся отрезков ``(min_id, max_id)``."""
+    bounds = queryset.aggregate(low=Min("id"), high=Max("id"))
+    if bounds["low"] is None:
+        return []
+    low, high = bounds["low"], bounds["high"]
+    step = -(-(high - low + 1) // max(parts, 1))
+    return [(start, min(start + step - 1, high)) for start in range(low, high + 1, step)]
+
+
+def export_content(stream, min_id=None, max_id=None, chunk_size=2000, using="default"):
+    """Пишет элементы контента в ``stream`` (бинарный) как NDJSON по возрастанию ID.
+
+    Строки читаются серверным курсором по ``chunk_size``, теги — одним запросом на каждый такой пакет,
+    поэтому память не зависит от числа элементов. Возвращает число записанных строк.
+    """
+    qs = ContentItem.objects.using(using).order_by("id")
+    if min_id is not None:
+        qs = qs.filter(id__gte=min_id)
+    if max_id is not None:
+        qs = qs.filter(id__lte=max_id)
+    rows = qs.values("id", *CONTENT_FIELDS, category_slug=F("category__slug"), author_username=F("author__username"))
+    rows = rows.iterator(chunk_size=chunk_size)
+    through = ContentItem.tags.through
+
+    written = 0
+    while chunk := list(islice(rows, chunk_size)):
+        tags = {}
+        tag_rows = (
+            through.objects.using(using)
+            .filter(contentitem_id__in=[row["id"] for row in chunk])
+            .order_by("tag__slug")
+            .values_list("contentitem_id", "tag__slug")
+        )
+        for item_id, slug in tag_rows:
+            tags.setdefault(item_id, []).append(slug)
+
+        for row in chunk:
+            item_id = row.pop("id")
+            row["category"] = row.pop("category_slug")
+            row["author"] = row.pop("author_username")
+            row["tags"] = tags.get(item_id, [])
+            stream.write(orjson.dumps(row) + b"\n")
+        written += len(chunk)
+    return written
+
+
+def _parse(lines, line_numbers, refs, default_author_id, errors):
+    """Проверяет строки пакета; возвращает ``{slug: запись}``, последняя строка со slug побеждает.
+
+    Запись — ``(row, tag_ids, номер строки)``. Последний столбец ``row`` — столбцы, заданные в строке: только
+    их меняет обновление существующего элемента. ``tag_ids`` — ``None``, если теги в строке не указаны.
+    """
+    categories, tags, authors = refs
+    now = timezone.now()
+    defaults = {}
+    for name in CONTENT_FIELDS:
+        field = ContentItem._meta.get_field(name)
+        defaults[name] = now if getattr(field, "auto_now", False) else field.get_default()
+
+    records = {}
+    for number, line in zip(line_numbers, lines):
+        try:
+            data = orjson.loads(line)
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
+            if not data.get("slug") or not data.get("title"):
+                raise ValueError("slug and title are required")
+            # Значения проверяются и приводятся полем модели: иначе неверный тип уронил бы COPY всего пакета
+            values = {}
+            for name in CONTENT_FIELDS:
+                if name in data:
+                    try:
+                        values[name] = ContentItem._meta.get_field(name).clean(data[name], None)
+                    except ValidationError as exc:
+                        raise ValueError(f"invalid {name} {data[name]!r}: {' '.join(exc.messages)}")
+
+            category = data.get("category")
+            if category and category not in categories:
+                raise ValueError(f"unknown category {category!r}")
+            missing_tags = [slug for slug in data.get("tags") or () if slug not in tags]
+            if missing_tags:
+                raise ValueError(f"unknown tags {missing_tags!r}")
+            # Без автора строка может только обновить существующий элемент (проверяется при записи)
+            author_id = default_author_id
+            if "author" in data:
+                author_id = authors.get(data["author"], default_author_id)
+                if author_id is None:
+                    raise ValueError(f"unknown author {data['author']!r}")
+        except ValueError as exc:
+            # orjson.JSONDecodeError — подкласс ValueError
+            errors.append((number, str(exc)))
+            continue
+
+        present = [ContentItem._meta.get_field(name).column for name in values] + ["updated_at"]
+        if values.get("status") == ContentItem.Status.PUBLISHED and not values.get("published_at"):
+            # Как save() и publish_many: опубликованный элемент всегда с датой публикации. Если дата не задана
+            # в строке, существующий элемент сохраняет свою (см. UPDATE_SQL)
+            values["published_at"] = now
+        if "category" in data:
+            present.append("category_id")
+        if "author" in data:
+            present.append("author_id")
+        row = [values[name] if name in values else defaults[name] for name in CONTENT_FIELDS]
+        row += [categories.get(category), author_id, present]
+        tag_ids = {tags[slug] for slug in data["tags"] or ()} if "tags" in data else None
+        records[data["slug"]] = (row, tag_ids, number)
+    return records
+
+
+# Новые элементы; строки без автора вставить нельзя, они только обновляют существующие
+INSERT_SQL = """
+INSERT INTO {table} ({columns})
+SELECT {columns} FROM import_{table} WHERE author_id IS NOT NULL
+ON CONFLICT (slug) DO NOTHING
+RETURNING id, slug
+"""
+
+# Существующие элементы блокируются до UPDATE, чтобы сравнить прежний статус с новым
+LOCK_SQL = """
+SELECT t.id, t.slug, t.status FROM {table} t
+WHERE t.slug = ANY(%s)
+ORDER BY t.id
+FOR UPDATE
+"""
+
+# Меняются только столбцы из present. Опубликованный элемент без даты публикации получает текущую
+UPDATE_SQL = """
+UPDATE {table} t SET {assignments},
+    published_at = CASE
+        WHEN 'published_at' = ANY(i.present) THEN i.published_at
+        WHEN {new_status} = %(published)s THEN COALESCE(t.published_at, %(now)s)
+        ELSE t.published_at
+    END
+FROM import_{table} i
+WHERE t.slug = i.slug AND t.id = ANY(%(ids)s)
+RETURNING t.id, t.slug, t.status
+"""
+
+
+def _write_batch(records, using, errors=None):
+    """Загружает пакет через ``COPY`` во временную таблицу; новые элементы вставляет, у существующих меняет
+    только заданные в строке поля. Возвращает ``(created, updated)``.
+
+    Для элементов, снятых с публикации, пишутся отметки для /news/changes/, для сменивших статус
+    после коммита пересчитываются похожие.
+    """
+    from news.related import schedule_related_content_update
+
+    table = ContentItem._meta.db_table
+    through = ContentItem.tags.through
+    columns = [ContentItem._meta.get_field(name).column for name in CONTENT_FIELDS] + ["category_id", "author_id"]
+    column_list = ", ".join(columns)
+
+    def updated_value(column):
+        return f"CASE WHEN '{column}' = ANY(i.present) THEN i.{column} ELSE t.{column} END"
+
+    assignments = ", ".join(
+        f"{column} = {updated_value(column)}" for column in columns if column not in ("slug", "published_at")
+    )
+    published = ContentItem.Status.PUBLISHED
+
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE import_{table} ON COMMIT DROP AS "
+            f"SELECT {column_list}, NULL::text[] AS present FROM {table} WITH NO DATA"
+        )
+        with cursor.copy(f"COPY import_{table} ({column_list}, present) FROM STDIN") as copy:
+            for row, _, _ in records.values():
+                copy.write_row(row)
+
+        cursor.execute(INSERT_SQL.format(table=table, columns=column_list))
+        written = {slug: item_id for item_id, slug in cursor.fetchall()}
+        created = len(written)
+        cursor.execute(LOCK_SQL.format(table=table), [[slug for slug in records if slug not in written]])
+        previous = {item_id: status for item_id, _, status in cursor.fetchall()}
+        cursor.execute(
+            UPDATE_SQL.format(table=table, assignments=assignments, new_status=updated_value("status")),
+            {"ids": list(previous), "published": published, "now": timezone.now()},
+        )
+        updated = cursor.fetchall()
+        written.update((slug, item_id) for item_id, slug, _ in updated)
+        if errors is not None:
+            errors.extend(
+                (number, "author is required for a new item")
+                for slug, (_, _, number) in records.items()
+                if slug not in written
+            )
+
+        retagged = [(item_id, records[slug][1]) for slug, item_id in written.items() if records[slug][1] is not None]
+        ids = [item_id for item_id, _ in retagged]
+        cursor.execute(f"DELETE FROM {through._meta.db_table} WHERE contentitem_id = ANY(%s)", [ids])
+        with cursor.copy(f"COPY {through._meta.db_table} (contentitem_id, tag_id) FROM STDIN") as copy:
+            for item_id, tag_ids in retagged:
+                for tag_id in tag_ids:
+                    copy.write_row((item_id, tag_id))
+        sync_tag_arrays(ids, using)
+
+        transitions = [
+            (item_id, previous[item_id], status) for item_id, _, status in updated if previous[item_id] != status
+        ]
+        ContentTombstone.objects.using(using).bulk_create(
+            [
+                ContentTombstone(content_id=item_id, reason=ContentTombstone.Reason.UNPUBLISHED)
+                for item_id, old, new in transitions
+                if old == published
+            ]
+        )
+        schedule_related_content_update([item_id for item_id, _, _ in transitions], using)
+        # ON COMMIT DROP не сработает, если загрузка идёт внутри внешней транзакции
+        cursor.execute(f"DROP TABLE import_{table}")
+
+    return created, len(updated)
+
+
+def import_content(stream, batch_size=5000, default_author=None, using="default", progress=None):
+    """Загружает NDJSON из ``export_content`` с upsert по ``slug`` (только PostgreSQL).
+
+    Файл читается построчно, каждый пакет из ``batch_size`` строк пишется в своей транзакции через ``COPY``,
+    поэтому память не зависит от размера файла. Категории, теги и авторы должны уже существовать;
+    строки с неизвестными ссылками, невалидным JSON или значениями полей пропускаются и попадают в ``errors``
+    как ``(номер строки, причина)``. У существующих элементов меняются только поля, заданные в строке;
+    если в строке есть ``tags``, теги заменяются целиком.
+    Кэш и снимки ленты не сбрасываются — для этого после загрузки вызывается ``finish_import``.
+    """
+    refs = (
+        dict(Category.objects.using(using).values_list("slug", "id")),
+        dict(Tag.objects.using(using).values_list("slug", "id")),
+        dict(get_user_model().objects.using(using).values_list("username", "id")),
+    )
+    default_author_id = None
+    if default_author is not None:
+        default_author_id = get_user_model().objects.using(using).get(username=default_author).id
+
+    stats = {"created": 0, "updated": 0, "errors": []}
+    lines = (line for line in enumerate(stream, start=1) if line[1].strip())
+    while batch := list(islice(lines, batch_size)):
+        numbers, raw = zip(*batch)
+        records = _parse(raw, numbers, refs, default_author_id, stats["errors"])
+        if records:
+            created, updated = _write_batch(records, using, stats["errors"])
+            stats["created"] += created
+            stats["updated"] += updated
+        if progress:
+            progress(numbers[-1], stats)
+    stats["errors"].sort()
+    return stats
+
+
+def finish_import(using="default"):
+    """Сбрасывает кэш элементов v2 (сменой поколения ключей) и пересобирает снимки ленты после загрузки."""
+    invalidate_category_tree(using)
+    schedule_feed_snapshot_rebuild(using)
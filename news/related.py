@@ -0,0 +1,236 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from news.models import Category, ContentItem, RelatedContent
+
+__all__ = [
+    "category_proximity",
+    "build_related_content",
+    "update_related_content",
+    "schedule_related_content_update",
+    "get_related_ids",
+]
+
+logger = logging.getLogger(__name__)
+
+# Вклад общих тегов (коэффициент Жаккара), близости категорий в дереве и свежести похожего элемента
+TAG_WEIGHT = 0.6
+CATEGORY_WEIGHT = 0.3
+RECENCY_WEIGHT = 0.1
+# Категории дальше этого числа рёбер в дереве не считаются близкими
+MAX_CATEGORY_DISTANCE = 2
+
+# Кандидаты — элементы с общими тегами (произведение разреженной матрицы «элемент × тег» на себя, посчитанное
+# соединением связующей таблицы с собой) и последние элементы той же категории. Для каждого элемента
+# остаются ``limit`` лучших по взвешенной сумме.
+RELATED_SQL = """
+WITH src AS (
+    SELECT i.id, i.category_id, (SELECT COUNT(*) FROM {tags} WHERE contentitem_id = i.id) AS tag_count
+    FROM {items} i
+    WHERE i.id = ANY(%(ids)s::bigint[]) AND i.status = %(published)s
+),
+shared AS (
+    SELECT s.id AS item_id, t2.contentitem_id AS related_id, COUNT(*) AS common
+    FROM src s
+    JOIN {tags} t1 ON t1.contentitem_id = s.id
+    JOIN {tags} t2 ON t2.tag_id = t1.tag_id AND t2.contentitem_id <> s.id
+    WHERE NOT t1.tag_id = ANY(%(frequent_tags)s::bigint[])
+    GROUP BY 1, 2
+),
+same_category AS (
+    SELECT s.id AS item_id, r.id AS related_id, 0 AS common
+    FROM src s
+    CROSS JOIN LATERAL (
+        SELECT id FROM {items}
+        WHERE category_id = s.category_id AND status = %(published)s AND id <> s.id
+        ORDER BY published_at DESC
+        LIMIT %(limit)s
+    ) r
+),
+candidates AS (
+    SELECT item_id, related_id, MAX(common) AS common
+    FROM (SELECT * FROM shared UNION ALL SELECT * FROM same_category) c
+    GROUP BY 1, 2
+),
+proximity AS (
+    SELECT * FROM unnest(%(category_a)s::bigint[], %(category_b)s::bigint[], %(proximity)s::float8[]) AS p(a, b, value)
+),
+scored AS (
+    SELECT
+        c.item_id,
+        c.related_id,
+        %(tag_weight)s * c.common::float8 / GREATEST(
+            s.tag_count + (SELECT COUNT(*) FROM {tags} WHERE contentitem_id = c.related_id) - c.common, 1
+        )
+        + %(category_weight)s * COALESCE(p.value, 0)
+        + %(recency_weight)s * COALESCE(
+            power(0.5, GREATEST(EXTRACT(EPOCH FROM %(now)s - r.published_at)::float8, 0) / %(half_life)s), 0
+        ) AS score
+    FROM candidates c
+    JOIN src s ON s.id = c.item_id
+    JOIN {items} r ON r.id = c.related_id AND r.status = %(published)s
+    LEFT JOIN proximity p ON p.a = s.category_id AND p.b = r.category_id
+),
+ranked AS (
+    SELECT *, ROW_NUMBER() OVER (PARTITION BY item_id ORDER BY score DESC, related_id DESC) AS position
+    FROM scored
+)
+INSERT INTO {related} (item_id, related_id, score)
+SELECT item_id, related_id, score FROM ranked WHERE position <= %(limit)s
+"""
+
+
+def category_proximity():
+    """Пары категорий на расстоянии до ``MAX_CATEGORY_DISTANCE`` рёбер в дереве: ``{(a, b): 1 / (1 + d)}``."""
+    parents = dict(Category.objects.values_list("id", "parent_id"))
+    neighbours = {pk: set() for pk in parents}
+    for pk, parent_id in parents.items():
+        if parent_id is not None:
+            neighbours[pk].add(parent_id)
+            neighbours[parent_id].add(pk)
+
+    proximity = {}
+    for start in neighbours:
+        level, seen = {start}, {start}
+        for distance in range(MAX_CATEGORY_DISTANCE + 1):
+            for pk in level:
+                proximity[start, pk] = 1 / (1 + distance)
+            level = {pk for node in level for pk in neighbours[node]} - seen
+            seen |= level
+    return proximity
+
+
+def _frequent_tags(item_ids=None):
+    """Теги чаще ``NEWS_RELATED_MAX_TAG_ITEMS`` элементов: как стоп-слова, они не порождают кандидатов."""
+    through = ContentItem.tags.through
+    qs = through.objects.all()
+    if item_ids is not None:
+        qs = qs.filter(tag_id__in=through.objects.filter(contentitem_id__in=item_ids).values("tag_id"))
+    return list(
+        qs.values("tag_id")
+        .annotate(items=Count("contentitem_id"))
+        .filter(items__gt=settings.NEWS_RELATED_MAX_TAG_ITEMS)
+        .values_list("tag_id", flat=True)
+    )
+
+
+def _rebuild(ids, params, using, frequent_tags=None):
+    """Пересчитывает списки похожих для ``ids`` (неопубликованные остаются без списка).
+
+    Без ``frequent_tags`` частые теги определяются по тегам самих ``ids``.
+    """
+    if frequent_tags is None:
+        frequent_tags = _frequent_tags(ids)
+    sql = RELATED_SQL.format(
+        items=ContentItem._meta.db_table,
+        tags=ContentItem.tags.through._meta.db_table,
+        related=RelatedContent._meta.db_table,
+    )
+    with transaction.atomic(using=using):
+        RelatedContent.objects.using(using).filter(item_id__in=ids).delete()
+        with connections[using].cursor() as cursor:
+            cursor.execute(sql, {**params, "ids": list(ids), "frequent_tags": frequent_tags})
+
+
+def _params():
+    proximity = category_proximity()
+    return {
+        "published": ContentItem.Status.PUBLISHED,
+        "limit": settings.NEWS_RELATED_LIMIT,
+        "category_a": [a for a, _ in proximity],
+        "category_b": [b for _, b in proximity],
+        "proximity": list(proximity.values()),
+        "tag_weight": TAG_WEIGHT,
+        "category_weight": CATEGORY_WEIGHT,
+        "recency_weight": RECENCY_WEIGHT,
+        "now": timezone.now(),
+        "half_life": settings.NEWS_RELATED_HALF_LIFE_DAYS * 24 * 3600,
+    }
+
+
+def build_related_content(batch_size=500, using=DEFAULT_DB_ALIAS):
+    """Полностью пересчитывает индекс похожих для опубликованных элементов пакетами по ``batch_size``.
+
+    Каждый пакет — один запрос и своя транзакция. Возвращает число обработанных элементов.
+    """
+    params, frequent_tags = _params(), _frequent_tags()
+    published = ContentItem.objects.using(using).filter(status=ContentItem.Status.PUBLISHED)
+    RelatedContent.objects.using(using).exclude(item__in=published).delete()
+
+    last_id, processed = 0, 0
+    while ids := list(published.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size]):
+        _rebuild(ids, params, using, frequent_tags)
+        last_id = ids[-1]
+        processed += len(ids)
+    return processed
+
+
+def update_related_content(ids, using=DEFAULT_DB_ALIAS):
+    """Инкрементально обновляет индекс после публикации, снятия или смены тегов и категории элементов ``ids``.
+
+    Списки самих элементов пересчитываются полностью, списки их новых соседей — тоже: сходство почти
+    симметрично, и именно в них элемент должен появиться. Из остальных списков элементы ``ids`` удаляются:
+    свежий элемент категории может быть в сотнях списков, и пересчитывать их все на каждое сохранение
+    слишком дорого. Освободившиеся места заполняет периодический ``build_related_content``.
+    """
+    ids = set(ids)
+    if not ids:
+        return
+    params = _params()
+    related = RelatedContent.objects.using(using)
+    with transaction.atomic(using=using):
+        _rebuild(ids, params, using)
+        neighbours = set(related.filter(item_id__in=ids).values_list("related_id", flat=True)) - ids
+        related.filter(related_id__in=ids).exclude(item_id__in=ids | neighbours).delete()
+        if neighbours:
+            _rebuild(neighbours, params, using)
+
+
+# ID, ожидающие обновления, по потоку и базе: все вызовы в транзакции сливаются в один пересчёт
+_pending = threading.local()
+
+
+def _pending_ids(using):
+    if not hasattr(_pending, "ids"):
+        _pending.ids = {}
+    return _pending.ids.setdefault(using, set())
+
+
+def _update(using):
+    # Первый выполнившийся колбэк забирает ID всей транзакции, остальные ничего не делают. ID из
+    # откаченной транзакции остаются в очереди и пересчитываются со следующим коммитом, это безвредно
+    ids = _pending_ids(using)
+    if not ids:
+        return
+    ids = set(ids)
+    _pending.ids[using] = set()
+    try:
+        update_related_content(ids, using)
+    except Exception:
+        # Как и снимки ленты, индекс похожих не должен ломать публикацию
+        logger.exception("Related content update failed")
+
+
+def schedule_related_content_update(ids, using=DEFAULT_DB_ALIAS):
+    """Обновляет индекс похожих для ``ids`` после коммита текущей транзакции.
+
+    Повторные вызовы в одной транзакции не добавляют пересчётов: после коммита все ID обрабатываются разом.
+    """
+    ids = set(ids)
+    if ids:
+        _pending_ids(using).update(ids)
+        transaction.on_commit(lambda: _update(using), using=using)
+
+
+def get_related_ids(item_id, using=None):
+    return list(
+        RelatedContent.objects.using(using)
+        .filter(item_id=item_id)
+        .order_by("-score", "-related_id")
+        .values_list("related_id", flat=True)
+    )
@@ -1,15 +1,34 @@
+from django.conf import settings
 from rest_framework import serializers
+
+from core.instrumentation import InstrumentedSerializerMixin
 from news.models import Category, ContentItem
 
 __all__ = [
     "CategorySerializer",
     "ContentItemSerializer",
+    "CompactContentItemSerializer",
     "NewsFeedQueryParamsSerializer",
     "NewsFeedExcludedRequestSerializer",
+    "NewsChangesQueryParamsSerializer",
+    "NewsItemsRequestSerializer",
+    "CONTENT_TYPE_NAMES",
+    "serialize_feed_items",
 ]
 
+# Значения content_type в API
+CONTENT_TYPE_NAMES = {ContentItem.ContentType.VIDEO: "video", ContentItem.ContentType.ARTICLE: "article"}
+
+
+def get_children(category, context):
+    """Дочерние категории из ``context["category_children"]``, если дерево загружено заранее."""
+    children_map = context.get("category_children")
+    if children_map is None:
+        return category.category_set.all()
+    return children_map.get(category.id, [])
 
-class CategorySerializer(serializers.ModelSerializer):
+
+class CategorySerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     type = serializers.SerializerMethodField()
     subCategories = serializers.SerializerMethodField()
 
@@ -25,8 +44,7 @@ class CategorySerializer(serializers.ModelSerializer):
         return obj.type
 
     def get_subCategories(self, obj):
-        children = obj.category_set.all()
-        return SubCategoryInListSerializer(children, many=True, context=self.context).data
+        return SubCategoryInListSerializer(get_children(obj, self.context), many=True, context=self.context).data
 
 
 class SubCategoryInListSerializer(serializers.ModelSerializer):
@@ -37,11 +55,10 @@ class SubCategoryInListSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "subCategories"]
 
     def get_subCategories(self, obj):
-        children = obj.category_set.all()
-        return SubCategoryInListSerializer(children, many=True, context=self.context).data
+        return SubCategoryInListSerializer(get_children(obj, self.context), many=True, context=self.context).data
 
 
-class ContentItemSerializer(serializers.ModelSerializer):
+class ContentItemSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     datePublished = serializers.SerializerMethodField()
     titlePicture = serializers.SerializerMethodField()
     category = CategorySerializer()
@@ -69,11 +86,99 @@ class ContentItemSerializer(serializers.ModelSerializer):
         return None
 
 
+class CompactContentItemSerializer(ContentItemSerializer):
+    """Элемент ленты без вложенной категории: только её ID."""
+
+    category = None
+    categoryId = serializers.IntegerField(source="category_id", allow_null=True)
+
+    class Meta(ContentItemSerializer.Meta):
+        fields = ["id", "datePublished", "title", "lead", "titlePicture", "ytCode", "categoryId"]
+
+
+def serialize_feed_items(items, children_map, include=()):
+    """Элементы ленты для ответа: ``{"data": ...}`` и, с ``include=categories``, ``{"included": ...}``.
+
+    В режиме ``categories`` элемент несёт только ``categoryId``, а каждая использованная категория
+    (в том же виде, что и вложенная) сериализуется один раз в ``included.categories``.
+    """
+    context = {"category_children": children_map}
+    if "categories" not in include:
+        return {"data": ContentItemSerializer(items, many=True, context=context).data}
+
+    items = list(items)
+    categories = {category.id: category for children in children_map.values() for category in children}
+    used = [pk for pk in dict.fromkeys(item.category_id for item in items) if pk in categories]
+    return {
+        "data": CompactContentItemSerializer(items, many=True, context=context).data,
+        "included": {
+            "categories": {str(pk): CategorySerializer(categories[pk], context=context).data for pk in used},
+        },
+    }
+
+
+INCLUDE_CHOICES = [("categories", "categories")]
+SORT_CHOICES = [("latest", "latest"), ("trending", "trending")]
+TAG_MATCH_CHOICES = [("any", "any"), ("all", "all")]
+
+
+class CommaSeparatedListField(serializers.ListField):
+    """Список из повторяющегося параметра или значений через запятую: ``?tagIds=1,2`` или ``?tagIds=1&tagIds=2``."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = [data]
+        if isinstance(data, list):
+            data = [value.strip() for item in data for value in str(item).split(",") if value.strip()]
+        return super().to_internal_value(data)
+
+
 class NewsFeedQueryParamsSerializer(serializers.Serializer):
     pageSize = serializers.IntegerField(default=20, min_value=1, max_value=100)
     pageNumber = serializers.IntegerField(default=1)
     categoryId = serializers.IntegerField(required=False)
     allNews = serializers.BooleanField(default=False)
+    include = serializers.MultipleChoiceField(
+        choices=INCLUDE_CHOICES,
+        required=False,
+        default=set,
+        help_text="categories — категории в included.categories вместо вложенных в каждый элемент",
+    )
+    sort = serializers.ChoiceField(
+        choices=SORT_CHOICES,
+        default="latest",
+        help_text="latest — по дате публикации, trending — по просмотрам с затуханием во времени",
+    )
+    categoryIds = CommaSeparatedListField(
+        child=serializers.IntegerField(),
+        required=False,
+        default=list,
+        help_text="Категории (с подкатегориями) через запятую; элемент подходит, если он в любой из них",
+    )
+    tagIds = CommaSeparatedListField(
+        child=serializers.IntegerField(), required=False, default=list, help_text="Теги через запятую, любой из них"
+    )
+    tagMatch = serializers.ChoiceField(
+        choices=TAG_MATCH_CHOICES,
+        default="any",
+        help_text="any — элемент с любым из tagIds, all — только со всеми tagIds",
+    )
+    authorIds = CommaSeparatedListField(
+        child=serializers.IntegerField(), required=False, default=list, help_text="Авторы через запятую"
+    )
+    contentType = CommaSeparatedListField(
+        child=serializers.ChoiceField(choices=list(CONTENT_TYPE_NAMES.values())),
+        required=False,
+        default=list,
+        help_text="Типы через запятую: video, article",
+    )
+    facets = serializers.BooleanField(
+        default=False, help_text="Добавить в meta.facets число элементов по категориям, тегам и типам"
+    )
+
+    def validate_contentType(self, value):
+        codes = {name: code for code, name in CONTENT_TYPE_NAMES.items()}
+        return [codes[name] for name in value]
 
 
 class NewsFeedExcludedRequestSerializer(serializers.Serializer):
@@ -83,3 +188,29 @@ class NewsFeedExcludedRequestSerializer(serializers.Serializer):
         default=[],
         help_text="Список ID новостей/видео, которые нужно исключить из выдачи",
     )
+    include = serializers.MultipleChoiceField(
+        choices=INCLUDE_CHOICES,
+        required=False,
+        default=set,
+        help_text="categories — категории в included.categories вместо вложенных в каждый элемент",
+    )
+
+
+class NewsChangesQueryParamsSerializer(serializers.Serializer):
+    since = serializers.CharField(
+        required=False, help_text="Токен из meta.next предыдущего ответа; без него возвращается начальный токен"
+    )
+
+
+class NewsItemsRequestSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        help_text="ID элементов в нужном порядке (GET: через запятую)",
+    )
+
+    def validate_ids(self, value):
+        limit = settings.NEWS_MULTI_GET_MAX_IDS
+        if len(value) > limit:
+            raise serializers.ValidationError(f"Ensure this field has no more than {limit} elements.")
+        return value
@@ -1,32 +1,70 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import models
 from django.utils.translation import gettext_lazy as _
-import markdown
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from core.instrumentation import InstrumentedSerializerMixin
 from news.models import Category, Tag, ContentItem
+from news.utils import render_markdown
 
-__all__ = ["CategorySerializer", "TagSerializer", "ContentItemSerializer"]
+__all__ = [
+    "CategorySerializer",
+    "TagSerializer",
+    "ContentItemSerializer",
+    "ContentItemBulkItemSerializer",
+    "ContentItemBulkRequestSerializer",
+    "ContentAnalyticsQueryParamsSerializer",
+]
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ["id", "name", "slug", "parent"]
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ["id", "name", "slug"]
 
 
-class ContentItemSerializer(serializers.ModelSerializer):
+@extend_schema_field(TagSerializer(many=True))
+class TagArrayField(serializers.Field):
+    """Теги элемента по ``tag_ids``, по имени: из словаря ``context["tags"]`` или одним запросом по первичному ключу"""
+
+    def __init__(self, **kwargs):
+        super().__init__(source="*", read_only=True, **kwargs)
+
+    def to_representation(self, item):
+        tags = self.context.get("tags")
+        if tags is None:
+            tags = Tag.objects.in_bulk(item.tag_ids)
+        rows = sorted((tags[pk] for pk in item.tag_ids if pk in tags), key=lambda tag: tag.name)
+        return TagSerializer(rows, many=True, context=self.context).data
+
+
+class ContentItemListSerializer(serializers.ListSerializer):
+    """Список элементов: теги всех элементов загружаются одним запросом по их ``tag_ids``, без prefetch_related"""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self.context["tags"] = Tag.objects.in_bulk({pk for item in items for pk in item.tag_ids})
+        try:
+            return super().to_representation(items)
+        finally:
+            del self.context["tags"]
+
+
+class ContentItemSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(
         queryset=Category.objects.all(), source="category", write_only=True, allow_null=True, required=False
     )
 
-    tags = TagSerializer(many=True, read_only=True)
+    tags = TagArrayField()
     tag_ids = serializers.PrimaryKeyRelatedField(
         many=True, queryset=Tag.objects.all(), source="tags", write_only=True, required=False
     )
@@ -42,13 +80,13 @@ class ContentItemSerializer(serializers.ModelSerializer):
     title_picture_url = serializers.SerializerMethodField(read_only=True)
 
     def get_body_html(self, obj):
-        return markdown.markdown(obj.body or "")
+        return render_markdown(obj.body)
 
     def get_primary_video_url(self, obj):
         return obj.primary_video_url
 
     def get_title_picture_url(self, obj):
-        return obj.title_picture_url
+        return obj.title_picture_url()
 
     def validate(self, attrs):
         content_type = attrs.get("content_type", None)
@@ -104,6 +142,7 @@ class ContentItemSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ContentItem
+        list_serializer_class = ContentItemListSerializer
         fields = [
             "id",
             "content_type",
@@ -132,3 +171,42 @@ class ContentItemSerializer(serializers.ModelSerializer):
             "primary_video_url",
         ]
         read_only_fields = ["views", "created_at", "updated_at", "title_picture_url", "body_html", "primary_video_url"]
+
+
+class ContentItemBulkItemSerializer(ContentItemSerializer):
+    """Элемент пакетной записи: связи и уникальность slug проверяются одним запросом на весь пакет"""
+
+    category_id = serializers.IntegerField(allow_null=True, required=False)
+    tag_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    author_id = serializers.IntegerField(required=False)
+
+    class Meta(ContentItemSerializer.Meta):
+        extra_kwargs = {"slug": {"validators": []}}
+
+
+class ContentItemBulkRequestSerializer(serializers.Serializer):
+    create = serializers.ListField(child=serializers.DictField(), required=False, default=list)
+    update = serializers.ListField(child=serializers.DictField(), required=False, default=list)
+    publish = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    unpublish = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+
+    def validate(self, attrs):
+        total = sum(len(attrs[key]) for key in ("create", "update", "publish", "unpublish"))
+        if not total:
+            raise serializers.ValidationError(_("Передайте хотя бы один элемент."))
+        if total > settings.NEWS_BULK_WRITE_MAX_ITEMS:
+            raise serializers.ValidationError(
+                _("Не больше %(limit)d элементов в запросе.") % {"limit": settings.NEWS_BULK_WRITE_MAX_ITEMS}
+            )
+        return attrs
+
+
+class ContentAnalyticsQueryParamsSerializer(serializers.Serializer):
+    interval = serializers.ChoiceField(choices=["day", "hour"], default="day", help_text="Шаг графика")
+    days = serializers.IntegerField(default=30, min_value=1, help_text="Период графика в сутках, до текущего момента")
+
+    def validate_days(self, value):
+        limit = settings.NEWS_VIEW_ANALYTICS_MAX_DAYS
+        if value > limit:
+            raise serializers.ValidationError(f"Ensure this value is less than or equal to {limit}.")
+        return value
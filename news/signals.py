@@ -0,0 +1,81 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from news.models import Category, ContentItem, ContentTombstone, Tag
+from news.related import schedule_related_content_update
+from news.snapshots import schedule_feed_snapshot_rebuild
+from news.tag_arrays import sync_tag_arrays, sync_tag_arrays_for_tag
+from news.utils import invalidate_category_tree, invalidate_feed_items
+
+
+@receiver(post_delete, sender=ContentItem, dispatch_uid="news.record_deleted_content")
+def record_deleted_content(sender, instance, using, **kwargs):
+    """Фиксирует удаление опубликованного элемента для /news/changes/."""
+    if instance.status == ContentItem.Status.PUBLISHED:
+        ContentTombstone.objects.using(using).create(content_id=instance.pk, reason=ContentTombstone.Reason.DELETED)
+
+
+@receiver(post_save, sender=ContentItem, dispatch_uid="news.invalidate_saved_content")
+@receiver(post_delete, sender=ContentItem, dispatch_uid="news.invalidate_deleted_content")
+def invalidate_content_cache(sender, instance, using, **kwargs):
+    invalidate_feed_items([instance.pk], using)
+    # Опубликованный сейчас или раньше (черновик с датой публикации) элемент мог быть в снимках
+    if instance.status == ContentItem.Status.PUBLISHED or instance.published_at:
+        schedule_feed_snapshot_rebuild(using)
+
+
+@receiver(post_save, sender=ContentItem, dispatch_uid="news.update_saved_related_content")
+def update_saved_related_content(sender, instance, using, **kwargs):
+    # Похожие для элемента и его соседей меняют только публикация, снятие и смена категории
+    if not instance.tracked_changes():
+        return
+    if instance.status == ContentItem.Status.PUBLISHED or instance.published_at:
+        schedule_related_content_update([instance.pk], using)
+
+
+@receiver(m2m_changed, sender=ContentItem.tags.through, dispatch_uid="news.update_retagged_related_content")
+def update_retagged_related_content(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear") or (action != "post_clear" and not pk_set):
+        return
+    if not reverse:
+        # Теги черновика, который ещё не публиковался, в индекс похожих не попадают
+        if instance.status == ContentItem.Status.PUBLISHED or instance.published_at:
+            schedule_related_content_update([instance.pk], using)
+    elif pk_set:
+        schedule_related_content_update(pk_set, using)
+
+
+@receiver(m2m_changed, sender=ContentItem.tags.through, dispatch_uid="news.sync_retagged_tag_arrays")
+def sync_retagged_tag_arrays(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        synced = sync_tag_arrays([instance.pk], using)
+        # Экземпляр в памяти получает новые массивы, иначе следующий save() записал бы старые
+        if instance.pk in synced:
+            instance.tag_ids, instance.tag_slugs = synced[instance.pk]
+    elif action == "post_clear":
+        # У tag.contentitem_set.clear() pk_set пуст: элементы находятся по индексу массива
+        sync_tag_arrays_for_tag(instance.pk, using)
+    elif pk_set:
+        sync_tag_arrays(pk_set, using)
+
+
+@receiver(post_save, sender=Tag, dispatch_uid="news.sync_renamed_tag_arrays")
+@receiver(post_delete, sender=Tag, dispatch_uid="news.sync_deleted_tag_arrays")
+def sync_tag_arrays_of_tag(sender, instance, using, created=False, **kwargs):
+    # Смена slug или удаление тега (строки связующей таблицы удаляются каскадом, без m2m_changed)
+    if not created:
+        sync_tag_arrays_for_tag(instance.pk, using)
+
+
+@receiver(post_save, sender=Category, dispatch_uid="news.invalidate_saved_category")
+def invalidate_category_cache(sender, instance, using, **kwargs):
+    invalidate_category_tree(using)
+    schedule_feed_snapshot_rebuild(using)
+
+
+@receiver(post_delete, sender=Category, dispatch_uid="news.invalidate_deleted_category")
+def invalidate_deleted_category_cache(sender, instance, using, **kwargs):
+    invalidate_category_tree(using)
+    schedule_feed_snapshot_rebuild(using, deleted_category_ids=[instance.pk])
@@ -0,0 +1,435 @@
+import fcntl
+import heapq
+import json
+import math
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from news.models import ContentItem
+
+__all__ = [
+    "SimilarIndex",
+    "build_similar_index",
+    "update_similar_index",
+    "get_similar_index",
+    "get_similar_ids",
+]
+
+META_FILE = "meta.json"
+LOCK_FILE = ".lock"
+VOCABULARY_FILE = "vocabulary.json"
+
+# Конфигурация полнотекстового поиска PostgreSQL: токенизация, стоп-слова и стемминг Snowball
+TEXT_CONFIG = "russian"
+# Вес вхождения слова в заголовке, лиде и тексте
+FIELD_WEIGHTS = {"A": 3.0, "B": 2.0, "D": 1.0}
+# tsvector ограничен 1 МБ
+BODY_MAX_CHARS = 100_000
+# Слова реже MIN_DF документов не помогают искать похожие, чаще MAX_DF доли документов — почти стоп-слова
+MIN_DF = 2
+MAX_DF = 0.5
+# Как в MoreLikeThis: запрос строится по этому числу самых весомых слов документа, остальные почти не меняют порядок
+QUERY_TERMS = 24
+
+# Файлы сегмента: CSR-матрица документов (строка — L2-нормированный вектор TF-IDF, не больше
+# NEWS_SIMILAR_MAX_TERMS слов) и обратный индекс по словам (не больше NEWS_SIMILAR_MAX_POSTINGS документов
+# с наибольшим весом на слово). Все массивы — в родном порядке байт.
+SEGMENT_ARRAYS = {
+    "ids": "q",
+    "doc_offsets": "Q",
+    "doc_terms": "I",
+    "doc_weights": "f",
+    "post_offsets": "Q",
+    "post_docs": "I",
+    "post_weights": "f",
+}
+
+VECTOR_SQL = f"""
+    setweight(to_tsvector('{TEXT_CONFIG}', i.title), 'A')
+    || setweight(to_tsvector('{TEXT_CONFIG}', i.lead), 'B')
+    || setweight(to_tsvector('{TEXT_CONFIG}', left(i.body, {BODY_MAX_CHARS})), 'D')
+"""
+TF_SQL = " + ".join(
+    f"{weight} * cardinality(array_positions(t.weights, '{label}'))" for label, weight in FIELD_WEIGHTS.items()
+)
+
+
+class Segment:
+    """Файлы одного сегмента индекса, отображённые в память (``mmap``) без копирования в процесс."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._maps = []
+        for name, typecode in SEGMENT_ARRAYS.items():
+            setattr(self, name, self._map(self.path / f"{name}.bin", typecode))
+        self.size = len(self.ids)
+
+    def _map(self, path, typecode):
+        with open(path, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return memoryview(array(typecode))
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped).cast(typecode)
+
+    def find(self, item_id):
+        """Номер документа элемента или ``None``."""
+        index = bisect_left(self.ids, item_id)
+        return index if index < self.size and self.ids[index] == item_id else None
+
+    def vector(self, doc):
+        start, end = self.doc_offsets[doc], self.doc_offsets[doc + 1]
+        return zip(self.doc_terms[start:end], self.doc_weights[start:end])
+
+    def postings(self, term):
+        if term + 1 >= len(self.post_offsets):
+            return ()
+        start, end = self.post_offsets[term], self.post_offsets[term + 1]
+        return zip(self.post_docs[start:end], self.post_weights[start:end])
+
+
+class SimilarIndex:
+    """Индекс «похожих по тексту»: базовый сегмент из ``build_similar_index`` и сегмент новых элементов.
+
+    Сегмент новых элементов использует словарь и IDF базового и перекрывает его для одинаковых ID.
+    """
+
+    def __init__(self, path, meta):
+        self.path = Path(path)
+        self.meta = meta
+        self.base = Segment(self.path / meta["base"])
+        self.delta = Segment(self.path / meta["delta"]) if meta.get("delta") else None
+        # Документы базового сегмента, перекрытые сегментом новых элементов
+        self.overridden = {self.base.find(item_id) for item_id in self.delta.ids} - {None} if self.delta else set()
+
+    def similar(self, item_id, limit):
+        """ID до ``limit`` элементов с наибольшим косинусным сходством с ``item_id``, от более похожих."""
+        query = None
+        for segment in filter(None, (self.delta, self.base)):
+            doc = segment.find(item_id)
+            if doc is not None:
+                query = heapq.nlargest(QUERY_TERMS, segment.vector(doc), key=lambda pair: pair[1])
+                break
+        if not query:
+            return []
+
+        best = []
+        for segment in filter(None, (self.base, self.delta)):
+            # Суммы копятся по номерам документов; в ID переводятся только лучшие
+            scores = {}
+            for term, query_weight in query:
+                for doc, weight in segment.postings(term):
+                    scores[doc] = scores.get(doc, 0.0) + query_weight * weight
+            for doc in (self.overridden if segment is self.base else ()):
+                scores.pop(doc, None)
+            scores.pop(segment.find(item_id), None)
+            top = heapq.nlargest(limit, scores.items(), key=lambda pair: pair[1])
+            best += [(score, segment.ids[doc]) for doc, score in top]
+        return [candidate for _, candidate in heapq.nlargest(limit, best)]
+
+
+def _index_dir():
+    return Path(settings.NEWS_SIMILAR_INDEX_DIR)
+
+
+def _read_meta(path):
+    try:
+        return json.loads((path / META_FILE).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def _write_meta(path, meta):
+    """Атомарно подменяет ``meta.json`` и удаляет сегменты, на которые он больше не ссылается."""
+    fd, tmp_path = tempfile.mkstemp(dir=path, prefix=f".{META_FILE}.")
+    with os.fdopen(fd, "w") as fh:
+        json.dump(meta, fh)
+    os.replace(tmp_path, path / META_FILE)
+    # Процессы, уже открывшие старые сегменты, дочитают их: на POSIX удалённый mmap остаётся доступным
+    for child in path.iterdir():
+        if child.is_dir() and child.name not in (meta["base"], meta.get("delta")):
+            shutil.rmtree(child, ignore_errors=True)
+
+
+@contextmanager
+def _locked(path):
+    """Не даёт двум сборкам одновременно писать сегменты и удалять чужие."""
+    path.mkdir(parents=True, exist_ok=True)
+    with open(path / LOCK_FILE, "w") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+class _ArrayWriter:
+    """Дописывает значения в файл массива, сбрасывая буфер порциями."""
+
+    BUFFER_ITEMS = 1 << 16
+
+    def __init__(self, path, typecode):
+        self.file = open(path, "wb")
+        self.buffer = array(typecode)
+        self.count = 0
+
+    def extend(self, values):
+        self.buffer.extend(values)
+        if len(self.buffer) >= self.BUFFER_ITEMS:
+            self.flush()
+
+    def append(self, value):
+        self.buffer.append(value)
+        if len(self.buffer) >= self.BUFFER_ITEMS:
+            self.flush()
+
+    def flush(self):
+        self.count += len(self.buffer)
+        self.buffer.tofile(self.file)
+        del self.buffer[:]
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class _SegmentWriter:
+    def __init__(self, root, kind, term_count):
+        self.path = Path(tempfile.mkdtemp(dir=root, prefix=f"{kind}-{timezone.now():%Y%m%d%H%M%S}-"))
+        self.term_count = term_count
+
+    @contextmanager
+    def arrays(self, *names):
+        writers = [_ArrayWriter(self.path / f"{name}.bin", SEGMENT_ARRAYS[name]) for name in names]
+        try:
+            yield writers
+        finally:
+            for writer in writers:
+                writer.close()
+
+    def write_documents(self, documents):
+        """``documents`` — ``(item_id, term_ids, weights)`` по возрастанию ``item_id``; пишутся потоково."""
+        with self.arrays("ids", "doc_offsets", "doc_terms", "doc_weights") as (ids, offsets, terms, weights):
+            offset = 0
+            offsets.append(offset)
+            for item_id, term_ids, term_weights in documents:
+                offset += len(term_ids)
+                ids.append(item_id)
+                offsets.append(offset)
+                terms.extend(term_ids)
+                weights.extend(term_weights)
+        return ids.count
+
+    def write_postings(self, postings):
+        """``postings`` — ``(term_id, doc, weight)`` по возрастанию ``term_id``; пишутся потоково."""
+        with self.arrays("post_offsets", "post_docs", "post_weights") as (offsets, docs, weights):
+            written, count = 0, 0
+            for term_id, doc, weight in postings:
+                # Начало списка каждого слова до term_id включительно, в том числе пустых
+                for _ in range(written, term_id + 1):
+                    offsets.append(count)
+                written = max(written, term_id + 1)
+                docs.append(doc)
+                weights.append(weight)
+                count += 1
+            for _ in range(written, self.term_count + 1):
+                offsets.append(count)
+
+
+def build_similar_index(using=DEFAULT_DB_ALIAS):
+    """Полностью перестраивает индекс по опубликованным элементам (только PostgreSQL).
+
+    Токенизация, стемминг, частоты слов, веса TF-IDF, отбор слов документа и документов слова
+    выполняются запросами во временных таблицах; Python только пишет результат в файлы. Возвращает
+    число проиндексированных элементов.
+    """
+    root = _index_dir()
+    with _locked(root):
+        return _build(root, using)
+
+
+def _build(root, using):
+    items = ContentItem._meta.db_table
+    watermark = timezone.now()
+    connection = connections[using]
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE similar_docs ON COMMIT DROP AS "
+            f"SELECT i.id AS item_id, {VECTOR_SQL} AS vector FROM {items} i WHERE i.status = %s",
+            [ContentItem.Status.PUBLISHED],
+        )
+        cursor.execute("SELECT COUNT(*) FROM similar_docs")
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            "CREATE TEMP TABLE similar_vocabulary ON COMMIT DROP AS "
+            "SELECT (ROW_NUMBER() OVER (ORDER BY word) - 1)::int AS term_id, word AS lexeme, "
+            "ln((1 + %s)::float8 / (1 + ndoc)) + 1 AS idf "
+            "FROM ts_stat('SELECT vector FROM similar_docs') WHERE ndoc >= %s AND ndoc <= %s",
+            [total, MIN_DF, max(MAX_DF * total, MIN_DF)],
+        )
+        cursor.execute(
+            f"""
+            CREATE TEMP TABLE similar_weights ON COMMIT DROP AS
+            WITH raw AS (
+                SELECT d.item_id, v.term_id, (1 + ln({TF_SQL})) * v.idf AS weight
+                FROM similar_docs d
+                CROSS JOIN LATERAL unnest(d.vector) t
+                JOIN similar_vocabulary v ON v.lexeme = t.lexeme
+            ),
+            top AS (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY item_id ORDER BY weight DESC, term_id) AS position
+                FROM raw
+            ),
+            kept AS (
+                SELECT item_id, term_id, weight FROM top WHERE position <= %s
+            )
+            SELECT
+                item_id,
+                (DENSE_RANK() OVER (ORDER BY item_id) - 1)::int AS doc,
+                term_id,
+                (weight / sqrt(SUM(weight * weight) OVER (PARTITION BY item_id)))::real AS weight
+            FROM kept
+            """,
+            [settings.NEWS_SIMILAR_MAX_TERMS],
+        )
+
+        cursor.execute("SELECT lexeme, idf FROM similar_vocabulary ORDER BY term_id")
+        vocabulary = cursor.fetchall()
+        writer = _SegmentWriter(root, "base", len(vocabulary))
+        with open(writer.path / VOCABULARY_FILE, "w") as fh:
+            json.dump(vocabulary, fh, ensure_ascii=False)
+
+        # Результаты читаются серверными курсорами: в памяти процесса только текущая порция строк
+        with connection.chunked_cursor() as stream:
+            stream.execute(
+                "SELECT item_id, array_agg(term_id ORDER BY term_id), array_agg(weight ORDER BY term_id) "
+                "FROM similar_weights GROUP BY item_id ORDER BY item_id"
+            )
+            documents = writer.write_documents(_fetch_stream(stream))
+        with connection.chunked_cursor() as stream:
+            stream.execute(
+                """
+            SELECT term_id, doc, weight FROM (
+                SELECT term_id, doc, weight,
+                    ROW_NUMBER() OVER (PARTITION BY term_id ORDER BY weight DESC, doc) AS position
+                FROM similar_weights
+            ) p
+            WHERE position <= %s
+            ORDER BY term_id, weight DESC, doc
+            """,
+                [settings.NEWS_SIMILAR_MAX_POSTINGS],
+            )
+            writer.write_postings(_fetch_stream(stream))
+        # ON COMMIT DROP не сработает, если сборка идёт внутри внешней транзакции
+        cursor.execute("DROP TABLE similar_weights, similar_vocabulary, similar_docs")
+
+    meta = {"base": writer.path.name, "delta": None, "watermark": watermark.isoformat(), "documents": documents}
+    _write_meta(root, meta)
+    return documents
+
+
+def _fetch_stream(cursor, size=10000):
+    while rows := cursor.fetchmany(size):
+        yield from rows
+
+
+def update_similar_index(using=DEFAULT_DB_ALIAS):
+    """Добавляет в индекс элементы, опубликованные или изменённые после последней полной сборки.
+
+    Сегмент новых элементов каждый раз собирается заново по словарю базового сегмента (слова, которых нет в
+    словаре, не учитываются), поэтому его размер ограничен временем с последнего ``build_similar_index``.
+    Без базового сегмента выполняет полную сборку. Возвращает число элементов в сегменте новых элементов.
+    """
+    root = _index_dir()
+    with _locked(root):
+        meta = _read_meta(root)
+        if meta is None:
+            return _build(root, using)
+        return _update(root, meta, using)
+
+
+def _update(root, meta, using):
+    with open(root / meta["base"] / VOCABULARY_FILE) as fh:
+        vocabulary = {lexeme: (term_id, idf) for term_id, (lexeme, idf) in enumerate(json.load(fh))}
+
+    documents = []
+    with connections[using].chunked_cursor() as cursor:
+        cursor.execute(
+            f"SELECT i.id, t.lexeme, {TF_SQL} FROM {ContentItem._meta.db_table} i "
+            f"CROSS JOIN LATERAL unnest({VECTOR_SQL}) t "
+            f"WHERE i.status = %s AND i.updated_at >= %s ORDER BY i.id",
+            [ContentItem.Status.PUBLISHED, parse_datetime(meta["watermark"])],
+        )
+        current_id, weights = None, {}
+        for item_id, lexeme, tf in _fetch_stream(cursor):
+            if item_id != current_id:
+                documents.append(_document(current_id, weights))
+                current_id, weights = item_id, {}
+            if lexeme in vocabulary:
+                term_id, idf = vocabulary[lexeme]
+                weights[term_id] = (1 + math.log(tf)) * idf
+        documents.append(_document(current_id, weights))
+    documents = [document for document in documents if document]
+
+    writer = _SegmentWriter(root, "delta", len(vocabulary))
+    writer.write_documents(documents)
+    postings = sorted(
+        (
+            (term_id, doc, weight)
+            for doc, (_, term_ids, weights) in enumerate(documents)
+            for term_id, weight in zip(term_ids, weights)
+        ),
+        key=lambda posting: (posting[0], -posting[2], posting[1]),
+    )
+    writer.write_postings(postings)
+    _write_meta(root, {**meta, "delta": writer.path.name})
+    return len(documents)
+
+
+def _document(item_id, weights):
+    """Отбирает ``NEWS_SIMILAR_MAX_TERMS`` слов с наибольшим весом и нормирует вектор, как полная сборка."""
+    if item_id is None or not weights:
+        return None
+    top = heapq.nsmallest(settings.NEWS_SIMILAR_MAX_TERMS, weights.items(), key=lambda pair: (-pair[1], pair[0]))
+    norm = math.sqrt(sum(weight * weight for _, weight in top))
+    top.sort()
+    return item_id, [term_id for term_id, _ in top], [weight / norm for _, weight in top]
+
+
+_loaded = threading.local()
+
+
+def get_similar_index():
+    """Индекс текущей сборки или ``None``, если он ещё не построен.
+
+    Открытый индекс переиспользуется, пока не изменится ``meta.json``.
+    """
+    root = _index_dir()
+    try:
+        stamp = (str(root), os.stat(root / META_FILE).st_mtime_ns)
+    except FileNotFoundError:
+        return None
+    if getattr(_loaded, "stamp", None) != stamp:
+        meta = _read_meta(root)
+        if meta is None:
+            return None
+        _loaded.index, _loaded.stamp = SimilarIndex(root, meta), stamp
+    return _loaded.index
+
+
+def get_similar_ids(item_id, limit):
+    index = get_similar_index()
+    return index.similar(item_id, limit) if index else []
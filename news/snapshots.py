@@ -0,0 +1,241 @@
+import gzip
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count
+from django.utils.module_loading import import_string
+
+from core.metrics import record_cache_lookup
+from core.renderers import ORJSONRenderer
+from news.serializers.apiv2_serializers import CategorySerializer, serialize_feed_items
+from news.utils import get_category_and_descendants_ids, get_category_children_map, published_feed_queryset
+
+__all__ = [
+    "FeedSnapshotStorage",
+    "FileSystemFeedSnapshotStorage",
+    "get_snapshot_storage",
+    "build_feed_snapshots",
+    "delete_category_snapshots",
+    "schedule_feed_snapshot_rebuild",
+    "deferred_feed_snapshot_rebuild",
+    "get_feed_snapshot",
+    "get_categories_snapshot",
+]
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES_SNAPSHOT = "categories.json"
+
+# Запрошенные внутри deferred_feed_snapshot_rebuild() пересборки: ID удалённых категорий
+_deferred_rebuild = ContextVar("deferred_feed_snapshot_rebuild", default=None)
+
+# Закоммиченные запросы, ждущие отложенной пересборки: (pid, ID удалённых категорий). Таймер родителя
+# после fork не наследуется, поэтому запрос чужого процесса считается отсутствующим
+_pending = None
+_pending_lock = threading.Lock()
+# Пересборка дольше задержки не должна идти параллельно следующей
+_rebuild_lock = threading.Lock()
+
+
+def feed_snapshot_name(category_id, page_number):
+    return f"feed/{'all' if category_id is None else category_id}/{page_number}.json"
+
+
+class FeedSnapshotStorage:
+    """Хранилище снимков: имя файла -> байты JSON. Запись каждого файла должна быть атомарной."""
+
+    def write(self, name, content):
+        raise NotImplementedError
+
+    def read(self, name):
+        """Содержимое файла или ``None``, если снимка нет."""
+        raise NotImplementedError
+
+    def delete(self, name):
+        raise NotImplementedError
+
+
+class FileSystemFeedSnapshotStorage(FeedSnapshotStorage):
+    """Файлы в ``location`` (по умолчанию ``MEDIA_ROOT/feed-snapshots``) рядом с копией ``.gz``.
+
+    Файл пишется во временный в том же каталоге и подменяется через ``os.replace``, поэтому читатель
+    (представление или CDN/nginx с ``gzip_static``) видит либо старую, либо новую версию целиком.
+    """
+
+    def __init__(self, location=None):
+        self.location = Path(location or Path(settings.MEDIA_ROOT) / "feed-snapshots")
+
+    def path(self, name):
+        return self.location / name
+
+    def write(self, name, content):
+        path = self.path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._replace(path.with_name(path.name + ".gz"), gzip.compress(content, mtime=0))
+        self._replace(path, content)
+
+    @staticmethod
+    def _replace(path, content):
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(content)
+            # mkstemp создаёт файл с правами 0600, а раздавать его может другой пользователь (nginx)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def read(self, name):
+        try:
+            return self.path(name).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def delete(self, name):
+        path = self.path(name)
+        for target in (path, path.with_name(path.name + ".gz")):
+            target.unlink(missing_ok=True)
+
+
+def get_snapshot_storage():
+    return import_string(settings.NEWS_FEED_SNAPSHOT_STORAGE)()
+
+
+def build_feed_snapshots(storage=None):
+    """Пересобирает первые ``NEWS_FEED_SNAPSHOT_PAGES`` страниц общей ленты и лент категорий и дерево категорий.
+
+    На каждую ленту — один запрос сразу за все страницы. Возвращает число записанных файлов.
+    """
+    storage = storage or get_snapshot_storage()
+    renderer = ORJSONRenderer()
+    pages = settings.NEWS_FEED_SNAPSHOT_PAGES
+    page_size = settings.NEWS_FEED_SNAPSHOT_PAGE_SIZE
+
+    children_map = get_category_children_map()
+    qs = published_feed_queryset()
+    # totalCount ленты категории — число элементов в ней и подкатегориях, как в ответе без снимка
+    counts = dict(qs.order_by().values("category_id").annotate(total=Count("id")).values_list("category_id", "total"))
+    category_ids = [category.id for children in children_map.values() for category in children]
+
+    written = 0
+    for category_id in [None, *category_ids]:
+        scope_qs = qs
+        meta = {"totalCount": sum(counts.values())}
+        if category_id is not None:
+            scope_ids = get_category_and_descendants_ids(category_id, children_map)
+            scope_qs = qs.filter(category_id__in=scope_ids)
+            meta = {"totalCount": sum(counts.get(pk, 0) for pk in scope_ids)}
+        items = list(scope_qs[: pages * page_size])
+        for page in range(pages):
+            payload = serialize_feed_items(items[page * page_size : (page + 1) * page_size], children_map)
+            storage.write(feed_snapshot_name(category_id, page + 1), renderer.render({**payload, "meta": meta}))
+            written += 1
+
+    categories = CategorySerializer(children_map[None], many=True, context={"category_children": children_map})
+    storage.write(CATEGORIES_SNAPSHOT, renderer.render({"data": categories.data}))
+    return written + 1
+
+
+def delete_category_snapshots(category_id, storage=None):
+    storage = storage or get_snapshot_storage()
+    for page in range(settings.NEWS_FEED_SNAPSHOT_PAGES):
+        storage.delete(feed_snapshot_name(category_id, page + 1))
+
+
+def _rebuild(deleted_category_ids):
+    try:
+        storage = get_snapshot_storage()
+        for category_id in deleted_category_ids:
+            delete_category_snapshots(category_id, storage)
+        build_feed_snapshots(storage)
+    except Exception:
+        # Снимки не должны ломать публикацию: при ошибке представление продолжит отдавать прежние файлы
+        logger.exception("Feed snapshot rebuild failed")
+
+
+def _request_rebuild(deleted_category_ids):
+    """Пересобирает снимки не чаще раза в ``NEWS_FEED_SNAPSHOT_REBUILD_DELAY`` секунд в фоновом потоке.
+
+    Запросы, пришедшие до срабатывания таймера, сливаются в одну пересборку. С нулевой задержкой
+    снимки пересобираются сразу, в потоке запроса.
+    """
+    global _pending
+    delay = settings.NEWS_FEED_SNAPSHOT_REBUILD_DELAY
+    if delay <= 0:
+        _rebuild(deleted_category_ids)
+        return
+    with _pending_lock:
+        if _pending is not None and _pending[0] == os.getpid():
+            _pending[1].update(deleted_category_ids)
+            return
+        _pending = (os.getpid(), set(deleted_category_ids))
+    timer = threading.Timer(delay, _rebuild_pending)
+    timer.daemon = True
+    timer.start()
+
+
+def _rebuild_pending():
+    global _pending
+    with _pending_lock:
+        _, deleted_category_ids = _pending
+        _pending = None
+    try:
+        with _rebuild_lock:
+            _rebuild(deleted_category_ids)
+    finally:
+        connections.close_all()
+
+
+def schedule_feed_snapshot_rebuild(using=DEFAULT_DB_ALIAS, deleted_category_ids=()):
+    """Запрашивает пересборку снимков после коммита текущей транзакции, если режим снимков включён."""
+    if not settings.NEWS_FEED_SNAPSHOTS:
+        return
+    deferred = _deferred_rebuild.get()
+    if deferred is not None:
+        deferred.append(list(deleted_category_ids))
+        return
+    deleted_category_ids = list(deleted_category_ids)
+    transaction.on_commit(lambda: _request_rebuild(deleted_category_ids), using=using)
+
+
+@contextmanager
+def deferred_feed_snapshot_rebuild(using=DEFAULT_DB_ALIAS):
+    """Объединяет пересборки, запрошенные внутри блока, в одну после его успешного завершения."""
+    requests = []
+    token = _deferred_rebuild.set(requests)
+    try:
+        yield
+    finally:
+        _deferred_rebuild.reset(token)
+    if requests:
+        schedule_feed_snapshot_rebuild(using, [pk for deleted in requests for pk in deleted])
+
+
+def get_feed_snapshot(category_id, page_number, page_size):
+    """Готовый JSON страницы ленты или ``None``, если страница не покрывается снимками."""
+    if (
+        not settings.NEWS_FEED_SNAPSHOTS
+        or page_size != settings.NEWS_FEED_SNAPSHOT_PAGE_SIZE
+        or page_number > settings.NEWS_FEED_SNAPSHOT_PAGES
+    ):
+        return None
+    content = get_snapshot_storage().read(feed_snapshot_name(category_id, page_number))
+    record_cache_lookup("feed_snapshot", content is not None)
+    return content
+
+
+def get_categories_snapshot():
+    if not settings.NEWS_FEED_SNAPSHOTS:
+        return None
+    content = get_snapshot_storage().read(CATEGORIES_SNAPSHOT)
+    record_cache_lookup("feed_snapshot", content is not None)
+    return content
@@ -0,0 +1,84 @@
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Max, Min
+
+from news.models import ContentItem, Tag
+
+__all__ = [
+    "sync_tag_arrays",
+    "sync_tag_arrays_for_tag",
+    "check_tag_arrays",
+]
+
+# Элементы, у которых tag_ids/tag_slugs расходятся со связующей таблицей, и правильные значения массивов.
+# Оба массива упорядочены по ID тега, чтобы i-й slug соответствовал i-му ID
+DRIFT_SQL = """
+SELECT i.id, COALESCE(t.ids, '{{}}') AS ids, COALESCE(t.slugs, '{{}}') AS slugs
+FROM {items} i
+CROSS JOIN LATERAL (
+    SELECT array_agg(tag.id ORDER BY tag.id) AS ids, array_agg(tag.slug ORDER BY tag.id) AS slugs
+    FROM {through} ct JOIN {tags} tag ON tag.id = ct.tag_id
+    WHERE ct.contentitem_id = i.id
+) t
+WHERE {where}
+    AND (i.tag_ids, i.tag_slugs) IS DISTINCT FROM (COALESCE(t.ids, '{{}}'), COALESCE(t.slugs, '{{}}'))
+"""
+
+SYNC_SQL = """
+WITH drift AS ({drift})
+UPDATE {items} i SET tag_ids = drift.ids, tag_slugs = drift.slugs
+FROM drift
+WHERE i.id = drift.id
+RETURNING i.id, i.tag_ids, i.tag_slugs
+"""
+
+# Блокировка отдельным запросом: в READ COMMITTED следующий запрос берёт новый снимок и видит теги,
+# записанные параллельной транзакцией до её коммита, а не затирает их. NO KEY UPDATE не конфликтует
+# с KEY SHARE, которую держат вставки в связующую таблицу, и не приводит к взаимной блокировке
+LOCK_SQL = "SELECT id FROM {items} WHERE id = ANY(%s) ORDER BY id FOR NO KEY UPDATE"
+
+
+def _sql(template, where, **extra):
+    tables = {
+        "items": ContentItem._meta.db_table,
+        "through": ContentItem.tags.through._meta.db_table,
+        "tags": Tag._meta.db_table,
+    }
+    return template.format(drift=DRIFT_SQL.format(where=where, **tables), where=where, **tables, **extra)
+
+
+def sync_tag_arrays(ids, using=DEFAULT_DB_ALIAS):
+    """Пересчитывает ``tag_ids`` и ``tag_slugs`` элементов ``ids`` по связующей таблице одним UPDATE.
+
+    Записываются только разошедшиеся строки; возвращает ``{id: (tag_ids, tag_slugs)}`` для них.
+    """
+    ids = sorted(set(ids))
+    if not ids:
+        return {}
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute(_sql(LOCK_SQL, None), [ids])
+        cursor.execute(_sql(SYNC_SQL, "i.id = ANY(%s)"), [ids])
+        return {pk: (tag_ids, tag_slugs) for pk, tag_ids, tag_slugs in cursor.fetchall()}
+
+
+def sync_tag_arrays_for_tag(tag_id, using=DEFAULT_DB_ALIAS):
+    """Пересчитывает массивы элементов с тегом ``tag_id`` (после смены slug или удаления тега) по GIN-индексу."""
+    ids = ContentItem.objects.using(using).filter(tag_ids__contains=[tag_id]).values_list("id", flat=True)
+    return sync_tag_arrays(ids, using)
+
+
+def check_tag_arrays(fix=False, batch_size=5000, using=DEFAULT_DB_ALIAS):
+    """Ищет элементы, у которых массивы тегов разошлись со связующей таблицей; с ``fix`` — исправляет их.
+
+    Таблица проходится диапазонами ID по ``batch_size``, исправление каждого диапазона — своя транзакция.
+    Возвращает ID найденных элементов.
+    """
+    bounds = ContentItem.objects.using(using).aggregate(low=Min("id"), high=Max("id"))
+    if bounds["low"] is None:
+        return []
+    drifted = []
+    for start in range(bounds["low"], bounds["high"] + 1, batch_size):
+        params = [start, start + batch_size - 1]
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            cursor.execute(_sql(SYNC_SQL if fix else DRIFT_SQL, "i.id BETWEEN %s AND %s"), params)
+            drifted.extend(pk for pk, *_ in cursor.fetchall())
+    return sorted(drifted)
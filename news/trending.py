@@ -0,0 +1,225 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections, transaction
+from django.utils import timezone
+
+from core.metrics import PENDING_VIEWS
+from core.replicas import pin_to_primary
+from news.analytics import write_view_events
+from news.models import ContentItem, TrendingEpoch
+
+__all__ = [
+    "record_view",
+    "pending_views",
+    "flush_views",
+    "renormalize_trending",
+]
+
+logger = logging.getLogger(__name__)
+
+# Буфер записывается и при таком числе событий: популярный элемент иначе копил бы их весь интервал
+MAX_BUFFERED_EVENTS = 100_000
+# После перенормировки рейтинги меньше этой доли одного свежего просмотра обнуляются и больше не переписываются
+MIN_SCORE = 1e-3
+
+# Рейтинг хранится как сумма ``просмотры * 2 ** ((время - начало эпохи) / период полураспада)``: у всех
+# элементов он отличается от затухающего ``2 ** (-(сейчас - время) / период)`` одним и тем же множителем,
+# поэтому порядок тот же, а новые просмотры только прибавляются к столбцу с индексом. Множитель растёт
+# экспоненциально — ``renormalize_trending`` периодически переносит начало эпохи и делит на него рейтинги.
+CREATE_EPOCH_SQL = "INSERT INTO {epoch} (id, started_at) VALUES (1, %s) ON CONFLICT (id) DO NOTHING"
+LOCK_EPOCH_SQL = "SELECT started_at FROM {epoch} WHERE id = 1 FOR {mode}"
+
+FLUSH_SQL = """
+UPDATE {items} i
+SET views = i.views + v.count, trending_score = i.trending_score + v.count * %(weight)s
+FROM unnest(%(ids)s::bigint[], %(counts)s::int[]) AS v(id, count)
+WHERE i.id = v.id
+"""
+
+RENORMALIZE_SQL = """
+UPDATE {items}
+SET trending_score = CASE WHEN trending_score * %(factor)s < %(min_score)s THEN 0 ELSE trending_score * %(factor)s END
+WHERE trending_score <> 0
+"""
+
+
+class _ViewBuffer:
+    """Просмотры, накопленные процессом с последней записи в БД: счётчики и события ``(item_id, время)``."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.events = []
+        self.started = time.monotonic()
+
+    def add(self, item_id):
+        """Учитывает просмотр; возвращает ``True``, если буфер пора записать."""
+        with self.lock:
+            if not self.counts:
+                self.started = time.monotonic()
+            self.counts[item_id] += 1
+            self.events.append((item_id, timezone.now()))
+            due = (
+                len(self.counts) >= settings.NEWS_VIEWS_FLUSH_MAX_ITEMS
+                or len(self.events) >= MAX_BUFFERED_EVENTS
+                or time.monotonic() - self.started >= settings.NEWS_VIEWS_FLUSH_SECONDS
+            )
+        PENDING_VIEWS.inc()
+        return due
+
+    def take(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+            events, self.events = self.events, []
+        return counts, events
+
+    def restore(self, counts, events):
+        with self.lock:
+            self.counts.update(counts)
+            self.events[:0] = events
+
+    def get(self, item_id):
+        with self.lock:
+            return self.counts[item_id]
+
+    def age(self):
+        """Секунды с первого незаписанного просмотра или ``None``, если буфер пуст."""
+        with self.lock:
+            return time.monotonic() - self.started if self.counts else None
+
+
+_buffer = _ViewBuffer()
+_flusher_lock = threading.Lock()
+_flusher = None
+
+
+def _flush_periodically():
+    """Цикл фонового потока: записывает буфер, как только он старше ``NEWS_VIEWS_FLUSH_SECONDS``.
+
+    Без него просмотры после последнего запроса воркера ждали бы следующего просмотра сколь угодно долго.
+    """
+    global _flusher
+    try:
+        while settings.NEWS_VIEWS_FLUSH_THREAD:
+            interval = settings.NEWS_VIEWS_FLUSH_SECONDS
+            age = _buffer.age()
+            if age is not None and age >= interval:
+                close_old_connections()
+                try:
+                    flush_views()
+                except Exception:
+                    logger.exception("Flushing buffered views failed")
+                age = None
+            time.sleep(interval - age if age is not None else interval)
+    finally:
+        with _flusher_lock:
+            _flusher = None
+        connections.close_all()
+
+
+def _start_flusher():
+    """Запускает фоновый поток записи буфера один раз в каждом процессе (в том числе после fork)."""
+    global _flusher
+    if not settings.NEWS_VIEWS_FLUSH_THREAD or settings.NEWS_VIEWS_FLUSH_SECONDS <= 0:
+        return
+    pid = os.getpid()
+    with _flusher_lock:
+        if _flusher is not None and _flusher[0] == pid:
+            return
+        thread = threading.Thread(target=_flush_periodically, name="news-views-flusher", daemon=True)
+        _flusher = (pid, thread)
+        thread.start()
+
+
+def _half_life():
+    return settings.NEWS_TRENDING_HALF_LIFE_HOURS * 3600
+
+
+def _lock_epoch(cursor, mode, now):
+    """Начало эпохи, заблокированное до конца транзакции; строка эпохи создаётся при первом обращении."""
+    epoch = TrendingEpoch._meta.db_table
+    cursor.execute(CREATE_EPOCH_SQL.format(epoch=epoch), [now])
+    cursor.execute(LOCK_EPOCH_SQL.format(epoch=epoch, mode=mode))
+    return cursor.fetchone()[0]
+
+
+def record_view(item_id, using=DEFAULT_DB_ALIAS):
+    """Учитывает просмотр в буфере процесса и записывает буфер, если он старше ``NEWS_VIEWS_FLUSH_SECONDS``
+    или в нём ``NEWS_VIEWS_FLUSH_MAX_ITEMS`` элементов. Без новых просмотров буфер записывает фоновый поток.
+
+    Ошибка записи не прерывает запрос: просмотры возвращаются в буфер до следующей попытки.
+    """
+    _start_flusher()
+    if _buffer.add(item_id):
+        try:
+            flush_views(using)
+        except Exception:
+            logger.exception("Flushing buffered views failed")
+        else:
+            # Сырой SQL роутер не видит: закрепляем клиента за primary, как после любой записи
+            pin_to_primary()
+
+
+def pending_views(item_id):
+    """Просмотры элемента, накопленные этим процессом и ещё не записанные в БД."""
+    return _buffer.get(item_id)
+
+
+def flush_views(using=DEFAULT_DB_ALIAS):
+    """Записывает буфер одним UPDATE: прибавляет просмотры к ``views`` и с весом текущего момента эпохи —
+    к ``trending_score``, а события просмотров — через ``COPY`` в секционированную таблицу ``news.analytics``.
+    Возвращает число записанных просмотров.
+    """
+    counts, events = _buffer.take()
+    if not counts:
+        return 0
+    total = sum(counts.values())
+    try:
+        now = timezone.now()
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            # FOR SHARE: записи буферов не мешают друг другу, но ждут перенормировку и не смешивают эпохи
+            started_at = _lock_epoch(cursor, "SHARE", now)
+            weight = 2 ** ((now - started_at).total_seconds() / _half_life())
+            cursor.execute(
+                FLUSH_SQL.format(items=ContentItem._meta.db_table),
+                {"ids": list(counts), "counts": list(counts.values()), "weight": weight},
+            )
+            write_view_events(cursor, events)
+    except Exception:
+        _buffer.restore(counts, events)
+        raise
+    PENDING_VIEWS.dec(total)
+    return total
+
+
+def renormalize_trending(using=DEFAULT_DB_ALIAS):
+    """Переносит начало эпохи на текущий момент, деля рейтинги на накопленный множитель.
+
+    Порядок элементов не меняется. Запускать чаще, чем раз в несколько сотен периодов полураспада, иначе
+    множитель переполнит ``float8``. Возвращает число изменённых элементов.
+    """
+    now = timezone.now()
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        started_at = _lock_epoch(cursor, "UPDATE", now)
+        factor = 2 ** (-(now - started_at).total_seconds() / _half_life())
+        cursor.execute(
+            RENORMALIZE_SQL.format(items=ContentItem._meta.db_table), {"factor": factor, "min_score": MIN_SCORE}
+        )
+        updated = cursor.rowcount
+        TrendingEpoch.objects.using(using).filter(id=1).update(started_at=now)
+    return updated
+
+
+@atexit.register
+def _flush_on_exit():
+    # Чтобы при штатной остановке воркера не терять накопленные просмотры; при SIGKILL/OOM они теряются
+    try:
+        flush_views()
+    except Exception:
+        logger.exception("Flushing buffered views on exit failed")
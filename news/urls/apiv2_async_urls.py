@@ -0,0 +1,14 @@
+from django.urls import path
+from news.views import apiv2_async_views, apiv2_views
+
+# Те же пути и имена, что в apiv2_urls, но с асинхронными представлениями (NEWS_ASYNC_VIEWS=True)
+urlpatterns = [
+    path("news/feed/", apiv2_async_views.async_news_feed, name="news-feed"),
+    path("news/<int:newsItemId>/", apiv2_async_views.async_news_detail_html, name="news-detail"),
+    path("news/categories/", apiv2_async_views.async_news_categories, name="news-categories"),
+    path("news/items/", apiv2_views.NewsItemsAPIView.as_view(), name="news-items"),
+    path("news/<int:newsItemId>/related/", apiv2_views.NewsRelatedAPIView.as_view(), name="news-related"),
+    path("news/<int:newsItemId>/similar/", apiv2_views.NewsSimilarAPIView.as_view(), name="news-similar"),
+    path("news/changes/", apiv2_views.NewsChangesAPIView.as_view(), name="news-changes"),
+    path("news/events/", apiv2_async_views.news_events, name="news-events"),
+]
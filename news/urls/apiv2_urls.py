@@ -1,8 +1,13 @@
 from django.urls import path
-from news.views import apiv2_views
+from news.views import apiv2_async_views, apiv2_views
 
 urlpatterns = [
     path("news/feed/", apiv2_views.NewsFeedAPIView.as_view(), name="news-feed"),
     path("news/<int:newsItemId>/", apiv2_views.news_detail_html, name="news-detail"),
     path("news/categories/", apiv2_views.NewsCategoriesAPIView.as_view(), name="news-categories"),
+    path("news/items/", apiv2_views.NewsItemsAPIView.as_view(), name="news-items"),
+    path("news/<int:newsItemId>/related/", apiv2_views.NewsRelatedAPIView.as_view(), name="news-related"),
+    path("news/<int:newsItemId>/similar/", apiv2_views.NewsSimilarAPIView.as_view(), name="news-similar"),
+    path("news/changes/", apiv2_views.NewsChangesAPIView.as_view(), name="news-changes"),
+    path("news/events/", apiv2_async_views.news_events, name="news-events"),
 ]
@@ -1 +1,5 @@
 from .apiv2_utils import *
+from .markdown_utils import *
+from .changes_utils import *
+from .item_cache import *
+from .facets_utils import *
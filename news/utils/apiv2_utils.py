@@ -1,18 +1,93 @@
-from news.models import Category
+from collections import defaultdict
 
+from news.models import Category, ContentItem
 
-def get_category_and_descendants_ids(category_id):
-    try:
-        root = Category.objects.get(id=category_id)
-    except Category.DoesNotExist:
-        return []
+# Поля, нужные представлению элемента ленты v2 (остальные не загружаются)
+FEED_FIELDS = (
+    "id",
+    "title",
+    "lead",
+    "published_at",
+    "created_at",
+    "title_picture",
+    "category_id",
+    "content_type",
+    "youtube_id",
+)
+
+
+# Порядок ленты по параметру sort; для trending — скан индекса (status, -trending_score, -id)
+FEED_ORDERING = {
+    "latest": ("-published_at", "-updated_at"),
+    "trending": ("-trending_score", "-id"),
+}
+
+
+def published_feed_queryset(include=(), sort="latest"):
+    qs = (
+        ContentItem.objects.filter(status=ContentItem.Status.PUBLISHED)
+        .only(*FEED_FIELDS)
+        .order_by(*FEED_ORDERING[sort])
+    )
+    # С include=categories категория берётся из дерева, JOIN не нужен
+    return qs if "categories" in include else qs.select_related("category")
+
+
+def get_category_children_map(using=None):
+    """Возвращает словарь ``parent_id -> [дочерние категории]`` для всего дерева за один запрос."""
+    children_map = defaultdict(list)
+    for category in Category.objects.db_manager(using).all():
+        children_map[category.parent_id].append(category)
+    return children_map
 
-    ids = [root.id]
 
-    def collect_descendants(category):
-        for category_set in category.category_set.all():
-            ids.append(category_set.id)
-            collect_descendants(category_set)
+async def aget_category_children_map():
+    """Асинхронный вариант ``get_category_children_map``."""
+    children_map = defaultdict(list)
+    async for category in Category.objects.all():
+        children_map[category.parent_id].append(category)
+    return children_map
 
-    collect_descendants(root)
+
+def get_category_and_descendants_ids(category_id, children_map=None):
+    if children_map is None:
+        children_map = get_category_children_map()
+
+    known_ids = {category.id for children in children_map.values() for category in children}
+    if category_id not in known_ids:
+        return []
+
+    # Множество для проверки посещения (защита от циклов в дереве), список — для порядка обхода
+    ids = []
+    visited = set()
+    stack = [category_id]
+    while stack:
+        current_id = stack.pop()
+        if current_id in visited:
+            continue
+        visited.add(current_id)
+        ids.append(current_id)
+        stack.extend(child.id for child in children_map.get(current_id, []))
     return ids
+
+
+def filter_feed_queryset(qs, params, children_map):
+    """Фильтры ленты из ``NewsFeedQueryParamsSerializer``: внутри измерения — «или», между измерениями — «и».
+
+    ``categoryId`` и ``categoryIds`` включают подкатегории.
+    """
+    requested = params["categoryIds"] + ([params["categoryId"]] if params.get("categoryId") is not None else [])
+    if requested:
+        category_ids = {
+            pk for category_id in requested for pk in get_category_and_descendants_ids(category_id, children_map)
+        }
+        qs = qs.filter(category_id__in=category_ids) if category_ids else qs.none()
+    if params["tagIds"]:
+        # && или @> по массиву tag_ids — поиск по GIN-индексу без соединения со связующей таблицей
+        lookup = "tag_ids__contains" if params["tagMatch"] == "all" else "tag_ids__overlap"
+        qs = qs.filter(**{lookup: params["tagIds"]})
+    if params["authorIds"]:
+        qs = qs.filter(author_id__in=params["authorIds"])
+    if params["contentType"]:
+        qs = qs.filter(content_type__in=params["contentType"])
+    return qs
@@ -0,0 +1,191 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.validators import UniqueValidator
+
+from news.events import PUBLISHED, UPDATED, notify_content_events
+from news.models import BulkJob, Category, ContentItem, ContentTombstone, Tag
+from news.serializers.serializers import ContentItemBulkItemSerializer
+from news.utils.item_cache import invalidate_feed_items
+
+__all__ = [
+    "bulk_write_content_items",
+]
+
+BULK_WRITE_BATCH_SIZE = 1000
+VIDEO_ID_FIELDS = {"youtube_id", "rutube_id", "vkvideo_id"}
+
+
+def _invalid_pk(pk):
+    return [PrimaryKeyRelatedField.default_error_messages["does_not_exist"].format(pk_value=pk)]
+
+
+def _existing_ids(model, ids):
+    return set(model.objects.filter(id__in=ids).values_list("id", flat=True)) if ids else set()
+
+
+def _check_relations(entries, errors):
+    """Проверяет связи и уникальность slug всех элементов пакета одним запросом на таблицу.
+
+    ``entries`` — список ``(operation, index, instance, attrs)``; возвращает прошедшие проверку.
+    """
+    categories = _existing_ids(Category, {attrs["category_id"] for *_, attrs in entries if attrs.get("category_id")})
+    tags = _existing_ids(Tag, {pk for *_, attrs in entries for pk in attrs.get("tag_ids", ())})
+    authors = _existing_ids(get_user_model(), {attrs["author_id"] for *_, attrs in entries if "author_id" in attrs})
+
+    slugs = {attrs["slug"] for *_, attrs in entries if "slug" in attrs}
+    slug_owners = {
+        slug: ("item", pk) for slug, pk in ContentItem.objects.filter(slug__in=slugs).values_list("slug", "id")
+    }
+
+    valid = []
+    for operation, index, instance, attrs in entries:
+        item_errors = {}
+        if attrs.get("category_id") and attrs["category_id"] not in categories:
+            item_errors["category_id"] = _invalid_pk(attrs["category_id"])
+        missing_tags = [pk for pk in attrs.get("tag_ids", ()) if pk not in tags]
+        if missing_tags:
+            item_errors["tag_ids"] = _invalid_pk(missing_tags[0])
+        if "author_id" in attrs and attrs["author_id"] not in authors:
+            item_errors["author_id"] = _invalid_pk(attrs["author_id"])
+        if "slug" in attrs:
+            owner = ("item", instance.pk) if instance else ("create", index)
+            if slug_owners.setdefault(attrs["slug"], owner) != owner:
+                item_errors["slug"] = [UniqueValidator.message]
+
+        if item_errors:
+            errors.append({"operation": operation, "index": index, "errors": ValidationError(item_errors).detail})
+        else:
+            valid.append((operation, index, instance, attrs))
+    return valid
+
+
+def bulk_write_content_items(data, user):
+    """Создаёт, изменяет, публикует и снимает с публикации элементы контента одним запросом API.
+
+    Число SQL-запросов не зависит от числа элементов (с точностью до пакетов по ``BULK_WRITE_BATCH_SIZE``):
+    изменения записываются одним ``bulk_update`` на каждый набор изменённых полей. Невалидные элементы пропускаются и возвращаются в ``errors`` с индексом, остальные записываются в одной
+    транзакции. Метаданные видео загружает фоновая задача ``BulkJob``, а не запрос.
+    """
+    from news.related import schedule_related_content_update
+    from news.snapshots import deferred_feed_snapshot_rebuild, schedule_feed_snapshot_rebuild
+    from news.tag_arrays import sync_tag_arrays
+
+    # Изменяемые элементы читаются и блокируются на primary в той же транзакции, что и запись:
+    # статусы и значения полей не могут устареть до UPDATE
+    with transaction.atomic(using=DEFAULT_DB_ALIAS), deferred_feed_snapshot_rebuild():
+        errors, entries = [], []
+        for index, raw in enumerate(data["create"]):
+            serializer = ContentItemBulkItemSerializer(data=raw)
+            if serializer.is_valid():
+                entries.append(("create", index, None, serializer.validated_data))
+            else:
+                errors.append({"operation": "create", "index": index, "errors": serializer.errors})
+
+        update_ids = [raw["id"] for raw in data["update"] if isinstance(raw.get("id"), int)]
+        instances = {
+            item.pk: item
+            for item in ContentItem.objects.using(DEFAULT_DB_ALIAS)
+            .select_for_update()
+            .filter(id__in=update_ids)
+            .order_by("id")
+        }
+        for index, raw in enumerate(data["update"]):
+            instance = instances.get(raw.get("id"))
+            if instance is None:
+                errors.append(
+                    {
+                        "operation": "update",
+                        "index": index,
+                        "errors": ValidationError({"id": _invalid_pk(raw.get("id"))}).detail,
+                    }
+                )
+                continue
+            serializer = ContentItemBulkItemSerializer(instance, data=raw, partial=True)
+            if serializer.is_valid():
+                entries.append(("update", index, instance, serializer.validated_data))
+            else:
+                errors.append({"operation": "update", "index": index, "errors": serializer.errors})
+
+        entries = _check_relations(entries, errors)
+        now = timezone.now()
+        through = ContentItem.tags.through
+        created, updated, tag_rows, retagged, unpublished, video_items = [], [], [], [], [], []
+        newly_published, republished = [], []
+        # Элементы по набору своих изменённых полей: bulk_update не должен писать поля, которые элемент не менял
+        update_groups = defaultdict(list)
+
+        for operation, index, item, attrs in entries:
+            attrs = dict(attrs)
+            tag_ids = attrs.pop("tag_ids", None)
+            changed_fields = {"updated_at", *attrs}
+            if item is None:
+                item = ContentItem(**{"author_id": user.pk, **attrs})
+                created.append((index, item))
+                was_published = False
+            else:
+                was_published = item.status == ContentItem.Status.PUBLISHED
+                for field, value in attrs.items():
+                    setattr(item, field, value)
+                item.updated_at = now
+                updated.append((index, item))
+                if tag_ids is not None:
+                    retagged.append(item.pk)
+
+            if item.status == ContentItem.Status.PUBLISHED:
+                if not item.published_at:
+                    item.published_at = now
+                    changed_fields.add("published_at")
+                (republished if was_published else newly_published).append(item)
+            elif was_published:
+                unpublished.append(item.pk)
+            if operation == "update":
+                update_groups[frozenset(changed_fields)].append(item)
+            if tag_ids:
+                tag_rows.append((item, tag_ids))
+            if item.is_video and (operation == "create" or attrs.keys() & VIDEO_ID_FIELDS):
+                video_items.append(item)
+
+        ContentItem.objects.bulk_create([item for _, item in created], batch_size=BULK_WRITE_BATCH_SIZE)
+        for fields, items in update_groups.items():
+            ContentItem.objects.bulk_update(items, sorted(fields), batch_size=BULK_WRITE_BATCH_SIZE)
+        if retagged:
+            through.objects.filter(contentitem_id__in=retagged).delete()
+        through.objects.bulk_create(
+            [through(contentitem_id=item.pk, tag_id=tag_id) for item, tag_ids in tag_rows for tag_id in tag_ids],
+            batch_size=BULK_WRITE_BATCH_SIZE,
+        )
+        # Связующая таблица записана напрямую, без m2m_changed: массивы тегов пересчитываются здесь
+        sync_tag_arrays(retagged + [item.pk for item, _ in tag_rows])
+        ContentTombstone.objects.bulk_create(
+            [ContentTombstone(content_id=pk, reason=ContentTombstone.Reason.UNPUBLISHED) for pk in unpublished]
+        )
+
+        notify_content_events(PUBLISHED, [(item.pk, item.category_id, item.published_at) for item in newly_published])
+        notify_content_events(UPDATED, [(item.pk, item.category_id, item.published_at) for item in republished])
+        invalidate_feed_items([item.pk for _, item in updated])
+        if newly_published or updated:
+            schedule_feed_snapshot_rebuild()
+        schedule_related_content_update([item.pk for _, item in created + updated])
+
+        published = ContentItem.publish_many(data["publish"]) if data["publish"] else []
+        hidden = ContentItem.hide_many(data["unpublish"]) if data["unpublish"] else []
+
+    metadata_job = None
+    if video_items:
+        metadata_job = BulkJob.enqueue(
+            BulkJob.Action.REFRESH_METADATA, ids=[item.pk for item in video_items], user=user
+        )
+
+    return {
+        "created": [{"index": index, "id": item.pk, "slug": item.slug} for index, item in created],
+        "updated": [{"index": index, "id": item.pk, "slug": item.slug} for index, item in updated],
+        "published": published,
+        "unpublished": hidden,
+        "errors": sorted(errors, key=lambda error: (error["operation"], error["index"])),
+        "metadata_job": metadata_job.pk if metadata_job else None,
+    }
@@ -0,0 +1,144 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from news.models import ContentItem, ContentTombstone
+
+__all__ = [
+    "CHANGES_FIELDS",
+    "InvalidSyncToken",
+    "SyncTokenExpired",
+    "decode_sync_token",
+    "encode_sync_token",
+    "get_changes",
+    "initial_sync_token",
+]
+
+CHANGES_FIELDS = (
+    "id",
+    "title",
+    "lead",
+    "published_at",
+    "updated_at",
+    "title_picture",
+    "category_id",
+    "content_type",
+    "youtube_id",
+    "status",
+)
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+class SyncTokenExpired(Exception):
+    pass
+
+
+def _to_micros(value):
+    return int(value.timestamp() * 1_000_000)
+
+
+def _from_micros(value):
+    return datetime.fromtimestamp(value / 1_000_000, tz=dt_timezone.utc)
+
+
+def encode_sync_token(items_cursor, tombstones_cursor):
+    """Непрозрачный токен из двух курсоров ``(время, id)``: по элементам и по tombstone."""
+    payload = {
+        "i": [_to_micros(items_cursor[0]), items_cursor[1]],
+        "d": [_to_micros(tombstones_cursor[0]), tombstones_cursor[1]],
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_sync_token(token):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        items_cursor = (_from_micros(payload["i"][0]), int(payload["i"][1]))
+        tombstones_cursor = (_from_micros(payload["d"][0]), int(payload["d"][1]))
+    except (binascii.Error, ValueError, TypeError, KeyError, IndexError, OverflowError) as exc:
+        raise InvalidSyncToken(str(exc)) from exc
+    return items_cursor, tombstones_cursor
+
+
+def initial_sync_token(now=None):
+    start = (now or timezone.now()) - timedelta(seconds=settings.NEWS_CHANGES_OVERLAP_SECONDS)
+    return encode_sync_token((start, 0), (start, 0))
+
+
+def _after(cursor, time_field):
+    moment, pk = cursor
+    return Q(**{f"{time_field}__gt": moment}) | Q(**{time_field: moment, "id__gt": pk})
+
+
+def _next_cursor(cursor, rows, time_field, has_more, now):
+    """Курсор после страницы; догнав настоящее, встаёт на ``now`` минус окно перекрытия.
+
+    ``updated_at`` выставляется до коммита, поэтому более ранняя по времени транзакция может стать
+    видимой позже. Окно ``NEWS_CHANGES_OVERLAP_SECONDS`` повторно отдаёт последние изменения
+    (клиент применяет их идемпотентно), но не теряет опоздавшие. Курсор без изменений тоже
+    продвигается, поэтому токен регулярно опрашивающего клиента не устаревает.
+    """
+    if has_more:
+        last = rows[-1]
+        return getattr(last, time_field), last.id
+    horizon = now - timedelta(seconds=settings.NEWS_CHANGES_OVERLAP_SECONDS)
+    return max(cursor, (horizon, 0))
+
+
+def get_changes(token, limit=None, now=None):
+    """Изменения ленты после токена: ``(created, updated, unpublished_ids, next_token, has_more)``.
+
+    Стоимость пропорциональна числу изменений: оба курсора идут по индексам ``(updated_at, id)``
+    и ``(created_at, id)``.
+    """
+    limit = limit or settings.NEWS_CHANGES_PAGE_SIZE
+    now = now or timezone.now()
+    items_cursor, tombstones_cursor = decode_sync_token(token)
+
+    retention_start = now - timedelta(days=settings.NEWS_TOMBSTONE_RETENTION_DAYS)
+    if min(items_cursor[0], tombstones_cursor[0]) < retention_start:
+        raise SyncTokenExpired()
+
+    items = list(
+        ContentItem.objects.filter(_after(items_cursor, "updated_at"))
+        .only(*CHANGES_FIELDS)
+        .order_by("updated_at", "id")[: limit + 1]
+    )
+    tombstones = list(
+        ContentTombstone.objects.filter(_after(tombstones_cursor, "created_at")).order_by("created_at", "id")[
+            : limit + 1
+        ]
+    )
+    items_more, tombstones_more = len(items) > limit, len(tombstones) > limit
+    items, tombstones = items[:limit], tombstones[:limit]
+
+    created, updated = [], []
+    for item in items:
+        if item.status != ContentItem.Status.PUBLISHED:
+            continue
+        # Опубликованный элемент без даты публикации (старые данные, прямой UPDATE) считаем изменённым
+        (created if item.published_at and item.published_at > items_cursor[0] else updated).append(item)
+
+    unpublished = list(dict.fromkeys(tombstone.content_id for tombstone in tombstones))
+    if unpublished:
+        # Снова опубликованные после снятия элементы клиент получит как обновлённые
+        republished = set(
+            ContentItem.objects.filter(id__in=unpublished, status=ContentItem.Status.PUBLISHED).values_list(
+                "id", flat=True
+            )
+        )
+        unpublished = [pk for pk in unpublished if pk not in republished]
+
+    next_token = encode_sync_token(
+        _next_cursor(items_cursor, items, "updated_at", items_more, now),
+        _next_cursor(tombstones_cursor, tombstones, "created_at", tombstones_more, now),
+    )
+    return created, updated, unpublished, next_token, items_more or tombstones_more
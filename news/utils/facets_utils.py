@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db import connections
+
+from news.models import Category, Tag
+from news.serializers.apiv2_serializers import CONTENT_TYPE_NAMES
+
+__all__ = [
+    "get_facets",
+]
+
+# Выборка вычисляется один раз (MATERIALIZED), затем группируется по каждому измерению; теги берутся из tag_ids
+# и только самые частые
+FACETS_SQL = """
+WITH filtered AS MATERIALIZED ({items_sql})
+SELECT 'category', c.id, c.slug, c.name, COUNT(*)
+FROM filtered f JOIN {categories} c ON c.id = f.category_id
+GROUP BY c.id
+UNION ALL
+(
+    SELECT 'tag', t.id, t.slug, t.name, COUNT(*)
+    FROM filtered f CROSS JOIN unnest(f.tag_ids) AS ft(tag_id) JOIN {tags} t ON t.id = ft.tag_id
+    GROUP BY t.id
+    ORDER BY 5 DESC, 3
+    LIMIT %s
+)
+UNION ALL
+SELECT 'type', NULL, f.content_type, NULL, COUNT(*)
+FROM filtered f
+GROUP BY f.content_type
+ORDER BY 1, 5 DESC, 3
+"""
+
+
+def get_facets(queryset):
+    """Число элементов выборки по категориям, тегам (до ``NEWS_FACETS_MAX_TAGS`` самых частых) и типам.
+
+    Один запрос с группировкой, без отдельного COUNT на каждое значение. Сортировка и срез выборки
+    не учитываются: считается всё, что подходит под фильтры.
+    """
+    items_sql, params = queryset.order_by().values("category_id", "content_type", "tag_ids").query.sql_with_params()
+    sql = FACETS_SQL.format(
+        items_sql=items_sql,
+        categories=Category._meta.db_table,
+        tags=Tag._meta.db_table,
+    )
+    facets = {"categories": [], "tags": [], "types": []}
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, [*params, settings.NEWS_FACETS_MAX_TAGS])
+        for kind, pk, slug, name, count in cursor.fetchall():
+            if kind == "category":
+                facets["categories"].append({"id": pk, "slug": slug, "name": name, "count": count})
+            elif kind == "tag":
+                facets["tags"].append({"id": pk, "slug": slug, "name": name, "count": count})
+            else:
+                facets["types"].append({"type": CONTENT_TYPE_NAMES.get(slug, slug), "count": count})
+    return facets
@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from core.metrics import record_cache_lookup
+from news.models import ContentItem
+from news.serializers.apiv2_serializers import ContentItemSerializer
+from news.utils.apiv2_utils import FEED_FIELDS, get_category_children_map
+
+__all__ = [
+    "get_cached_feed_items",
+    "get_cached_category_children_map",
+    "invalidate_feed_items",
+    "invalidate_category_tree",
+]
+
+ITEM_KEY_PREFIX = "news:item:v2"
+GENERATION_KEY = "news:item:v2:generation"
+
+
+def _generation():
+    # Элемент v2 включает дерево подкатегорий, поэтому любая правка категорий меняет поколение ключей
+    return cache.get_or_set(GENERATION_KEY, 1, timeout=None)
+
+
+def _item_key(generation, item_id):
+    return f"{ITEM_KEY_PREFIX}:{generation}:{item_id}"
+
+
+def get_cached_category_children_map(generation=None):
+    """``get_category_children_map`` из кэша текущего поколения, промах читается с primary."""
+    key = f"news:categories:{generation or _generation()}"
+    children_map = cache.get(key)
+    record_cache_lookup("category_tree", children_map is not None)
+    if children_map is None:
+        children_map = get_category_children_map(using=DEFAULT_DB_ALIAS)
+        cache.set(key, children_map, settings.NEWS_ITEM_CACHE_TIMEOUT)
+    return children_map
+
+
+def get_cached_feed_items(ids):
+    """Элементы в представлении ленты v2 по списку ID с сохранением порядка.
+
+    Попадания берутся из кэша одним ``get_many``, промахи загружаются одним запросом и
+    записываются обратно. Промахи читаются с primary: после инвалидации отстающая реплика
+    ещё может отдать старую строку, и та осталась бы в кэше на ``NEWS_ITEM_CACHE_TIMEOUT``.
+    Возвращает ``(items, missing_ids)``; неопубликованные и несуществующие ID попадают в
+    ``missing_ids``.
+    """
+    ids = list(dict.fromkeys(ids))
+    generation = _generation()
+    keys = {item_id: _item_key(generation, item_id) for item_id in ids}
+    cached = cache.get_many(keys.values())
+    found = {item_id: cached[key] for item_id, key in keys.items() if key in cached}
+    for item_id in ids:
+        record_cache_lookup("content_item", item_id in found)
+
+    misses = [item_id for item_id in ids if item_id not in found]
+    if misses:
+        items = (
+            ContentItem.objects.using(DEFAULT_DB_ALIAS)
+            .filter(id__in=misses, status=ContentItem.Status.PUBLISHED)
+            .only(*FEED_FIELDS)
+            .select_related("category")
+        )
+        context = {"category_children": get_cached_category_children_map(generation)}
+        loaded = {item["id"]: item for item in ContentItemSerializer(items, many=True, context=context).data}
+        cache.set_many({keys[item_id]: data for item_id, data in loaded.items()}, settings.NEWS_ITEM_CACHE_TIMEOUT)
+        found.update(loaded)
+
+    return [found[item_id] for item_id in ids if item_id in found], [item_id for item_id in ids if item_id not in found]
+
+
+def _delete_items(ids):
+    generation = cache.get(GENERATION_KEY)
+    if generation is not None:
+        cache.delete_many([_item_key(generation, item_id) for item_id in ids])
+
+
+def _next_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+
+
+def invalidate_feed_items(ids, using=DEFAULT_DB_ALIAS):
+    """Удаляет элементы из кэша после коммита текущей транзакции (вне транзакции — сразу).
+
+    Удаление до коммита не помогает: параллельное чтение успело бы снова закэшировать старую строку.
+    """
+    ids = list(ids)
+    if ids:
+        transaction.on_commit(lambda: _delete_items(ids), using=using)
+
+
+def invalidate_category_tree(using=DEFAULT_DB_ALIAS):
+    """Меняет поколение ключей кэша после коммита текущей транзакции, как ``invalidate_feed_items``."""
+    transaction.on_commit(_next_generation, using=using)
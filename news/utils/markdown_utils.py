@@ -0,0 +1,41 @@
+import markdown
+from django.core.cache import cache
+
+from core.instrumentation import timed
+from core.metrics import record_cache_lookup
+
+__all__ = ["render_markdown", "render_content_html", "arender_content_html"]
+
+CONTENT_HTML_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def render_markdown(text):
+    with timed("markdown"):
+        return markdown.markdown(text or "")
+
+
+def content_html_cache_key(item):
+    # updated_at в ключе: правка контента сама делает старую запись неактуальной
+    return f"news:html:{item.pk}:{item.updated_at.timestamp():.6f}"
+
+
+def render_content_html(item):
+    """HTML тела контента с кэшированием по (id, updated_at)."""
+    key = content_html_cache_key(item)
+    html = cache.get(key)
+    record_cache_lookup("content_html", html is not None)
+    if html is None:
+        html = render_markdown(item.body)
+        cache.set(key, html, CONTENT_HTML_CACHE_TIMEOUT)
+    return html
+
+
+async def arender_content_html(item):
+    """Асинхронный вариант ``render_content_html``."""
+    key = content_html_cache_key(item)
+    html = await cache.aget(key)
+    record_cache_lookup("content_html", html is not None)
+    if html is None:
+        html = render_markdown(item.body)
+        await cache.aset(key, html, CONTENT_HTML_CACHE_TIMEOUT)
+    return html
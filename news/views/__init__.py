@@ -1,2 +1,3 @@
 from .views import *
 from .apiv2_views import *
+from .apiv2_async_views import *
@@ -0,0 +1,154 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.translation import gettext_lazy as _
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods
+from rest_framework import status
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from news.events import broker
+from news.models import ContentItem
+from news.serializers.apiv2_serializers import (
+    CategorySerializer,
+    NewsFeedQueryParamsSerializer,
+    NewsFeedExcludedRequestSerializer,
+    serialize_feed_items,
+)
+from news.utils import (
+    aget_category_children_map,
+    arender_content_html,
+    filter_feed_queryset,
+    get_facets,
+    published_feed_queryset,
+)
+from news.views.apiv2_views import NOT_FOUND_ERROR
+
+__all__ = [
+    "async_news_feed",
+    "async_news_categories",
+    "async_news_detail_html",
+    "news_events",
+]
+
+FEED_CHUNK_SIZE = 2000
+
+ASGI_REQUIRED_ERROR = {
+    "errors": [{"code": "asgi_required", "title": "Not Implemented", "details": "Event stream requires ASGI server"}]
+}
+
+
+def render_response(request, data, status=status.HTTP_200_OK):
+    """Ответ в формате, согласованном по ``Accept``/``?format=`` с рендерерами DRF, как у ``Response``.
+
+    Browsable API не поддерживается: вместо 406 отдаётся формат по умолчанию.
+    """
+    renderers = [renderer() for renderer in api_settings.DEFAULT_RENDERER_CLASSES if renderer.format != "api"]
+    try:
+        renderer, media_type = DefaultContentNegotiation().select_renderer(Request(request), renderers)
+    except NotAcceptable:
+        renderer, media_type = renderers[0], renderers[0].media_type
+    content_type = f"{media_type}; charset={renderer.charset}" if renderer.charset else media_type
+    return HttpResponse(renderer.render(data, media_type), status=status, content_type=content_type)
+
+
+async def serialize_feed(qs, children_map, include):
+    items = [item async for item in qs.aiterator(chunk_size=FEED_CHUNK_SIZE)]
+    return serialize_feed_items(items, children_map, include)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+async def async_news_feed(request):
+    """Асинхронная версия ``NewsFeedAPIView``: GET — постраничная лента, POST — лента без ``excluded``."""
+    if request.method == "POST":
+        return await async_news_feed_excluded(request)
+
+    params_serializer = NewsFeedQueryParamsSerializer(data=request.GET)
+    if not params_serializer.is_valid():
+        return render_response(request, params_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    params = params_serializer.validated_data
+
+    page_size = params["pageSize"]
+    page_number = params["pageNumber"]
+    all_news = params["allNews"]
+    include = params["include"]
+    sort = params["sort"]
+
+    qs = published_feed_queryset(include, sort)
+    children_map = await aget_category_children_map()
+
+    if not all_news:
+        qs = filter_feed_queryset(qs, params, children_map)
+    meta = {"totalCount": await qs.acount()}
+    if params["facets"]:
+        # Асинхронного курсора в Django нет
+        meta["facets"] = await sync_to_async(get_facets)(qs)
+
+    if not all_news:
+        offset = (page_number - 1) * page_size
+        qs = qs[offset : offset + page_size]
+
+    payload = await serialize_feed(qs, children_map, include)
+    return render_response(request, {**payload, "meta": meta})
+
+
+async def async_news_feed_excluded(request):
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError as exc:
+        return render_response(request, {"detail": f"JSON parse error - {exc}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    input_serializer = NewsFeedExcludedRequestSerializer(data=payload)
+    if not input_serializer.is_valid():
+        return render_response(request, input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    excluded_ids = input_serializer.validated_data.get("excluded", [])
+    include = input_serializer.validated_data["include"]
+
+    qs = published_feed_queryset(include).exclude(id__in=excluded_ids)
+    payload = await serialize_feed(qs, await aget_category_children_map(), include)
+    return render_response(request, {**payload, "meta": {"totalCount": len(payload["data"])}})
+
+
+@require_GET
+async def async_news_categories(request):
+    """Асинхронная версия ``NewsCategoriesAPIView``."""
+    children_map = await aget_category_children_map()
+    serializer = CategorySerializer(children_map[None], many=True, context={"category_children": children_map})
+    return render_response(request, {"data": serializer.data})
+
+
+@require_GET
+async def async_news_detail_html(request, newsItemId):
+    """Асинхронная версия ``news_detail_html``."""
+    try:
+        content_item = await ContentItem.objects.aget(id=newsItemId, status=ContentItem.Status.PUBLISHED)
+    except ContentItem.DoesNotExist:
+        return render_response(request, NOT_FOUND_ERROR, status=status.HTTP_404_NOT_FOUND)
+
+    html_content = (
+        await arender_content_html(content_item) if content_item.body else "<p>" + _("Контент отсутствует") + "</p>"
+    )
+    return HttpResponse(html_content, content_type="text/html; charset=utf-8")
+
+
+@require_GET
+async def news_events(request):
+    """SSE-поток событий ``published``/``updated``; поддерживает возобновление по ``Last-Event-ID``.
+
+    Работает только под ASGI, под WSGI отвечает 501: бесконечный поток через async_to_sync навсегда занял бы
+    поток воркера, буферизовал бы вывод, а LISTEN был бы привязан к временному циклу событий.
+    """
+    if not isinstance(request, ASGIRequest):
+        return render_response(request, ASGI_REQUIRED_ERROR, status=status.HTTP_501_NOT_IMPLEMENTED)
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("lastEventId")
+    subscriber = broker.subscribe(last_event_id)
+    response = StreamingHttpResponse(broker.stream(subscriber), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
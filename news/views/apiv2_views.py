@@ -1,22 +1,42 @@
-import markdown
-
+from django.conf import settings
 from django.http import HttpResponse, HttpResponseNotFound
 from django.utils.translation import gettext_lazy as _
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view
-from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample
+from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 
 from news.models import Category, ContentItem
+from news.related import get_related_ids
+from news.similar import get_similar_ids
+from news.snapshots import get_categories_snapshot, get_feed_snapshot
 from news.serializers.apiv2_serializers import (
     CategorySerializer,
+    CompactContentItemSerializer,
     ContentItemSerializer,
+    NewsChangesQueryParamsSerializer,
+    NewsItemsRequestSerializer,
     NewsFeedQueryParamsSerializer,
     NewsFeedExcludedRequestSerializer,
+    serialize_feed_items,
+)
+from news.utils import (
+    InvalidSyncToken,
+    SyncTokenExpired,
+    get_cached_feed_items,
+    filter_feed_queryset,
+    get_category_children_map,
+    get_changes,
+    get_facets,
+    initial_sync_token,
+    published_feed_queryset,
+    render_content_html,
 )
-from news.utils import get_category_and_descendants_ids
+
+# Json в соответствии со спецификацией
+NOT_FOUND_ERROR = {"errors": [{"code": "not_found", "title": "Not Found", "details": "Content not found"}]}
 
 
 class NewsFeedAPIView(APIView):
@@ -25,7 +45,11 @@ class NewsFeedAPIView(APIView):
     @extend_schema(
         parameters=[NewsFeedQueryParamsSerializer],
         responses={200: ContentItemSerializer(many=True)},
-        description="Получить ленту новостей и видео.",
+        description=(
+            "Получить ленту новостей и видео. Фильтры categoryIds, tagIds, authorIds и contentType принимают "
+            "несколько значений через запятую, с tagMatch=all остаются элементы со всеми tagIds; с facets=true meta.facets содержит число элементов по категориям, "
+            "тегам и типам для текущих фильтров."
+        ),
         summary="Лента новостей",
         tags=["Новости"],
     )
@@ -38,29 +62,30 @@ class NewsFeedAPIView(APIView):
         page_number = params["pageNumber"]
         category_id = params.get("categoryId")
         all_news = params["allNews"]
+        include = params["include"]
+        sort = params["sort"]
+        # Снимки есть только для ленты без фильтров или с одной categoryId
+        plain = not any(params[name] for name in ("categoryIds", "tagIds", "authorIds", "contentType", "facets"))
 
-        qs = (
-            ContentItem.objects.filter(status=ContentItem.Status.PUBLISHED)
-            .only("id", "title", "lead", "published_at", "created_at", "title_picture", "category_id", "content_type")
-            .select_related("category")
-            .order_by("-published_at", "-updated_at")
-        )
+        if not all_news and not include and sort == "latest" and plain and request.accepted_renderer.format == "json":
+            snapshot = get_feed_snapshot(category_id, page_number, page_size)
+            if snapshot is not None:
+                return HttpResponse(snapshot, content_type="application/json")
 
-        total_count = qs.count()
+        qs = published_feed_queryset(include, sort)
+        children_map = get_category_children_map()
 
-        if not all_news and category_id is not None:
-            category_ids = get_category_and_descendants_ids(category_id)
-            if category_ids:
-                qs = qs.filter(category_id__in=category_ids)
-            else:
-                qs = qs.none()
+        if not all_news:
+            qs = filter_feed_queryset(qs, params, children_map)
+        meta = {"totalCount": qs.count()}
+        if params["facets"]:
+            meta["facets"] = get_facets(qs)
 
         if not all_news:
             offset = (page_number - 1) * page_size
             qs = qs[offset : offset + page_size]
 
-        serializer = ContentItemSerializer(qs, many=True)
-        return Response({"data": serializer.data, "meta": {"totalCount": total_count}})
+        return Response({**serialize_feed_items(qs, children_map, include), "meta": meta})
 
     @extend_schema(
         request=NewsFeedExcludedRequestSerializer,
@@ -73,26 +98,133 @@ class NewsFeedAPIView(APIView):
         input_serializer = NewsFeedExcludedRequestSerializer(data=request.data)
         input_serializer.is_valid(raise_exception=True)
         excluded_ids = input_serializer.validated_data.get("excluded", [])
+        include = input_serializer.validated_data["include"]
+
+        qs = published_feed_queryset(include).exclude(id__in=excluded_ids)
+        payload = serialize_feed_items(qs, get_category_children_map(), include)
+        return Response({**payload, "meta": {"totalCount": qs.count()}})
+
+
+class NewsItemsAPIView(APIView):
+    serializer_class = ContentItemSerializer
+
+    @extend_schema(
+        parameters=[OpenApiParameter("ids", OpenApiTypes.STR, description="ID через запятую, например 1,2,3")],
+        responses={200: ContentItemSerializer(many=True)},
+        description=(
+            "Получить несколько элементов по ID в представлении ленты, в порядке запроса. "
+            "Неопубликованные и несуществующие ID возвращаются в meta.missing."
+        ),
+        summary="Элементы по списку ID",
+        tags=["Новости"],
+    )
+    def get(self, request):
+        ids = [value.strip() for value in request.GET.get("ids", "").split(",") if value.strip()]
+        return self.respond(NewsItemsRequestSerializer(data={"ids": ids}))
+
+    @extend_schema(
+        request=NewsItemsRequestSerializer,
+        responses={200: ContentItemSerializer(many=True)},
+        description="То же, что GET, для длинных списков ID.",
+        summary="Элементы по списку ID (POST)",
+        tags=["Новости"],
+    )
+    def post(self, request):
+        return self.respond(NewsItemsRequestSerializer(data=request.data))
+
+    @staticmethod
+    def respond(input_serializer):
+        input_serializer.is_valid(raise_exception=True)
+        items, missing = get_cached_feed_items(input_serializer.validated_data["ids"])
+        return Response({"data": items, "meta": {"missing": missing}})
+
+
+class NewsRelatedAPIView(APIView):
+    serializer_class = ContentItemSerializer
+
+    @extend_schema(
+        responses={200: ContentItemSerializer(many=True), 404: OpenApiTypes.OBJECT},
+        description=(
+            "Похожие элементы в представлении ленты, от более похожих к менее: по общим тегам, близости "
+            "категорий в дереве и свежести. Берутся из предрассчитанного индекса."
+        ),
+        summary="Похожие новости",
+        tags=["Новости"],
+    )
+    def get(self, request, newsItemId):
+        if not ContentItem.objects.filter(id=newsItemId, status=ContentItem.Status.PUBLISHED).exists():
+            return Response(NOT_FOUND_ERROR, status=status.HTTP_404_NOT_FOUND)
+        items, _ = get_cached_feed_items(get_related_ids(newsItemId))
+        return Response({"data": items})
 
-        qs = (
-            ContentItem.objects.filter(status=ContentItem.Status.PUBLISHED)
-            .exclude(id__in=excluded_ids)
-            .only(
-                "id",
-                "title",
-                "lead",
-                "published_at",
-                "created_at",
-                "title_picture",
-                "category_id",
+
+class NewsSimilarAPIView(APIView):
+    serializer_class = ContentItemSerializer
+
+    @extend_schema(
+        responses={200: ContentItemSerializer(many=True), 404: OpenApiTypes.OBJECT},
+        description=(
+            "Похожие по тексту элементы в представлении ленты (косинусное сходство векторов TF-IDF заголовка, "
+            "лида и текста), от более похожих к менее. Пустой список, пока индекс не построен."
+        ),
+        summary="Похожие по тексту",
+        tags=["Новости"],
+    )
+    def get(self, request, newsItemId):
+        if not ContentItem.objects.filter(id=newsItemId, status=ContentItem.Status.PUBLISHED).exists():
+            return Response(NOT_FOUND_ERROR, status=status.HTTP_404_NOT_FOUND)
+        limit = settings.NEWS_SIMILAR_LIMIT
+        # Индекс может отставать от снятий с публикации — берём с запасом, лишние отсеет кэш ленты
+        items, _ = get_cached_feed_items(get_similar_ids(newsItemId, limit * 2))
+        return Response({"data": items[:limit]})
+
+
+class NewsChangesAPIView(APIView):
+    serializer_class = CompactContentItemSerializer
+
+    @extend_schema(
+        parameters=[NewsChangesQueryParamsSerializer],
+        responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT, 410: OpenApiTypes.OBJECT},
+        description=(
+            "Изменения ленты с момента, зафиксированного токеном: новые, изменённые и снятые с публикации "
+            "элементы. Пока meta.hasMore — запрашивать следующую страницу с meta.next. Ответ 410 означает, "
+            "что токен старше срока хранения удалений и ленту нужно загрузить заново."
+        ),
+        summary="Изменения ленты",
+        tags=["Новости"],
+    )
+    def get(self, request):
+        params_serializer = NewsChangesQueryParamsSerializer(data=request.GET)
+        params_serializer.is_valid(raise_exception=True)
+        since = params_serializer.validated_data.get("since")
+
+        if since is None:
+            empty = {"created": [], "updated": [], "unpublished": []}
+            return Response({"data": empty, "meta": {"next": initial_sync_token(), "hasMore": False}})
+
+        try:
+            created, updated, unpublished, next_token, has_more = get_changes(since)
+        except InvalidSyncToken:
+            return Response(
+                {"errors": [{"code": "invalid_token", "title": "Bad Request", "details": "Invalid sync token"}]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except SyncTokenExpired:
+            return Response(
+                {"errors": [{"code": "sync_expired", "title": "Gone", "details": "Sync token expired, reload feed"}]},
+                status=status.HTTP_410_GONE,
             )
-            .select_related("category")
-            .prefetch_related("category__category_set")
-            .order_by("-published_at", "-updated_at")
-        )
 
-        serializer = ContentItemSerializer(qs, many=True)
-        return Response({"data": serializer.data, "meta": {"totalCount": qs.count()}})
+        return Response(
+            {
+                "data": {
+                    "created": CompactContentItemSerializer(created, many=True).data,
+                    "updated": CompactContentItemSerializer(updated, many=True).data,
+                    "unpublished": unpublished,
+                },
+                "meta": {"next": next_token, "hasMore": has_more},
+            }
+        )
 
 
 class NewsCategoriesAPIView(APIView):
@@ -106,10 +238,13 @@ class NewsCategoriesAPIView(APIView):
         tags=["Новости"],
     )
     def get(self, request):
-        categories = Category.objects.filter(parent__isnull=True).prefetch_related(
-            "category_set", "category_set__category_set", "category_set__category_set__category_set"
-        )
-        serializer = CategorySerializer(categories, many=True)
+        if request.accepted_renderer.format == "json":
+            snapshot = get_categories_snapshot()
+            if snapshot is not None:
+                return HttpResponse(snapshot, content_type="application/json")
+
+        children_map = get_category_children_map()
+        serializer = CategorySerializer(children_map[None], many=True, context={"category_children": children_map})
         return Response({"data": serializer.data})
 
 
@@ -143,15 +278,12 @@ def news_detail_html(request, newsItemId):
     try:
         content_item = ContentItem.objects.get(id=newsItemId, status=ContentItem.Status.PUBLISHED)
     except ContentItem.DoesNotExist:
-        # Json в соответствии со спецификацией
         return Response(
-            {"errors": [{"code": "not_found", "title": "Not Found", "details": "Content not found"}]},
+            NOT_FOUND_ERROR,
             status=status.HTTP_404_NOT_FOUND,
             content_type="application/json",
         )
 
-    html_content = (
-        markdown.markdown(content_item.body or "") if content_item.body else "<p>" + _("Контент отсутствует") + "</p>"
-    )
+    html_content = render_content_html(content_item) if content_item.body else "<p>" + _("Контент отсутствует") + "</p>"
 
     return HttpResponse(html_content, content_type="text/html; charset=utf-8")
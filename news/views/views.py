@@ -1,15 +1,28 @@
 import hashlib
 
 from django.core.cache import cache
-from django.db.models import F
 from django.utils.translation import gettext_lazy as _
 
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import viewsets, permissions, filters
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 
+from core.metrics import record_cache_lookup
 from news.models import Category, Tag, ContentItem
-from news.serializers.serializers import CategorySerializer, TagSerializer, ContentItemSerializer
+from news.serializers.serializers import (
+    CategorySerializer,
+    TagSerializer,
+    ContentItemSerializer,
+    ContentItemBulkRequestSerializer,
+    ContentAnalyticsQueryParamsSerializer,
+)
+from news.analytics import get_views_series
+from news.trending import pending_views, record_view
+from news.utils import get_facets
+from news.utils.bulk_write_utils import bulk_write_content_items
 
 __all__ = [
     "CategoryViewSet",
@@ -17,6 +30,14 @@ __all__ = [
     "ContentItemViewSet",
 ]
 
+CONTENT_TYPE_ALIASES = {
+    "video": ContentItem.ContentType.VIDEO,
+    "v": ContentItem.ContentType.VIDEO,
+    "article": ContentItem.ContentType.ARTICLE,
+    "post": ContentItem.ContentType.ARTICLE,
+    "a": ContentItem.ContentType.ARTICLE,
+}
+
 
 class BaseViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -47,21 +68,61 @@ class ContentItemViewSet(viewsets.ModelViewSet):
     serializer_class = ContentItemSerializer
 
     def get_queryset(self):
-        qs = ContentItem.objects.select_related("category", "author").prefetch_related("tags")
-        t = self.request.query_params.get("type") or self.request.query_params.get("content_type")
-        if t:
-            if t.lower() in ("video", "v"):
-                qs = qs.filter(content_type=ContentItem.ContentType.VIDEO)
-            elif t.lower() in ("article", "post", "a"):
-                qs = qs.filter(content_type=ContentItem.ContentType.ARTICLE)
+        # Теги сериализуются по tag_ids (ContentItemListSerializer), prefetch_related("tags") не нужен
+        qs = ContentItem.objects.select_related("category", "author")
+        # category, tag, author и type принимают несколько значений через запятую: «или» внутри параметра
+        types = {
+            content_type
+            for t in self.query_param_list("type") or self.query_param_list("content_type")
+            if (content_type := CONTENT_TYPE_ALIASES.get(t.lower()))
+        }
+        if types:
+            qs = qs.filter(content_type__in=types)
         status = self.request.query_params.get("status")
         if status:
             qs = qs.filter(status=status)
-        cat = self.request.query_params.get("category")
-        if cat:
-            qs = qs.filter(category__slug=cat)
+        categories = self.query_param_list("category")
+        if categories:
+            qs = qs.filter(category__slug__in=categories)
+        tags = self.query_param_list("tag")
+        if tags:
+            all_tags = self.request.query_params.get("tag_match") == "all"
+            qs = qs.filter(**{"tag_slugs__contains" if all_tags else "tag_slugs__overlap": tags})
+        authors = self.query_param_list("author")
+        if authors:
+            qs = qs.filter(author__username__in=authors)
         return qs
 
+    def query_param_list(self, name):
+        return [
+            value.strip()
+            for param in self.request.query_params.getlist(name)
+            for value in param.split(",")
+            if value.strip()
+        ]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("category", OpenApiTypes.STR, description="Slug категорий через запятую"),
+            OpenApiParameter("tag", OpenApiTypes.STR, description="Slug тегов через запятую"),
+            OpenApiParameter(
+                "tag_match", OpenApiTypes.STR, enum=["any", "all"], description="all — только элементы со всеми tag"
+            ),
+            OpenApiParameter("author", OpenApiTypes.STR, description="Имена пользователей авторов через запятую"),
+            OpenApiParameter("type", OpenApiTypes.STR, description="Типы через запятую: video, article"),
+            OpenApiParameter(
+                "facets",
+                OpenApiTypes.BOOL,
+                description="Добавить facets: число элементов по категориям, тегам и типам для текущих фильтров",
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get("facets", "").lower() in ("1", "true"):
+            response.data["facets"] = get_facets(self.filter_queryset(self.get_queryset()))
+        return response
+
     def perform_create(self, serializer):
         ct = serializer.validated_data.get("content_type")
         if not ct:
@@ -79,16 +140,56 @@ class ContentItemViewSet(viewsets.ModelViewSet):
         if instance and instance.is_video:
             instance.fetch_metadata()
 
+    @extend_schema(
+        request=ContentItemBulkRequestSerializer,
+        responses={200: OpenApiTypes.OBJECT},
+        description=(
+            "Пакетная запись: create — новые элементы, update — изменения (с id), publish/unpublish — ID для смены "
+            "статуса. Невалидные элементы пропускаются и возвращаются в errors с индексом, остальные записываются. "
+            "Метаданные видео загружаются фоновой задачей metadata_job."
+        ),
+    )
+    @action(detail=False, methods=["post"], permission_classes=[permissions.IsAuthenticated])
+    def bulk(self, request):
+        serializer = ContentItemBulkRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(bulk_write_content_items(serializer.validated_data, request.user))
+
     @action(detail=True, methods=["post"], permission_classes=[])
     def hit(self, request, slug=None):
         item = self.get_object()
         user_ip = request.META.get("REMOTE_ADDR", "") or ""
         cache_key = f"content_view_{item.pk}_{hashlib.md5(user_ip.encode()).hexdigest()}"
-        if not cache.get(cache_key):
-            ContentItem.objects.filter(pk=item.pk).update(views=F("views") + 1)
-            item.refresh_from_db(fields=["views"])
+        seen = cache.get(cache_key)
+        record_cache_lookup("view_dedup", seen is not None)
+        if not seen:
+            record_view(item.pk)
             cache.set(cache_key, True, 86400)
-        return Response({"views": item.views})
+        # Просмотры этого процесса, ещё не записанные в БД, тоже учитываются
+        return Response({"views": item.views + pending_views(item.pk)})
+
+    @extend_schema(
+        parameters=[ContentAnalyticsQueryParamsSerializer],
+        responses={200: OpenApiTypes.OBJECT},
+        description=(
+            "Просмотры элемента по дням или часам за последние days суток (по умолчанию 30), без пропусков. "
+            "Строится из агрегатов команды rollup_views, поэтому отстаёт от views на интервал её запуска."
+        ),
+    )
+    @action(detail=True, methods=["get"], permission_classes=[permissions.IsAuthenticated])
+    def analytics(self, request, slug=None):
+        params_serializer = ContentAnalyticsQueryParamsSerializer(data=request.query_params)
+        params_serializer.is_valid(raise_exception=True)
+        params = params_serializer.validated_data
+        # Без связей и тегов get_queryset: графику нужен только ID
+        item = get_object_or_404(ContentItem.objects.only("id", "views"), slug=slug)
+        return Response(
+            {
+                "interval": params["interval"],
+                "views": item.views,
+                "data": get_views_series(item.id, params["interval"], params["days"]),
+            }
+        )
 
     @action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
     def refresh_metadata(self, request, slug=None):
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from news.analytics import (
+    EVENTS_TABLE,
+    drop_expired_view_partitions,
+    ensure_view_event_partitions,
+    get_views_series,
+    rollup_view_events,
+)
+from news.models import ContentItem, ContentViewsDaily, ContentViewsHourly, ViewRollupState
+from news.trending import flush_views, record_view
+
+User = get_user_model()
+
+
+@override_settings(NEWS_VIEWS_FLUSH_SECONDS=3600, TIME_ZONE="UTC")
+class ViewAnalyticsTest(APITestCase):
+    """Тесты событий просмотров, почасовых и суточных агрегатов и /apiv3/contents/<slug>/analytics/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testpass")
+        cls.item = ContentItem.objects.create(
+            title="Item", slug="item", author=cls.user, status=ContentItem.Status.PUBLISHED
+        )
+        cls.other = ContentItem.objects.create(title="Other", slug="other", author=cls.user)
+
+    def setUp(self):
+        self.addCleanup(flush_views)
+        self.now = timezone.now().replace(minute=30, second=0, microsecond=0)
+
+    def view(self, item, viewed_at, count=1):
+        with mock.patch("news.trending.timezone.now", return_value=viewed_at):
+            for _ in range(count):
+                record_view(item.id)
+        flush_views()
+
+    def insert_events(self, rows):
+        """События ``(item, viewed_at, recorded_at)`` с явным временем записи."""
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {EVENTS_TABLE} (item_id, viewed_at, recorded_at) VALUES (%s, %s, %s)",
+                [(item.id, viewed_at, recorded_at) for item, viewed_at, recorded_at in rows],
+            )
+
+    def rollup(self, at):
+        with mock.patch("news.analytics.timezone.now", return_value=at):
+            return rollup_view_events()
+
+    def partitions(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = %s::regclass ORDER BY 1",
+                [EVENTS_TABLE],
+            )
+            return [name for (name,) in cursor.fetchall()]
+
+    def test_flush_writes_events_into_daily_partitions(self):
+        """Тест что сброс буфера пишет события в секции по суткам, создавая недостающие"""
+        yesterday = self.now - timedelta(days=1)
+        self.view(self.item, yesterday, count=2)
+        self.view(self.item, self.now)
+
+        self.assertEqual(
+            self.partitions(), [f"{EVENTS_TABLE}_p{yesterday:%Y%m%d}", f"{EVENTS_TABLE}_p{self.now:%Y%m%d}"]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {EVENTS_TABLE}_p{yesterday:%Y%m%d}")
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_rollup_is_incremental(self):
+        """Тест что повторная агрегация добавляет только новые события, в том числе поздние"""
+        hour = self.now.replace(minute=0)
+        ensure_view_event_partitions()
+        self.insert_events(
+            [
+                (self.item, self.now, self.now),
+                (self.item, self.now + timedelta(minutes=10), self.now),
+                (self.item, self.now - timedelta(hours=1), self.now),
+                (self.other, self.now, self.now),
+            ]
+        )
+        rolled_up_to = self.rollup(self.now + timedelta(minutes=5))
+        self.assertEqual(rolled_up_to, self.now + timedelta(minutes=4))
+
+        # Просмотр прошлого часа, записанный после агрегации
+        self.insert_events([(self.item, self.now - timedelta(hours=1), self.now + timedelta(minutes=10))])
+        self.rollup(self.now + timedelta(minutes=20))
+
+        hourly = dict(ContentViewsHourly.objects.filter(item=self.item).values_list("hour", "views"))
+        self.assertEqual(hourly, {hour: 2, hour - timedelta(hours=1): 2})
+        daily = dict(ContentViewsDaily.objects.filter(item=self.item).values_list("day", "views"))
+        self.assertEqual(sum(daily.values()), 4)
+        self.assertEqual(ContentViewsHourly.objects.get(item=self.other).views, 1)
+
+    def test_drop_expired_partitions(self):
+        """Тест удаления секций старше срока хранения целиком, без DELETE"""
+        old = self.now - timedelta(days=10)
+        self.view(self.item, old)
+        self.view(self.item, self.now)
+        self.assertEqual(drop_expired_view_partitions(), [])
+
+        ViewRollupState.objects.create(id=1, rolled_up_to=self.now)
+        with override_settings(NEWS_VIEW_EVENTS_RETENTION_DAYS=7):
+            self.assertEqual(drop_expired_view_partitions(), [f"{EVENTS_TABLE}_p{old:%Y%m%d}"])
+        self.assertEqual(self.partitions(), [f"{EVENTS_TABLE}_p{self.now:%Y%m%d}"])
+
+    def test_views_series(self):
+        """Тест ряда по дням и часам: без пропусков, последний период — текущий"""
+        today = self.now.date()
+        ContentViewsDaily.objects.create(item=self.item, day=today, views=5)
+        ContentViewsDaily.objects.create(item=self.item, day=today - timedelta(days=2), views=3)
+        ContentViewsDaily.objects.create(item=self.item, day=today - timedelta(days=40), views=7)
+
+        with self.assertNumQueries(1):
+            series = get_views_series(self.item.id, "day", 30)
+        self.assertEqual(len(series), 30)
+        self.assertEqual(series[-1], {"period": today.isoformat(), "views": 5})
+        self.assertEqual(series[-3]["views"], 3)
+        self.assertEqual(sum(point["views"] for point in series), 8)
+
+        hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+        ContentViewsHourly.objects.create(item=self.item, hour=hour, views=4)
+        series = get_views_series(self.item.id, "hour", 2)
+        self.assertEqual(len(series), 48)
+        self.assertEqual(series[-1], {"period": hour.isoformat(), "views": 4})
+
+    def test_endpoint(self):
+        """Тест /apiv3/contents/<slug>/analytics/: авторизация, параметры, ответ"""
+        url = reverse("content-analytics", args=[self.item.slug])
+        self.assertIn(self.client.get(url).status_code, (401, 403))
+
+        self.client.force_authenticate(self.user)
+        ContentViewsHourly.objects.create(item=self.item, hour=datetime.now(dt_timezone.utc), views=1)
+        response = self.client.get(url, {"days": 7})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["interval"], "day")
+        self.assertEqual(len(response.json()["data"]), 7)
+
+        self.assertEqual(self.client.get(url, {"days": 1000}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"interval": "week"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("content-analytics", args=["missing"])).status_code, 404)
@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.replicas import _lag_cache
+from news.models import Category, ContentItem
+
+User = get_user_model()
+
+ASYNC_URLCONF = "news.urls.apiv2_async_urls"
+
+
+class AsyncApiV2ViewsTest(TestCase):
+    """Тесты совпадения ответов асинхронных представлений API v2 с синхронными"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testpass")
+        cls.root = Category.objects.create(name="Root", slug="root")
+        cls.child = Category.objects.create(name="Child", slug="child", parent=cls.root)
+        cls.other = Category.objects.create(name="Other", slug="other")
+        now = timezone.now()
+        cls.items = [
+            ContentItem.objects.create(
+                title=f"Item {i}",
+                lead="Lead",
+                body="# Header\n\nText" if i % 2 else "",
+                slug=f"item-{i}",
+                author=cls.user,
+                category=[cls.root, cls.child, cls.other][i % 3],
+                status=ContentItem.Status.PUBLISHED,
+                content_type=ContentItem.ContentType.VIDEO if i % 2 else ContentItem.ContentType.ARTICLE,
+                youtube_id="dQw4w9WgXcQ" if i % 2 else "",
+                published_at=now - timedelta(minutes=i),
+            )
+            for i in range(7)
+        ]
+        cls.draft = ContentItem.objects.create(title="Draft", slug="draft", author=cls.user, category=cls.root)
+
+    async def assertSameResponse(self, method, url, data=None, **extra):
+        sync_response = await getattr(self.async_client, method)(url, data, **extra)
+        with override_settings(ROOT_URLCONF=ASYNC_URLCONF):
+            async_response = await getattr(self.async_client, method)(url, data, **extra)
+
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response["Content-Type"], sync_response["Content-Type"])
+        self.assertEqual(async_response.content, sync_response.content)
+        return async_response
+
+    async def test_feed_pages(self):
+        """Тест совпадения страниц ленты"""
+        for params in (
+            {},
+            {"pageSize": 2, "pageNumber": 2},
+            {"allNews": True},
+            {"pageNumber": 100},
+            {"include": "categories"},
+        ):
+            with self.subTest(params=params):
+                await self.assertSameResponse("get", reverse("news-feed"), params)
+
+    async def test_feed_category_filter(self):
+        """Тест совпадения ленты с фильтром по дереву категорий"""
+        await self.assertSameResponse("get", reverse("news-feed"), {"categoryId": self.root.id})
+        await self.assertSameResponse("get", reverse("news-feed"), {"categoryId": 999999})
+
+    async def test_feed_multi_value_filters_and_facets(self):
+        """Тест совпадения ленты с несколькими значениями фильтров и фасетами"""
+        params = {"categoryIds": f"{self.child.id},{self.other.id}", "contentType": "video", "facets": True}
+        response = await self.assertSameResponse("get", reverse("news-feed"), params)
+        self.assertIn("facets", response.json()["meta"])
+
+    async def test_feed_invalid_params(self):
+        """Тест совпадения ошибок валидации"""
+        response = await self.assertSameResponse("get", reverse("news-feed"), {"pageSize": 0})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_feed_post_excluded(self):
+        """Тест совпадения ленты с исключениями"""
+        excluded = [self.items[0].id, self.items[3].id]
+        response = await self.assertSameResponse(
+            "post", reverse("news-feed"), {"excluded": excluded}, content_type="application/json"
+        )
+        self.assertEqual(response.json()["meta"]["totalCount"], len(self.items) - 2)
+
+    async def test_feed_post_invalid(self):
+        """Тест совпадения ошибки валидации списка исключений"""
+        await self.assertSameResponse(
+            "post", reverse("news-feed"), {"excluded": ["x"]}, content_type="application/json"
+        )
+
+    async def test_categories(self):
+        """Тест совпадения дерева категорий"""
+        await self.assertSameResponse("get", reverse("news-categories"))
+
+    async def test_detail_html(self):
+        """Тест совпадения HTML-представления, в том числе из кэша"""
+        for item in self.items[:2]:
+            with self.subTest(item=item.slug):
+                await self.assertSameResponse("get", reverse("news-detail", args=[item.id]))
+                await self.assertSameResponse("get", reverse("news-detail", args=[item.id]))
+
+    async def test_detail_not_found(self):
+        """Тест совпадения ответа 404 для черновика"""
+        response = await self.assertSameResponse("get", reverse("news-detail", args=[self.draft.id]))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(ROOT_URLCONF=ASYNC_URLCONF, PERF_INSTRUMENTATION_ENABLED=True)
+    async def test_async_instrumentation(self):
+        """Тест что Server-Timing учитывает SQL-запросы асинхронного ORM"""
+        response = await self.async_client.get(reverse("news-feed"))
+        self.assertRegex(response["Server-Timing"], r'db;dur=[\d.]+;desc="3 queries"')
+
+
+@override_settings(DATABASE_REPLICAS=["default"])
+class AsyncApiV2ViewsWithReplicaTest(AsyncApiV2ViewsTest):
+    """Те же тесты с настроенной репликой: маршрутизатор не проверяет отставание синхронно в цикле событий"""
+
+    def setUp(self):
+        super().setUp()
+        _lag_cache.clear()
+        self.addCleanup(_lag_cache.clear)
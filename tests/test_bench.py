@@ -0,0 +1,25 @@
+from django.test import SimpleTestCase
+
+from news.management.commands.bench import compare_results, percentile
+
+
+class BenchHelpersTest(SimpleTestCase):
+    """Тесты вспомогательных функций бенчмарка"""
+
+    def test_percentile_nearest_rank(self):
+        """Тест перцентиля методом ближайшего ранга"""
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile(samples, 95), 95)
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_compare_results_threshold(self):
+        """Тест что регрессией считается только замедление выше порога"""
+        baseline = {"results": {"10000": {"feed": {"p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 30.0}}}}
+        current = {"results": {"10000": {"feed": {"p50_ms": 11.0, "p95_ms": 25.0, "p99_ms": 30.0}}}}
+
+        regressions = compare_results(baseline, current, threshold=0.15)
+
+        self.assertEqual([r["metric"] for r in regressions], ["p95_ms"])
+        self.assertAlmostEqual(regressions[0]["change"], 0.25)
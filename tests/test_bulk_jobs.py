@@ -0,0 +1,156 @@
+import uuid
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from news.models import BulkJob, ContentItem, ContentTombstone
+
+User = get_user_model()
+
+
+@override_settings(NEWS_BULK_JOB_BATCH_SIZE=2)
+class BulkJobTest(TestCase):
+    """Тесты фоновых пакетных операций из админки"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(username="admin", password="adminpass")
+        cls.items = [
+            ContentItem.objects.create(
+                title=f"Item {i}",
+                slug=f"item-{i}",
+                author=cls.user,
+                content_type=ContentItem.ContentType.VIDEO if i % 2 else ContentItem.ContentType.ARTICLE,
+            )
+            for i in range(5)
+        ]
+
+    @property
+    def ids(self):
+        return [item.pk for item in self.items]
+
+    def run_jobs(self):
+        call_command("run_bulk_jobs", stdout=StringIO())
+
+    def test_admin_action_enqueues_job(self):
+        """Тест что действие админки ставит задачу в очередь, не меняя и не читая элементы в запросе"""
+        self.client.force_login(self.user)
+        url = reverse("admin:news_contentitem_changelist")
+        response = self.client.post(url, {"action": "make_published", "index": "0", "_selected_action": self.ids[:2]})
+        self.assertEqual(response.status_code, 302)
+        job = BulkJob.objects.get()
+        self.assertEqual(
+            (job.action, job.status, job.created_by), (BulkJob.Action.PUBLISH, BulkJob.Status.PENDING, self.user)
+        )
+        self.assertEqual(job.selection, {"ids": self.ids[:2]})
+        self.assertFalse(ContentItem.objects.filter(status=ContentItem.Status.PUBLISHED).exists())
+
+        self.assertEqual(self.client.get(reverse("admin:news_bulkjob_change", args=[job.pk])).status_code, 200)
+        self.assertEqual(self.client.get(reverse("admin:news_bulkjob_changelist")).status_code, 200)
+
+    def test_select_across_stores_filters(self):
+        """Тест что «выбрать все» сохраняет фильтры списка, а воркер обходит их выборку"""
+        self.client.force_login(self.user)
+        url = reverse("admin:news_contentitem_changelist") + "?content_type__exact=V&q=Item"
+        response = self.client.post(
+            url, {"action": "make_published", "select_across": "1", "index": "0", "_selected_action": self.ids[:1]}
+        )
+        self.assertEqual(response.status_code, 302)
+        job = BulkJob.objects.get()
+        self.assertEqual(job.selection, {"changelist": {"content_type__exact": ["V"], "q": ["Item"]}})
+
+        self.run_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.total, job.changed), (BulkJob.Status.DONE, 2, 2))
+        published = ContentItem.objects.filter(status=ContentItem.Status.PUBLISHED)
+        self.assertEqual(set(published.values_list("content_type", flat=True)), {ContentItem.ContentType.VIDEO})
+
+    def test_publish_in_batches(self):
+        """Тест публикации пакетами с прогрессом"""
+        job = BulkJob.enqueue(BulkJob.Action.PUBLISH, ids=self.ids[:4])
+        self.run_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, BulkJob.Status.DONE)
+        self.assertEqual((job.total, job.processed, job.changed, job.progress), (4, 4, 4, 100))
+        self.assertEqual(job.last_id, self.items[3].pk)
+        published = ContentItem.objects.filter(status=ContentItem.Status.PUBLISHED, published_at__isnull=False)
+        self.assertEqual(published.count(), 4)
+
+    def test_lost_lease_stops_worker(self):
+        """Тест что воркер бросает задачу, которую как зависшую подхватил другой воркер"""
+        job = BulkJob.enqueue(BulkJob.Action.REFRESH_METADATA, ids=self.ids)
+        claimed = BulkJob.claim()
+
+        def reclaim():
+            BulkJob.objects.filter(pk=job.pk).update(owner=uuid.uuid4())
+            return True
+
+        with (
+            mock.patch.object(ContentItem, "fetch_metadata", side_effect=reclaim) as fetch,
+            self.assertLogs("news.models.bulk_job", "WARNING"),
+        ):
+            claimed.run()
+
+        self.assertEqual(fetch.call_count, 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.last_id), (BulkJob.Status.RUNNING, 0, 0))
+
+    def test_draft_records_tombstones(self):
+        """Тест перевода в черновики с отметками для /news/changes/"""
+        ContentItem.objects.update(status=ContentItem.Status.PUBLISHED, published_at=timezone.now())
+        job = BulkJob.enqueue(BulkJob.Action.DRAFT, ids=self.ids[:2])
+        self.run_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.changed, 2)
+        self.assertEqual(ContentItem.objects.filter(status=ContentItem.Status.DRAFT).count(), 2)
+        self.assertEqual(ContentTombstone.objects.count(), 2)
+
+    def test_resume_from_last_id(self):
+        """Тест что задача продолжается с последнего обработанного ID"""
+        job = BulkJob.enqueue(BulkJob.Action.PUBLISH, ids=self.ids)
+        BulkJob.objects.filter(pk=job.pk).update(last_id=self.items[2].pk, processed=3, total=5)
+        self.run_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual((job.processed, job.changed), (5, 2))
+        self.assertFalse(ContentItem.objects.get(pk=self.items[0].pk).status == ContentItem.Status.PUBLISHED)
+
+    def test_refresh_metadata_counts_failures(self):
+        """Тест обновления метаданных только для видео с подсчётом ошибок"""
+        job = BulkJob.enqueue(BulkJob.Action.REFRESH_METADATA, ids=self.ids)
+        with (
+            mock.patch.object(ContentItem, "fetch_metadata", side_effect=[True, RuntimeError("API down")]) as fetch,
+            self.assertLogs("news.models.bulk_job", "ERROR"),
+        ):
+            self.run_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual((job.status, job.processed, job.changed, job.failed), (BulkJob.Status.DONE, 5, 1, 1))
+
+    @override_settings(NEWS_FEED_SNAPSHOTS=True)
+    def test_snapshot_rebuild_once_per_batch(self):
+        """Тест что снимки ленты пересобираются один раз на пакет"""
+        BulkJob.enqueue(BulkJob.Action.PUBLISH, ids=self.ids)
+        with mock.patch("news.snapshots._rebuild") as rebuild, self.captureOnCommitCallbacks(execute=True):
+            self.run_jobs()
+        self.assertEqual(rebuild.call_count, 3)
+
+    def test_failed_job(self):
+        """Тест что ошибка сохраняется в задаче"""
+        job = BulkJob.enqueue(BulkJob.Action.PUBLISH, ids=self.ids)
+        with (
+            mock.patch.object(BulkJob, "_publish_batch", side_effect=RuntimeError("boom")),
+            self.assertLogs("news.models.bulk_job", "ERROR"),
+        ):
+            self.run_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (BulkJob.Status.FAILED, "boom"))
+        self.assertIsNotNone(job.finished_at)
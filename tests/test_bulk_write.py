@@ -0,0 +1,164 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from news.models import BulkJob, Category, ContentItem, ContentTombstone, Tag
+
+User = get_user_model()
+
+
+class ContentBulkWriteAPITest(APITestCase):
+    """Тесты пакетной записи /apiv3/contents/bulk/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testpass")
+        cls.category = Category.objects.create(name="Category", slug="category")
+        cls.tags = [Tag.objects.create(name=f"Tag {i}", slug=f"tag-{i}") for i in range(3)]
+        cls.item = ContentItem.objects.create(
+            title="Existing", slug="existing", author=cls.user, status=ContentItem.Status.PUBLISHED
+        )
+        cls.draft = ContentItem.objects.create(title="Draft", slug="draft", author=cls.user)
+
+    def setUp(self):
+        self.url = reverse("content-bulk")
+        self.client.force_authenticate(self.user)
+
+    def article(self, i, **kwargs):
+        return {
+            "title": f"Article {i}",
+            "slug": f"article-{i}",
+            "content_type": ContentItem.ContentType.ARTICLE,
+            "category_id": self.category.id,
+            "tag_ids": [tag.id for tag in self.tags[:2]],
+            **kwargs,
+        }
+
+    def bulk(self, payload):
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_create(self):
+        """Тест создания элементов с категорией и тегами"""
+        body = self.bulk({"create": [self.article(0), self.article(1, status=ContentItem.Status.PUBLISHED)]})
+
+        self.assertEqual([row["index"] for row in body["created"]], [0, 1])
+        self.assertEqual(body["errors"], [])
+        items = ContentItem.objects.filter(slug__startswith="article-").order_by("slug")
+        self.assertEqual([item.category_id for item in items], [self.category.id] * 2)
+        self.assertEqual([item.author_id for item in items], [self.user.id] * 2)
+        self.assertEqual(set(items[0].tags.values_list("id", flat=True)), {self.tags[0].id, self.tags[1].id})
+        self.assertIsNone(items[0].published_at)
+        self.assertIsNotNone(items[1].published_at)
+
+    def test_per_item_errors(self):
+        """Тест что невалидные элементы возвращаются с индексом, а валидные записываются"""
+        body = self.bulk(
+            {
+                "create": [
+                    self.article(0),
+                    self.article(1, category_id=999999),
+                    self.article(2, slug="existing"),
+                    self.article(3, slug="article-0"),
+                    {"slug": "no-title"},
+                    self.article(5, content_type=ContentItem.ContentType.VIDEO),
+                    self.article(6, tag_ids=[999999]),
+                ],
+                "update": [{"id": 999999, "title": "Missing"}],
+            }
+        )
+        self.assertEqual([row["index"] for row in body["created"]], [0])
+        errors = {(error["operation"], error["index"]): error["errors"] for error in body["errors"]}
+        self.assertEqual(set(errors), {("create", i) for i in range(1, 7)} | {("update", 0)})
+        self.assertIn("category_id", errors[("create", 1)])
+        self.assertIn("slug", errors[("create", 2)])
+        self.assertIn("slug", errors[("create", 3)])
+        self.assertIn("title", errors[("create", 4)])
+        self.assertIn("tag_ids", errors[("create", 6)])
+        self.assertIn("id", errors[("update", 0)])
+
+    def test_update_and_transitions(self):
+        """Тест изменения, смены тегов и статусов"""
+        self.item.tags.set(self.tags)
+        body = self.bulk(
+            {
+                "update": [
+                    {"id": self.item.id, "title": "Edited", "tag_ids": [self.tags[2].id]},
+                    {"id": self.draft.id, "status": ContentItem.Status.PUBLISHED},
+                ],
+            }
+        )
+        self.assertEqual(len(body["updated"]), 2)
+        self.item.refresh_from_db()
+        self.draft.refresh_from_db()
+        self.assertEqual(self.item.title, "Edited")
+        self.assertEqual(list(self.item.tags.values_list("id", flat=True)), [self.tags[2].id])
+        self.assertIsNotNone(self.draft.published_at)
+
+        body = self.bulk({"unpublish": [self.item.id, self.draft.id], "publish": []})
+        self.assertEqual(sorted(body["unpublished"]), sorted([self.item.id, self.draft.id]))
+        self.assertEqual(ContentTombstone.objects.filter(content_id__in=[self.item.id, self.draft.id]).count(), 2)
+        self.assertEqual(self.bulk({"publish": [self.item.id]})["published"], [self.item.id])
+
+    def test_update_writes_only_own_fields(self):
+        """Тест что элемент пакета не получает поля, изменённые другим элементом"""
+        ContentItem.objects.filter(pk=self.item.pk).update(lead="Fresh lead")
+        with CaptureQueriesContext(connection) as ctx:
+            self.bulk(
+                {
+                    "update": [
+                        {"id": self.item.id, "title": "Edited"},
+                        {"id": self.draft.id, "lead": "New lead", "status": ContentItem.Status.PUBLISHED},
+                    ],
+                }
+            )
+        # Поля второго элемента не пишутся в строку первого, даже его же значениями
+        lead_updates = [
+            q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE") and '"lead"' in q["sql"]
+        ]
+        self.assertTrue(lead_updates)
+        self.assertFalse(any(f'"id" = {self.item.id})' in sql for sql in lead_updates))
+        self.item.refresh_from_db()
+        self.draft.refresh_from_db()
+        self.assertEqual(
+            (self.item.title, self.item.lead, self.item.status),
+            ("Edited", "Fresh lead", ContentItem.Status.PUBLISHED),
+        )
+        self.assertEqual((self.draft.lead, self.draft.status), ("New lead", ContentItem.Status.PUBLISHED))
+        self.assertFalse(ContentTombstone.objects.filter(content_id=self.item.id).exists())
+
+    def test_video_metadata_is_queued(self):
+        """Тест что метаданные видео загружаются фоновой задачей, а не в запросе"""
+        body = self.bulk(
+            {"create": [self.article(0, content_type=ContentItem.ContentType.VIDEO, youtube_id="dQw4w9WgXcQ")]}
+        )
+        job = BulkJob.objects.get(pk=body["metadata_job"])
+        self.assertEqual(job.action, BulkJob.Action.REFRESH_METADATA)
+        self.assertEqual(list(job.get_queryset().values_list("id", flat=True)), [body["created"][0]["id"]])
+
+    def test_constant_query_count(self):
+        """Тест что число запросов не зависит от числа элементов"""
+
+        def queries(start, count):
+            payload = {"create": [self.article(i) for i in range(start, start + count)]}
+            with CaptureQueriesContext(connection) as ctx:
+                self.bulk(payload)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(queries(0, 2), queries(100, 50))
+
+    @override_settings(NEWS_BULK_WRITE_MAX_ITEMS=2)
+    def test_limits(self):
+        """Тест лимита элементов и пустого запроса"""
+        self.assertEqual(self.client.post(self.url, {}, format="json").status_code, 400)
+        payload = {"create": [self.article(i) for i in range(3)]}
+        self.assertEqual(self.client.post(self.url, payload, format="json").status_code, 400)
+
+    def test_requires_authentication(self):
+        """Тест что пакетная запись доступна только авторизованным"""
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.post(self.url, {"publish": [1]}, format="json").status_code, 401)
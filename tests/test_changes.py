@@ -0,0 +1,167 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from news.models import Category, ContentItem, ContentTombstone
+from news.utils import initial_sync_token
+
+User = get_user_model()
+
+
+class NewsChangesAPITest(APITestCase):
+    """Тесты дельта-синхронизации /news/changes/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testpass")
+        cls.category = Category.objects.create(name="Category", slug="category")
+        cls.old = ContentItem.objects.create(
+            title="Old", slug="old", author=cls.user, category=cls.category, status=ContentItem.Status.PUBLISHED
+        )
+        cls.draft = ContentItem.objects.create(title="Draft", slug="draft", author=cls.user, category=cls.category)
+
+    def setUp(self):
+        self.url = reverse("news-changes")
+        self.token = initial_sync_token(now=timezone.now() - timedelta(minutes=1))
+
+    def changes(self, token=None):
+        response = self.client.get(self.url, {"since": token or self.token})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_initial_token(self):
+        """Тест что без since возвращается пустой ответ и токен"""
+        body = self.client.get(self.url).json()
+        self.assertEqual(body["data"], {"created": [], "updated": [], "unpublished": []})
+        self.assertTrue(body["meta"]["next"])
+
+    def test_created_updated_unpublished(self):
+        """Тест разделения на новые, изменённые и снятые элементы"""
+        ContentItem.objects.filter(pk=self.old.pk).update(published_at=timezone.now() - timedelta(hours=1))
+        self.old.refresh_from_db()
+        self.old.title = "Edited"
+        self.old.save()
+        self.draft.publish()
+        hidden = ContentItem.objects.create(
+            title="Hidden", slug="hidden", author=self.user, status=ContentItem.Status.PUBLISHED
+        )
+        ContentItem.objects.filter(pk=hidden.pk).update(published_at=timezone.now() - timedelta(hours=1))
+        hidden.refresh_from_db()
+        hidden.hide()
+
+        data = self.changes()["data"]
+        self.assertEqual([item["id"] for item in data["created"]], [self.draft.id])
+        self.assertEqual([item["id"] for item in data["updated"]], [self.old.id])
+        self.assertEqual(data["updated"][0]["categoryId"], self.category.id)
+        self.assertEqual(data["unpublished"], [hidden.id])
+
+    def test_published_without_date(self):
+        """Тест что опубликованный элемент без даты публикации попадает в updated, а не роняет запрос"""
+        ContentItem.objects.filter(pk=self.old.pk).update(published_at=None, updated_at=timezone.now())
+        data = self.changes()["data"]
+        self.assertEqual([item["id"] for item in data["updated"]], [self.old.id])
+        self.assertEqual(data["created"], [])
+
+    def test_deleted_items(self):
+        """Тест что удаление опубликованного элемента попадает в unpublished"""
+        item_id = self.old.id
+        self.old.delete()
+        self.assertEqual(self.changes()["data"]["unpublished"], [item_id])
+
+    def test_republished_item_is_not_unpublished(self):
+        """Тест что снятый и снова опубликованный элемент не считается снятым"""
+        self.old.hide()
+        self.old.publish()
+        data = self.changes()["data"]
+        self.assertEqual(data["unpublished"], [])
+        self.assertIn(self.old.id, [item["id"] for item in data["updated"] + data["created"]])
+
+    def test_draft_edits_write_single_tombstone(self):
+        """Тест что отметка о снятии пишется только при переходе из опубликованного в черновик"""
+        unpublished = ContentTombstone.objects.filter(
+            content_id=self.old.id, reason=ContentTombstone.Reason.UNPUBLISHED
+        )
+        self.old.status = ContentItem.Status.DRAFT
+        self.old.save()
+        self.assertEqual(unpublished.count(), 1)
+
+        for title in ("First edit", "Second edit"):
+            item = ContentItem.objects.get(pk=self.old.pk)
+            item.title = title
+            item.save()
+        self.old.save()
+        self.assertEqual(unpublished.count(), 1)
+
+    def test_tombstone_without_loaded_status(self):
+        """Тест что для экземпляра без загруженного статуса переход определяется по базе"""
+        item = ContentItem.objects.defer("status").get(pk=self.old.pk)
+        item.status = ContentItem.Status.DRAFT
+        item.save(update_fields=["status"])
+        item.save(update_fields=["status"])
+        self.assertEqual(
+            ContentTombstone.objects.filter(content_id=self.old.id, reason=ContentTombstone.Reason.UNPUBLISHED).count(),
+            1,
+        )
+
+    @override_settings(NEWS_CHANGES_PAGE_SIZE=2)
+    def test_pagination(self):
+        """Тест постраничного чтения изменений"""
+        for i in range(5):
+            ContentItem.objects.create(
+                title=f"Item {i}", slug=f"item-{i}", author=self.user, status=ContentItem.Status.PUBLISHED
+            )
+
+        seen, token, pages = [], self.token, 0
+        while True:
+            body = self.changes(token)
+            seen += [item["id"] for item in body["data"]["created"] + body["data"]["updated"]]
+            token, pages = body["meta"]["next"], pages + 1
+            if not body["meta"]["hasMore"]:
+                break
+        self.assertEqual(pages, 4)  # 7 изменённых строк, включая черновик
+        self.assertEqual(len(set(seen)), 6)
+
+    def test_constant_query_count(self):
+        """Тест что число запросов не зависит от числа изменений"""
+        for i in range(20):
+            ContentItem.objects.create(
+                title=f"Item {i}", slug=f"item-{i}", author=self.user, status=ContentItem.Status.PUBLISHED
+            )
+        self.old.hide()
+        with self.assertNumQueries(3):
+            self.changes()
+
+    def test_invalid_token(self):
+        """Тест ошибки 400 для повреждённого токена"""
+        response = self.client.get(self.url, {"since": "garbage"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"][0]["code"], "invalid_token")
+
+    @override_settings(NEWS_TOMBSTONE_RETENTION_DAYS=1)
+    def test_expired_token(self):
+        """Тест ответа 410 для токена старше срока хранения отметок"""
+        token = initial_sync_token(now=timezone.now() - timedelta(days=2))
+        response = self.client.get(self.url, {"since": token})
+        self.assertEqual(response.status_code, 410)
+
+    def test_token_advances_without_changes(self):
+        """Тест что токен без изменений продвигается и не устаревает"""
+        body = self.changes(initial_sync_token(now=timezone.now() - timedelta(days=10)))
+        with override_settings(NEWS_TOMBSTONE_RETENTION_DAYS=1):
+            self.assertEqual(self.client.get(self.url, {"since": body["meta"]["next"]}).status_code, 200)
+
+    def test_purge_tombstones(self):
+        """Тест удаления устаревших отметок"""
+        old = ContentTombstone.objects.create(
+            content_id=1, reason=ContentTombstone.Reason.DELETED, created_at=timezone.now() - timedelta(days=40)
+        )
+        fresh = ContentTombstone.objects.create(content_id=2, reason=ContentTombstone.Reason.DELETED)
+        call_command("purge_tombstones", stdout=StringIO())
+        self.assertFalse(ContentTombstone.objects.filter(pk=old.pk).exists())
+        self.assertTrue(ContentTombstone.objects.filter(pk=fresh.pk).exists())
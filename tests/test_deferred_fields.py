@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core.deferred_fields import DeferredFieldAccess, deferred_field_detection
+from news.models import Category, ContentItem
+
+User = get_user_model()
+
+
+class DeferredFieldDetectionTest(TestCase):
+    """Тесты обнаружения ленивой догрузки отложенных полей"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.category = Category.objects.create(name="Test Category", slug="test-category")
+        ContentItem.objects.create(title="Item", category=self.category, author=self.user, slug="item")
+
+    def test_raise_mode_names_model_field_and_call_site(self):
+        """Тест что в режиме raise сообщение содержит модель, поле и место вызова"""
+        item = ContentItem.objects.only("id", "title").get()
+        with deferred_field_detection("raise"):
+            self.assertEqual(item.title, "Item")
+            with self.assertRaises(DeferredFieldAccess) as ctx:
+                item.youtube_id
+
+        message = str(ctx.exception)
+        self.assertIn("news.ContentItem.youtube_id", message)
+        self.assertIn("tests/test_deferred_fields.py", message)
+
+    def test_log_mode_loads_value(self):
+        """Тест что в режиме log значение догружается и пишется предупреждение"""
+        item = ContentItem.objects.only("id").get()
+        with deferred_field_detection("log"):
+            with self.assertLogs("core.deferred_fields", level="WARNING"):
+                self.assertEqual(item.slug, "item")
+
+    def test_disabled_mode(self):
+        """Тест что без режима догрузка работает как обычно"""
+        item = ContentItem.objects.only("id").get()
+        with deferred_field_detection(None):
+            self.assertEqual(item.slug, "item")
@@ -0,0 +1,141 @@
+import asyncio
+import json
+from datetime import timedelta
+
+import psycopg
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from news.events import CHANNEL, NOTIFY_SQL, ContentEventBroker, broker, listen_conninfo
+from news.models import Category, ContentItem
+
+User = get_user_model()
+
+
+def event(event_id, item_id=1):
+    return {"eventId": event_id, "event": "published", "id": item_id, "category": None, "publishedAt": None}
+
+
+async def read(stream, count):
+    return [await asyncio.wait_for(anext(stream), 5) for _ in range(count)]
+
+
+class ContentEventBrokerTest(SimpleTestCase):
+    """Тесты раздачи событий и возобновления по Last-Event-ID"""
+
+    def setUp(self):
+        self.broker = ContentEventBroker(history_size=3, queue_size=2)
+
+    async def test_dispatch_to_subscriber(self):
+        """Тест что событие доходит до подписчика в формате SSE"""
+        stream = self.broker.stream(self.broker.subscribe(listen=False))
+        await read(stream, 1)
+        self.broker.dispatch(event(7, item_id=42))
+        (chunk,) = await read(stream, 1)
+        self.assertEqual(chunk, 'id: 7\nevent: published\ndata: {"id": 42, "category": null, "publishedAt": null}\n\n')
+        await stream.aclose()
+        self.assertFalse(self.broker.subscribers)
+
+    async def test_resume_from_last_event_id(self):
+        """Тест что при переподключении отдаются только пропущенные события"""
+        for event_id in (1, 2, 3):
+            self.broker.dispatch(event(event_id))
+        stream = self.broker.stream(self.broker.subscribe(last_event_id="2", listen=False))
+        chunks = await read(stream, 2)
+        self.assertTrue(chunks[1].startswith("id: 3\n"))
+
+    async def test_reset_when_event_is_too_old(self):
+        """Тест события reset, если Last-Event-ID уже вытеснен из буфера"""
+        for event_id in (1, 2, 3, 4):
+            self.broker.dispatch(event(event_id))
+        stream = self.broker.stream(self.broker.subscribe(last_event_id="1", listen=False))
+        chunks = await read(stream, 2)
+        self.assertEqual(chunks[1], "event: reset\ndata: {}\n\n")
+
+    async def test_slow_subscriber_is_disconnected(self):
+        """Тест что переполненная очередь закрывает поток, а не растёт без ограничений"""
+        subscriber = self.broker.subscribe(listen=False)
+        for event_id in (1, 2, 3):
+            self.broker.dispatch(event(event_id))
+        self.assertEqual(len(subscriber.pending), 2)
+
+        chunks = [chunk async for chunk in self.broker.stream(subscriber)]
+        self.assertEqual(len(chunks), 3)
+        self.assertFalse(self.broker.subscribers)
+
+
+class ContentEventsNotifyTest(TestCase):
+    """Тесты отправки NOTIFY при публикации и изменении контента"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testpass")
+        cls.category = Category.objects.create(name="Category", slug="category")
+        cls.item = ContentItem.objects.create(title="Item", slug="item", author=cls.user, category=cls.category)
+
+    def notifications(self, func):
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        return [query["sql"] for query in ctx.captured_queries if "pg_notify" in query["sql"]]
+
+    def test_draft_save_is_silent(self):
+        """Тест что сохранение черновика не рассылает событий"""
+        self.assertEqual(self.notifications(self.item.save), [])
+
+    def test_publish_notifies(self):
+        """Тест события published при publish()"""
+        (sql,) = self.notifications(self.item.publish)
+        self.assertIn(f'"event": "published", "id": {self.item.id}, "category": {self.category.id}', sql)
+
+    def test_published_save_notifies_update(self):
+        """Тест события updated при сохранении опубликованного элемента"""
+        self.item.publish()
+        self.item.title = "Edited"
+        (sql,) = self.notifications(self.item.save)
+        self.assertIn(f'"event": "updated", "id": {self.item.id}', sql)
+
+    def test_publish_scheduled_notifies(self):
+        """Тест события published при публикации по расписанию"""
+        ContentItem.objects.filter(pk=self.item.pk).update(scheduled_at=timezone.now() - timedelta(minutes=1))
+        (sql,) = self.notifications(ContentItem.publish_scheduled)
+        self.assertIn(f'"event": "published", "id": {self.item.id}', sql)
+
+
+# SimpleTestCase запрещает запросы к БД, в том числе проверку отставания реплик в ReplicaPinningMiddleware
+@override_settings(DATABASE_REPLICAS=[])
+class ContentEventsStreamTest(SimpleTestCase):
+    """Тест SSE-эндпоинта поверх настоящего LISTEN-соединения"""
+
+    databases = {"default"}
+
+    def test_wsgi_is_rejected(self):
+        """Тест что под WSGI поток не открывается, а возвращается 501"""
+        response = self.client.get(reverse("news-events"))
+        self.assertEqual(response.status_code, 501)
+        self.assertEqual(response.json()["errors"][0]["code"], "asgi_required")
+
+    async def test_notification_is_streamed(self):
+        """Тест что NOTIFY из другой сессии приходит в SSE-поток"""
+        response = await self.async_client.get(reverse("news-events"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        try:
+            await read(stream, 1)
+            await asyncio.wait_for(broker.listening.wait(), 5)
+
+            payload = [{"event": "published", "id": 5, "category": 3, "publishedAt": "2025-01-01T00:00:00+00:00"}]
+            async with await psycopg.AsyncConnection.connect(listen_conninfo(), autocommit=True) as conn:
+                await conn.execute(NOTIFY_SQL, [CHANNEL, json.dumps(payload)])
+
+            (chunk,) = await read(stream, 1)
+            self.assertRegex(
+                chunk.decode(),
+                r'^id: \d+\nevent: published\ndata: {"id": 5, "category": 3, "publishedAt": "2025-01-01T00:00:00\+00:00"}',
+            )
+        finally:
+            await stream.aclose()
+            await broker.aclose()
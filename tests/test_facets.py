@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from news.models import Category, ContentItem, Tag
+from news.utils import get_facets
+
+User = get_user_model()
+
+
+class FacetedFilteringTest(APITestCase):
+    """Тесты фильтров с несколькими значениями и фасетов ленты и /apiv3/contents/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user(username="alice", password="testpass")
+        cls.bob = User.objects.create_user(username="bob", password="testpass")
+        cls.root = Category.objects.create(name="Root", slug="root")
+        cls.child = Category.objects.create(name="Child", slug="child", parent=cls.root)
+        cls.other = Category.objects.create(name="Other", slug="other")
+        cls.red = Tag.objects.create(name="Red", slug="red")
+        cls.blue = Tag.objects.create(name="Blue", slug="blue")
+
+        video, article = ContentItem.ContentType.VIDEO, ContentItem.ContentType.ARTICLE
+        cls.child_video = cls.create_item("child-video", cls.child, cls.alice, video, [cls.red, cls.blue])
+        cls.child_article = cls.create_item("child-article", cls.child, cls.bob, article, [cls.red])
+        cls.other_video = cls.create_item("other-video", cls.other, cls.alice, video, [cls.blue])
+        cls.root_article = cls.create_item("root-article", cls.root, cls.bob, article, [])
+        cls.draft = ContentItem.objects.create(title="Draft", slug="draft", author=cls.alice, category=cls.child)
+        cls.draft.tags.set([cls.red])
+
+    @classmethod
+    def create_item(cls, slug, category, author, content_type, tags):
+        item = ContentItem.objects.create(
+            title=slug,
+            slug=slug,
+            category=category,
+            author=author,
+            content_type=content_type,
+            status=ContentItem.Status.PUBLISHED,
+        )
+        item.tags.set(tags)
+        return item
+
+    def feed(self, **params):
+        response = self.client.get(reverse("news-feed"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def feed_ids(self, **params):
+        return {row["id"] for row in self.feed(**params)["data"]}
+
+    def test_feed_multi_value_filters(self):
+        """Тест «или» внутри фильтра и «и» между фильтрами ленты"""
+        self.assertEqual(
+            self.feed_ids(categoryIds=f"{self.child.id},{self.other.id}"),
+            {self.child_video.id, self.child_article.id, self.other_video.id},
+        )
+        body = self.feed(categoryIds=self.other.id, pageSize=1)
+        self.assertEqual(body["meta"]["totalCount"], 1)
+        self.assertEqual(self.feed(contentType="article", pageSize=1)["meta"]["totalCount"], 2)
+        # Подкатегории входят в категорию, как у categoryId
+        self.assertEqual(len(self.feed_ids(categoryIds=self.root.id)), 3)
+        # Элемент с обоими тегами не дублируется
+        self.assertEqual(len(self.feed(tagIds=f"{self.red.id},{self.blue.id}")["data"]), 3)
+        self.assertEqual(
+            self.feed_ids(tagIds=self.red.id, authorIds=self.alice.id, contentType="video"), {self.child_video.id}
+        )
+        self.assertEqual(
+            self.feed_ids(contentType="video,article", authorIds=self.bob.id),
+            {self.child_article.id, self.root_article.id},
+        )
+        self.assertEqual(self.feed_ids(categoryIds=999999), set())
+
+        response = self.client.get(reverse("news-feed"), {"contentType": "podcast"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_feed_facets(self):
+        """Тест фасетов ленты для текущих фильтров"""
+        facets = self.feed(authorIds=self.alice.id, facets="true")["meta"]["facets"]
+
+        self.assertEqual([(row["slug"], row["count"]) for row in facets["categories"]], [("child", 1), ("other", 1)])
+        self.assertEqual([(row["slug"], row["count"]) for row in facets["tags"]], [("blue", 2), ("red", 1)])
+        self.assertEqual(facets["types"], [{"type": "video", "count": 2}])
+        self.assertNotIn("facets", self.feed()["meta"])
+
+    def test_facets_single_query(self):
+        """Тест что фасеты считаются одним запросом, без COUNT на каждое значение"""
+        qs = ContentItem.objects.filter(status=ContentItem.Status.PUBLISHED)
+        with self.assertNumQueries(1):
+            facets = get_facets(qs)
+        self.assertEqual(
+            {row["slug"]: row["count"] for row in facets["categories"]}, {"child": 2, "other": 1, "root": 1}
+        )
+        self.assertEqual({row["type"]: row["count"] for row in facets["types"]}, {"video": 2, "article": 2})
+
+    def test_contents_filters_and_facets(self):
+        """Тест фильтров с несколькими значениями и фасетов /apiv3/contents/"""
+        url = reverse("content-list")
+        response = self.client.get(url, {"category": "child,other", "status": "P", "type": "video"})
+        self.assertEqual({row["slug"] for row in response.json()["results"]}, {"child-video", "other-video"})
+
+        response = self.client.get(url, {"tag": "red,blue", "author": "alice,bob", "facets": "true"})
+        self.assertEqual(response.json()["count"], 4)
+        facets = response.json()["facets"]
+        self.assertEqual({row["slug"]: row["count"] for row in facets["tags"]}, {"red": 3, "blue": 2})
+        self.assertEqual({row["slug"]: row["count"] for row in facets["categories"]}, {"child": 3, "other": 1})
+        self.assertNotIn("facets", self.client.get(url).json())
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from news.models import Category, ContentItem
+
+User = get_user_model()
+
+
+class FeedSideloadTest(APITestCase):
+    """Тесты режима include=categories в ленте"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testpass")
+        cls.root = Category.objects.create(name="Root", slug="root")
+        cls.child = Category.objects.create(name="Child", slug="child", parent=cls.root)
+        Category.objects.create(name="Grandchild", slug="grandchild", parent=cls.child)
+        now = timezone.now()
+        for i in range(6):
+            ContentItem.objects.create(
+                title=f"Item {i}",
+                slug=f"item-{i}",
+                author=cls.user,
+                category=[cls.root, cls.child, None][i % 3],
+                status=ContentItem.Status.PUBLISHED,
+                published_at=now - timedelta(minutes=i),
+            )
+
+    def assertSameAsEmbedded(self, embedded, sideloaded):
+        categories = sideloaded["included"]["categories"]
+        self.assertEqual(len(embedded["data"]), len(sideloaded["data"]))
+        for full, compact in zip(embedded["data"], sideloaded["data"]):
+            category_id = compact.pop("categoryId")
+            category = full.pop("category")
+            self.assertEqual(full, compact)
+            self.assertEqual(categories.get(str(category_id)), category)
+
+    def test_default_shape_is_embedded(self):
+        """Тест что по умолчанию категория вложена в элемент"""
+        body = self.client.get(reverse("news-feed")).json()
+        self.assertNotIn("included", body)
+        self.assertIn("subCategories", body["data"][0]["category"])
+
+    def test_get_sideloaded(self):
+        """Тест что include=categories выносит каждую категорию в included один раз"""
+        url = reverse("news-feed")
+        embedded = self.client.get(url).json()
+        sideloaded = self.client.get(url, {"include": "categories"}).json()
+
+        self.assertEqual(set(sideloaded["included"]["categories"]), {str(self.root.id), str(self.child.id)})
+        self.assertEqual(sideloaded["meta"], embedded["meta"])
+        self.assertSameAsEmbedded(embedded, sideloaded)
+
+    def test_post_sideloaded(self):
+        """Тест режима include=categories для ленты с исключениями"""
+        url = reverse("news-feed")
+        excluded = list(ContentItem.objects.values_list("id", flat=True)[:2])
+        embedded = self.client.post(url, {"excluded": excluded}, format="json").json()
+        sideloaded = self.client.post(url, {"excluded": excluded, "include": ["categories"]}, format="json").json()
+        self.assertSameAsEmbedded(embedded, sideloaded)
+
+    def test_unknown_include(self):
+        """Тест ошибки для неизвестного значения include"""
+        response = self.client.get(reverse("news-feed"), {"include": "tags"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,59 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from news.models import Category, ContentItem, Tag
+from news.tag_arrays import check_tag_arrays
+
+
+class GenerateTestDataCommandTest(TestCase):
+    """Тесты генератора синтетических данных"""
+
+    def generate(self, **options):
+        params = {
+            "articles": 30,
+            "videos": 20,
+            "seed": 7,
+            "category_depth": 2,
+            "category_fanout": 3,
+            "tags": 10,
+            "draft_ratio": 0.2,
+            "scheduled_ratio": 0.2,
+            "workers": 1,
+            "chunk_size": 16,
+            "stdout": StringIO(),
+        }
+        params.update(options)
+        call_command("generate_test_data", **params)
+
+    def snapshot(self):
+        return list(
+            ContentItem.objects.order_by("slug").values_list(
+                "slug", "title", "status", "content_type", "category__slug"
+            )
+        )
+
+    def test_creates_tree_tags_and_items(self):
+        """Тест что создаются дерево категорий, теги и элементы во всех статусах"""
+        self.generate()
+
+        self.assertEqual(Category.objects.count(), 3 + 9)
+        self.assertEqual(Category.objects.filter(parent__isnull=False).count(), 9)
+        self.assertEqual(Tag.objects.count(), 10)
+        self.assertEqual(ContentItem.objects.filter(content_type=ContentItem.ContentType.ARTICLE).count(), 30)
+        self.assertEqual(ContentItem.objects.filter(content_type=ContentItem.ContentType.VIDEO).count(), 20)
+        self.assertTrue(ContentItem.objects.filter(status=ContentItem.Status.PUBLISHED).exists())
+        self.assertTrue(ContentItem.objects.filter(status=ContentItem.Status.DRAFT, scheduled_at__isnull=True).exists())
+        self.assertTrue(ContentItem.objects.filter(scheduled_at__isnull=False).exists())
+        self.assertTrue(ContentItem.tags.through.objects.exists())
+        self.assertEqual(check_tag_arrays(), [])
+
+    def test_same_seed_is_deterministic(self):
+        """Тест что один и тот же seed даёт одинаковые данные"""
+        self.generate()
+        first = self.snapshot()
+        ContentItem.objects.all().delete()
+
+        self.generate()
+        self.assertEqual(first, self.snapshot())
@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from news.models import Category, ContentItem
+
+User = get_user_model()
+
+
+class PerformanceInstrumentationTest(APITestCase):
+    """Тесты заголовка Server-Timing и структурированного лога"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.category = Category.objects.create(name="Test Category", slug="test-category")
+        self.item = ContentItem.objects.create(
+            title="Item",
+            category=self.category,
+            author=self.user,
+            status=ContentItem.Status.PUBLISHED,
+            slug="item",
+            published_at=timezone.now(),
+            body="# Header",
+        )
+
+    @override_settings(PERF_INSTRUMENTATION_ENABLED=False)
+    def test_disabled_by_setting(self):
+        """Тест что при выключенной настройке заголовок не добавляется"""
+        response = self.client.get(reverse("news-feed"))
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(PERF_INSTRUMENTATION_ENABLED=True, PERF_INSTRUMENTATION_SAMPLE_RATE=1.0)
+    def test_feed_server_timing(self):
+        """Тест что лента отдаёт время SQL и сериализации"""
+        with self.assertLogs("core.instrumentation", level="INFO") as logs:
+            response = self.client.get(reverse("news-feed"))
+
+        header = response["Server-Timing"]
+        self.assertRegex(header, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn("serializer;dur=", header)
+        self.assertIn("total;dur=", header)
+        self.assertIn('"view": "news-feed"', logs.output[0])
+
+    @override_settings(PERF_INSTRUMENTATION_ENABLED=True, PERF_INSTRUMENTATION_SAMPLE_RATE=1.0)
+    def test_detail_markdown_timing(self):
+        """Тест что HTML-представление учитывает время рендера Markdown"""
+        response = self.client.get(reverse("news-detail", args=[self.item.id]))
+        self.assertIn("markdown;dur=", response["Server-Timing"])
+
+    @override_settings(PERF_INSTRUMENTATION_ENABLED=True, PERF_INSTRUMENTATION_SAMPLE_RATE=0.0)
+    def test_zero_sample_rate(self):
+        """Тест что при нулевой доле выборки запросы не инструментируются"""
+        response = self.client.get(reverse("news-feed"))
+        self.assertNotIn("Server-Timing", response)
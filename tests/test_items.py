@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from news.models import Category, ContentItem
+
+User = get_user_model()
+
+
+class NewsItemsAPITest(APITestCase):
+    """Тесты получения нескольких элементов по ID"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testpass")
+        cls.root = Category.objects.create(name="Root", slug="root")
+        cls.child = Category.objects.create(name="Child", slug="child", parent=cls.root)
+        cls.items = [
+            ContentItem.objects.create(
+                title=f"Item {i}",
+                slug=f"item-{i}",
+                author=cls.user,
+                category=cls.root,
+                status=ContentItem.Status.PUBLISHED,
+                published_at=timezone.now(),
+            )
+            for i in range(5)
+        ]
+        cls.draft = ContentItem.objects.create(title="Draft", slug="draft", author=cls.user, category=cls.root)
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("news-items")
+
+    def get_items(self, ids):
+        response = self.client.get(self.url, {"ids": ",".join(str(pk) for pk in ids)})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_preserves_requested_order(self):
+        """Тест порядка элементов как в запросе и представления ленты"""
+        ids = [self.items[3].id, self.items[0].id, self.items[2].id]
+        body = self.get_items(ids)
+        self.assertEqual([item["id"] for item in body["data"]], ids)
+        feed_item = next(item for item in self.client.get(reverse("news-feed")).json()["data"] if item["id"] == ids[0])
+        self.assertEqual(body["data"][0], feed_item)
+
+    def test_missing_and_draft_ids(self):
+        """Тест что черновики и несуществующие ID попадают в meta.missing"""
+        body = self.get_items([self.items[0].id, self.draft.id, 999999])
+        self.assertEqual([item["id"] for item in body["data"]], [self.items[0].id])
+        self.assertEqual(body["meta"]["missing"], [self.draft.id, 999999])
+
+    def test_post(self):
+        """Тест POST-варианта"""
+        ids = [self.items[1].id, self.items[4].id]
+        response = self.client.post(self.url, {"ids": ids}, format="json")
+        self.assertEqual([item["id"] for item in response.json()["data"]], ids)
+
+    def test_read_through_cache(self):
+        """Тест что повторный запрос обслуживается из кэша без обращения к БД"""
+        ids = [item.id for item in self.items]
+        with self.assertNumQueries(2):
+            self.get_items(ids)
+        with self.assertNumQueries(0):
+            self.get_items(ids)
+        with self.assertNumQueries(1):
+            self.get_items(ids + [self.draft.id])
+
+    def test_invalidation_on_save(self):
+        """Тест что изменение элемента сбрасывает его кэш"""
+        self.get_items([self.items[0].id])
+        self.items[0].title = "Changed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.items[0].save()
+            # Кэш сбрасывается после коммита, иначе чтение до коммита закэшировало бы старую строку
+            self.assertEqual(self.get_items([self.items[0].id])["data"][0]["title"], "Item 0")
+        self.assertEqual(self.get_items([self.items[0].id])["data"][0]["title"], "Changed")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.items[0].hide()
+        self.assertEqual(self.get_items([self.items[0].id])["data"], [])
+
+    def test_invalidation_on_category_change(self):
+        """Тест что изменение дерева категорий сбрасывает кэш элементов"""
+        self.get_items([self.items[0].id])
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name="New child", slug="new-child", parent=self.root)
+        sub_categories = self.get_items([self.items[0].id])["data"][0]["category"]["subCategories"]
+        self.assertEqual(len(sub_categories), 2)
+
+    @override_settings(NEWS_MULTI_GET_MAX_IDS=3)
+    def test_limit(self):
+        """Тест ограничения числа ID"""
+        response = self.client.get(self.url, {"ids": "1,2,3,4"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_ids(self):
+        """Тест ошибки для пустого и нечислового списка"""
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"ids": "1,x"}).status_code, 400)
@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from news.management.commands.loadtest import LATENCY_BUCKETS_MS, Command
+from news.models import Category, ContentItem
+
+User = get_user_model()
+
+
+class LoadtestHistogramTest(SimpleTestCase):
+    """Тесты гистограммы латентности нагрузочного теста"""
+
+    def test_buckets_are_cumulative(self):
+        """Тест что корзины накопительные: ``le_N`` считает все запросы не дольше N мс"""
+        histogram = Command.histogram([3, 5, 7, 30, 20000])
+        self.assertEqual((histogram["le_5"], histogram["le_10"], histogram["le_25"]), (2, 3, 3))
+        self.assertEqual((histogram["le_50"], histogram["le_10000"], histogram["le_inf"]), (4, 4, 5))
+        counts = [histogram[f"le_{bound}"] for bound in LATENCY_BUCKETS_MS] + [histogram["le_inf"]]
+        self.assertEqual(counts, sorted(counts))
+
+
+class LoadtestCommandTest(LiveServerTestCase):
+    """Тест генерации журнала и его воспроизведения против тестового сервера"""
+
+    # С available_apps очистка БД после теста идёт через TRUNCATE ... CASCADE: в базе остаётся
+    # таблица news_video из 0001_initial, которая ссылается на auth_user
+    available_apps = settings.INSTALLED_APPS
+    databases = "__all__"
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="editor", password="testpass")
+        category = Category.objects.create(name="Category", slug="category")
+        for i in range(30):
+            ContentItem.objects.create(
+                title=f"Item {i}",
+                slug=f"item-{i}",
+                category=category,
+                author=self.user,
+                status=ContentItem.Status.PUBLISHED,
+            )
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_generate_and_replay(self):
+        """Тест что журнал воспроизводится без ошибок, а отчёт содержит сводку и накопительные гистограммы"""
+        log, output = os.path.join(self.tmpdir.name, "access.jsonl"), os.path.join(self.tmpdir.name, "report.json")
+        call_command("loadtest", generate=log, duration=1, sessions_per_second=5, publish_every=0, stdout=StringIO())
+        call_command(
+            "loadtest",
+            replay=log,
+            base_url=self.live_server_url,
+            speed=4,
+            concurrency=4,
+            report_interval=0.1,
+            output=output,
+            stdout=StringIO(),
+        )
+
+        with open(output) as fh:
+            report = json.load(fh)
+        self.assertTrue(report["timeline"])
+        self.assertIn("feed", report["summary"])
+        for label, stats in report["summary"].items():
+            with self.subTest(label=label):
+                self.assertEqual(stats["errors"], 0)
+                self.assertEqual(stats["histogram_ms"]["le_inf"], stats["requests"])
@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from rest_framework.test import APITestCase
+from datetime import timedelta
+
+from news.models import Category, ContentItem
+
+User = get_user_model()
+
+
+class MetricsEndpointTest(APITestCase):
+    """Тесты эндпоинта /metrics в формате Prometheus"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.category = Category.objects.create(name="Test Category", slug="test-category")
+
+    def test_request_latency_per_url_name(self):
+        """Тест что латентность учитывается по имени URL"""
+        self.client.get(reverse("news-feed"))
+        self.client.get(reverse("news-categories"))
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('http_request_duration_seconds_count{method="GET",view="news-feed"}', body)
+        self.assertIn('http_request_duration_seconds_count{method="GET",view="news-categories"}', body)
+        self.assertIn('http_request_db_queries_bucket{le="1.0",view="news-feed"}', body)
+
+    def test_scheduled_publish_lag(self):
+        """Тест что публикация по расписанию фиксирует задержку"""
+        before = REGISTRY.get_sample_value("scheduled_publish_lag_seconds_sum") or 0.0
+        ContentItem.objects.create(
+            title="Scheduled",
+            category=self.category,
+            author=self.user,
+            slug="scheduled",
+            scheduled_at=timezone.now() - timedelta(minutes=5),
+        )
+        ContentItem.publish_scheduled()
+
+        lag = REGISTRY.get_sample_value("scheduled_publish_lag_seconds_sum") - before
+        self.assertGreaterEqual(lag, 300)
+        self.assertIn("scheduled_publish_lag_seconds_count", self.client.get(reverse("metrics")).content.decode())
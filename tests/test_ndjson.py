@@ -0,0 +1,174 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from news.models import Category, ContentItem, ContentTombstone, Tag
+from news.ndjson import export_content, import_content, split_id_range
+
+User = get_user_model()
+
+
+class ContentNDJSONTest(TestCase):
+    """Тесты выгрузки и загрузки контента в NDJSON"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="editor", password="testpass")
+        cls.category = Category.objects.create(name="Category", slug="category")
+        cls.tags = [Tag.objects.create(name=f"Tag {i}", slug=f"tag-{i}") for i in range(3)]
+        cls.items = []
+        for i in range(5):
+            item = ContentItem.objects.create(
+                title=f"Item {i}",
+                slug=f"item-{i}",
+                body="Текст\n" * 10,
+                author=cls.user,
+                category=cls.category if i % 2 else None,
+                status=ContentItem.Status.PUBLISHED,
+            )
+            item.tags.set(cls.tags[: i % 3])
+            cls.items.append(item)
+
+    def export(self, **kwargs):
+        stream = io.BytesIO()
+        written = export_content(stream, **kwargs)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(written, len(lines))
+        return lines
+
+    def test_export(self):
+        """Тест что строка содержит поля элемента, slug категории, автора и тегов"""
+        rows = [json.loads(line) for line in self.export(chunk_size=2)]
+
+        self.assertEqual([row["slug"] for row in rows], [f"item-{i}" for i in range(5)])
+        self.assertEqual(rows[1]["category"], "category")
+        self.assertIsNone(rows[0]["category"])
+        self.assertEqual(rows[2]["tags"], ["tag-0", "tag-1"])
+        self.assertEqual(rows[0]["author"], "editor")
+        self.assertEqual(rows[0]["body"], "Текст\n" * 10)
+        self.assertNotIn("id", rows[0])
+
+    def test_export_id_range(self):
+        """Тест выгрузки по диапазону ID и его разбиения"""
+        ids = [item.id for item in self.items]
+        self.assertEqual(len(self.export(min_id=ids[1], max_id=ids[3])), 3)
+
+        ranges = split_id_range(ContentItem.objects.all(), 2)
+        self.assertEqual(ranges[0][0], ids[0])
+        self.assertEqual(ranges[-1][1], ids[-1])
+        self.assertEqual(sum(len(self.export(min_id=low, max_id=high)) for low, high in ranges), 5)
+
+    def test_export_query_count(self):
+        """Тест что теги загружаются одним запросом на пакет"""
+        with CaptureQueriesContext(connection) as ctx:
+            self.export(chunk_size=2)
+        # Серверный курсор внутри транзакции теста — обычный запрос; плюс по запросу тегов на каждый из 3 пакетов
+        self.assertEqual(len(ctx.captured_queries), 4)
+
+    def test_round_trip_upsert(self):
+        """Тест что загрузка обновляет элементы по slug, заменяет теги и создаёт новые"""
+        lines = self.export()
+        ContentItem.objects.filter(slug="item-2").update(title="Changed")
+        self.items[2].tags.set([self.tags[2]])
+        ContentItem.objects.filter(slug="item-4").delete()
+
+        stats = import_content(io.BytesIO(b"\n".join(lines)), batch_size=2)
+
+        self.assertEqual((stats["created"], stats["updated"], stats["errors"]), (1, 4, []))
+        item = ContentItem.objects.get(slug="item-2")
+        self.assertEqual(item.title, "Item 2")
+        self.assertEqual(set(item.tags.values_list("slug", flat=True)), {"tag-0", "tag-1"})
+        restored = ContentItem.objects.get(slug="item-4")
+        self.assertEqual(restored.category, None)
+        self.assertEqual(set(restored.tags.values_list("slug", flat=True)), {"tag-0"})
+        self.assertEqual(restored.published_at, self.items[4].published_at)
+        self.assertEqual(ContentItem.objects.count(), 5)
+
+    def test_import_errors(self):
+        """Тест что невалидные строки пропускаются с номером строки"""
+        lines = [
+            b'{"slug": "new-1", "title": "New", "author": "editor"}',
+            b"not json",
+            b'{"slug": "new-2", "title": "New", "author": "editor", "category": "missing"}',
+            b'{"slug": "new-3", "title": "New", "author": "nobody"}',
+            b'{"slug": "new-4", "title": "New", "author": "editor", "tags": ["tag-0", "missing"]}',
+            b'{"slug": "new-5", "title": "New", "author": "editor", "status": "X"}',
+            b'{"slug": "new-6", "title": "New", "author": "editor", "views": "abc"}',
+            b'{"slug": "new-7", "title": "New", "author": "editor", "published_at": "yesterday"}',
+            b'{"slug": "new 8", "title": "New", "author": "editor"}',
+            b"",
+            b'{"slug": "new-1", "title": "Last wins", "author": "editor", "tags": ["tag-1"]}',
+        ]
+        stats = import_content(io.BytesIO(b"\n".join(lines)))
+
+        self.assertEqual([number for number, _ in stats["errors"]], [2, 3, 4, 5, 6, 7, 8, 9])
+        self.assertIn("invalid views 'abc'", stats["errors"][5][1])
+        self.assertEqual(stats["created"], 1)
+        item = ContentItem.objects.get(slug="new-1")
+        self.assertEqual(item.title, "Last wins")
+        self.assertEqual(item.status, ContentItem.Status.DRAFT)
+        self.assertEqual(list(item.tags.values_list("slug", flat=True)), ["tag-1"])
+
+        stats = import_content(io.BytesIO(lines[3]), default_author="editor")
+        self.assertEqual((stats["created"], stats["errors"]), (1, []))
+
+    def test_published_without_date(self):
+        """Тест что опубликованный элемент без published_at получает дату публикации"""
+        import_content(io.BytesIO(b'{"slug": "new-1", "title": "New", "author": "editor", "status": "P"}'))
+        self.assertIsNotNone(ContentItem.objects.get(slug="new-1").published_at)
+
+        ContentItem.objects.filter(slug="item-0").update(status=ContentItem.Status.DRAFT, published_at=None)
+        import_content(io.BytesIO(b'{"slug": "item-0", "title": "Item 0", "status": "P"}'))
+        self.assertIsNotNone(ContentItem.objects.get(slug="item-0").published_at)
+
+    def test_partial_line_updates_only_given_fields(self):
+        """Тест что строка без части полей не сбрасывает остальные поля, теги и статус"""
+        ContentItem.objects.filter(slug="item-2").update(views=42)
+        lines = [
+            b'{"slug": "item-2", "title": "Renamed"}',
+            b'{"slug": "new-1", "title": "No author"}',
+        ]
+        with self.captureOnCommitCallbacks():
+            stats = import_content(io.BytesIO(b"\n".join(lines)))
+
+        self.assertEqual((stats["created"], stats["updated"]), (0, 1))
+        self.assertEqual(stats["errors"], [(2, "author is required for a new item")])
+        item = ContentItem.objects.get(slug="item-2")
+        self.assertEqual((item.title, item.status, item.views), ("Renamed", ContentItem.Status.PUBLISHED, 42))
+        self.assertEqual(item.published_at, self.items[2].published_at)
+        self.assertIsNone(item.category)
+        self.assertEqual(set(item.tags.values_list("slug", flat=True)), {"tag-0", "tag-1"})
+        self.assertFalse(ContentTombstone.objects.exists())
+
+    def test_unpublish_writes_tombstone(self):
+        """Тест отметки о снятии и пересчёта похожих при смене статуса загрузкой"""
+        lines = [b'{"slug": "item-1", "title": "Item 1", "status": "D"}', b'{"slug": "item-3", "title": "Item 3"}']
+        with self.captureOnCommitCallbacks() as callbacks:
+            import_content(io.BytesIO(b"\n".join(lines)))
+
+        self.assertEqual(ContentItem.objects.get(slug="item-1").status, ContentItem.Status.DRAFT)
+        self.assertEqual(
+            list(ContentTombstone.objects.values_list("content_id", "reason")),
+            [(self.items[1].id, ContentTombstone.Reason.UNPUBLISHED)],
+        )
+        self.assertEqual(len(callbacks), 1)
+
+    def test_commands(self):
+        """Тест команд export_content и import_content через файлы"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "content.ndjson"
+            call_command("export_content", output=str(path), stdout=io.StringIO())
+            ContentItem.objects.all().delete()
+
+            out = io.StringIO()
+            call_command("import_content", str(path), batch_size=2, stdout=out)
+
+        self.assertIn("Created 5, updated 0", out.getvalue())
+        self.assertEqual(ContentItem.objects.count(), 5)
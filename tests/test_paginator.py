@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.paginator import EstimatedCountPaginator
+from news.models import ContentItem
+
+User = get_user_model()
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    """Тесты пагинатора с оценкой числа строк"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="testuser", password="testpass")
+        ContentItem.objects.bulk_create(
+            [
+                ContentItem(
+                    title=f"Item {i}",
+                    slug=f"item-{i}",
+                    author=user,
+                    status=ContentItem.Status.PUBLISHED if i % 3 else ContentItem.Status.DRAFT,
+                )
+                for i in range(30)
+            ]
+        )
+
+    def count(self, qs):
+        with CaptureQueriesContext(connection) as ctx:
+            count = EstimatedCountPaginator(qs, 10).count
+        return count, [query["sql"] for query in ctx.captured_queries]
+
+    def test_small_result_is_exact(self):
+        """Тест точного подсчёта, если оценка меньше ADMIN_EXACT_COUNT_LIMIT"""
+        count, _ = self.count(ContentItem.objects.filter(status=ContentItem.Status.PUBLISHED))
+        self.assertEqual(count, 20)
+        self.assertEqual(self.count(ContentItem.objects.all())[0], 30)
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=1)
+    def test_unfiltered_uses_table_statistics(self):
+        """Тест оценки по pg_class.reltuples без COUNT(*)"""
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {ContentItem._meta.db_table}")
+        count, queries = self.count(ContentItem.objects.order_by("-published_at"))
+        self.assertEqual(count, 30)
+        self.assertEqual(len(queries), 1)
+        self.assertIn("reltuples", queries[0])
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=1)
+    def test_filtered_uses_explain(self):
+        """Тест оценки планировщика для выборки с фильтром"""
+        count, queries = self.count(ContentItem.objects.filter(status=ContentItem.Status.PUBLISHED))
+        self.assertGreater(count, 0)
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0].startswith("EXPLAIN"))
+
+    def test_list(self):
+        """Тест что обычные списки считаются как раньше"""
+        self.assertEqual(EstimatedCountPaginator(list(range(15)), 10).count, 15)
@@ -0,0 +1,184 @@
+import re
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from datetime import timedelta
+
+from news.models import Category, ContentItem, Tag
+from news.tag_arrays import sync_tag_arrays
+
+User = get_user_model()
+
+
+class QueryBudgetTestCase(APITestCase):
+    """Базовый класс: реалистичный набор данных и проверка бюджета SQL-запросов"""
+
+    TREE_DEPTH = 4
+    TREE_FANOUT = 3
+    TAGS = 40
+    ITEMS = 120
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(username="admin", password="adminpass")
+
+        level = [Category.objects.create(name="Root", slug="root")]
+        cls.root = level[0]
+        for depth in range(1, cls.TREE_DEPTH + 1):
+            next_level = []
+            for parent in level:
+                for i in range(cls.TREE_FANOUT):
+                    slug = f"{parent.slug}-{i}"
+                    next_level.append(Category(name=slug, slug=slug, parent=parent))
+            level = Category.objects.bulk_create(next_level)
+        categories = list(Category.objects.all())
+
+        tags = Tag.objects.bulk_create([Tag(name=f"Tag {i}", slug=f"tag-{i}") for i in range(cls.TAGS)])
+
+        now = timezone.now()
+        items = ContentItem.objects.bulk_create(
+            [
+                ContentItem(
+                    title=f"Item {i}",
+                    lead="Lead",
+                    body="# Header\n\nText",
+                    slug=f"item-{i}",
+                    author=cls.user,
+                    category=categories[i % len(categories)],
+                    status=ContentItem.Status.PUBLISHED,
+                    content_type=ContentItem.ContentType.VIDEO if i % 2 else ContentItem.ContentType.ARTICLE,
+                    youtube_id=f"yt{i}" if i % 2 else "",
+                    published_at=now - timedelta(minutes=i),
+                )
+                for i in range(cls.ITEMS)
+            ]
+        )
+        through = ContentItem.tags.through
+        through.objects.bulk_create(
+            [
+                through(contentitem_id=item.id, tag_id=tags[(i + k) % len(tags)].id)
+                for i, item in enumerate(items)
+                for k in range(3)
+            ]
+        )
+        sync_tag_arrays([item.id for item in items])
+        cls.item = items[0]
+
+    def assertQueryBudget(self, budget, func, *args, **kwargs):
+        """Проверяет, что вызов укладывается в бюджет запросов, и печатает SQL при превышении."""
+        with CaptureQueriesContext(connection) as ctx:
+            result = func(*args, **kwargs)
+
+        if len(ctx.captured_queries) > budget:
+            statements = [query["sql"] for query in ctx.captured_queries]
+            shapes = Counter(re.sub(r"\b\d+\b", "?", sql) for sql in statements)
+            repeated = "\n".join(f"  x{count}: {sql}" for sql, count in shapes.most_common(3) if count > 1)
+            listing = "\n".join(f"{i}. {sql}" for i, sql in enumerate(statements, start=1))
+            self.fail(
+                f"{len(statements)} queries executed, budget is {budget}\n"
+                f"Most repeated:\n{repeated or '  -'}\nAll queries:\n{listing}"
+            )
+        return result
+
+
+class ApiV2QueryBudgetTest(QueryBudgetTestCase):
+    """Бюджеты запросов для API v2"""
+
+    def test_feed_first_page(self):
+        """Тест бюджета первой страницы ленты"""
+        response = self.assertQueryBudget(3, self.client.get, reverse("news-feed"), {"pageSize": 100})
+        self.assertEqual(len(response.json()["data"]), 100)
+
+    def test_feed_sideloaded(self):
+        """Тест бюджета ленты с категориями в included"""
+        self.assertQueryBudget(3, self.client.get, reverse("news-feed"), {"pageSize": 100, "include": "categories"})
+
+    def test_feed_budget_does_not_scale_with_page_size(self):
+        """Тест что число запросов не зависит от размера страницы"""
+        url = reverse("news-feed")
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url, {"pageSize": 5})
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(url, {"pageSize": 100})
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_feed_category_filter(self):
+        """Тест бюджета ленты с фильтром по дереву категорий"""
+        self.assertQueryBudget(3, self.client.get, reverse("news-feed"), {"categoryId": self.root.id})
+
+    def test_feed_all_news(self):
+        """Тест бюджета полной ленты"""
+        self.assertQueryBudget(3, self.client.get, reverse("news-feed"), {"allNews": True})
+
+    def test_feed_post_with_exclusions(self):
+        """Тест бюджета ленты с исключениями (без догрузки отложенных полей)"""
+        excluded = list(ContentItem.objects.values_list("id", flat=True)[:50])
+        self.assertQueryBudget(2, self.client.post, reverse("news-feed"), {"excluded": excluded}, format="json")
+
+    def test_categories_tree(self):
+        """Тест бюджета дерева категорий любой глубины"""
+        self.assertQueryBudget(1, self.client.get, reverse("news-categories"))
+
+    def test_detail_html(self):
+        """Тест бюджета HTML-представления"""
+        self.assertQueryBudget(1, self.client.get, reverse("news-detail", args=[self.item.id]))
+
+
+class ApiV3QueryBudgetTest(QueryBudgetTestCase):
+    """Бюджеты запросов для API v3"""
+
+    def test_contents_list(self):
+        """Тест бюджета списка контента"""
+        response = self.assertQueryBudget(3, self.client.get, reverse("content-list"))
+        self.assertEqual(len(response.json()["results"][0]["tags"]), 3)
+
+    def test_contents_detail(self):
+        """Тест бюджета детального представления контента"""
+        self.assertQueryBudget(2, self.client.get, reverse("content-detail", args=[self.item.slug]))
+
+    def test_categories_list(self):
+        """Тест бюджета списка категорий"""
+        self.assertQueryBudget(2, self.client.get, reverse("category-list"))
+
+    def test_tags_list(self):
+        """Тест бюджета списка тегов"""
+        self.assertQueryBudget(2, self.client.get, reverse("tag-list"))
+
+
+class AdminChangelistQueryBudgetTest(QueryBudgetTestCase):
+    """Бюджеты запросов для списков в админке"""
+
+    ADMIN_BUDGET = 11
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_content_item_changelist(self):
+        """Тест бюджета списка контента в админке"""
+        response = self.assertQueryBudget(
+            self.ADMIN_BUDGET, self.client.get, reverse("admin:news_contentitem_changelist")
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_content_item_changelist_filtered(self):
+        """Тест бюджета списка контента в админке с фильтрами"""
+        response = self.assertQueryBudget(
+            self.ADMIN_BUDGET,
+            self.client.get,
+            reverse("admin:news_contentitem_changelist"),
+            {"status__exact": ContentItem.Status.PUBLISHED, "category__id__exact": self.root.id},
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_category_changelist(self):
+        """Тест бюджета списка категорий в админке"""
+        self.assertQueryBudget(self.ADMIN_BUDGET, self.client.get, reverse("admin:news_category_changelist"))
+
+    def test_tag_changelist(self):
+        """Тест бюджета списка тегов в админке"""
+        self.assertQueryBudget(self.ADMIN_BUDGET, self.client.get, reverse("admin:news_tag_changelist"))
@@ -0,0 +1,136 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from news.models import Category, ContentItem, RelatedContent, Tag
+from news.related import build_related_content, category_proximity, get_related_ids
+
+User = get_user_model()
+
+
+class RelatedContentTest(APITestCase):
+    """Тесты индекса похожих элементов и /news/<id>/related/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testpass")
+        cls.root = Category.objects.create(name="Root", slug="root")
+        cls.child = Category.objects.create(name="Child", slug="child", parent=cls.root)
+        cls.sibling = Category.objects.create(name="Sibling", slug="sibling", parent=cls.root)
+        cls.other = Category.objects.create(name="Other", slug="other")
+        cls.tags = [Tag.objects.create(name=f"Tag {i}", slug=f"tag-{i}") for i in range(4)]
+
+        now = timezone.now()
+        cls.source = cls.create_item("source", cls.child, cls.tags[:3], now)
+        # Все теги общие, но категория далеко
+        cls.same_tags = cls.create_item("same-tags", cls.other, cls.tags[:3], now - timedelta(days=1))
+        # Меньше общих тегов, зато соседняя категория
+        cls.sibling_item = cls.create_item("sibling", cls.sibling, cls.tags[:1], now - timedelta(days=1))
+        # Только категория
+        cls.category_only = cls.create_item("category-only", cls.child, [], now - timedelta(days=1))
+        cls.unrelated = cls.create_item("unrelated", None, [cls.tags[3]], now)
+        cls.draft = ContentItem.objects.create(title="Draft", slug="draft", author=cls.user, category=cls.child)
+        cls.draft.tags.set(cls.tags[:3])
+
+    @classmethod
+    def create_item(cls, slug, category, tags, published_at):
+        item = ContentItem.objects.create(
+            title=slug,
+            slug=slug,
+            author=cls.user,
+            category=category,
+            status=ContentItem.Status.PUBLISHED,
+            published_at=published_at,
+        )
+        item.tags.set(tags)
+        return item
+
+    def setUp(self):
+        cache.clear()
+
+    def get_related(self, item):
+        response = self.client.get(reverse("news-related", args=[item.id]))
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.json()["data"]]
+
+    def test_category_proximity(self):
+        """Тест близости категорий по расстоянию в дереве"""
+        proximity = category_proximity()
+        self.assertEqual(proximity[self.child.id, self.child.id], 1)
+        self.assertEqual(proximity[self.child.id, self.root.id], 0.5)
+        self.assertAlmostEqual(proximity[self.child.id, self.sibling.id], 1 / 3)
+        self.assertNotIn((self.child.id, self.other.id), proximity)
+
+    def test_build_and_endpoint(self):
+        """Тест порядка похожих: теги, затем категория; без черновиков, самого элемента и несвязанных"""
+        self.assertEqual(build_related_content(batch_size=2), 5)
+
+        self.assertEqual(
+            self.get_related(self.source), [self.same_tags.id, self.category_only.id, self.sibling_item.id]
+        )
+        self.assertEqual(self.get_related(self.unrelated), [])
+        response = self.client.get(reverse("news-related", args=[self.draft.id]))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(NEWS_RELATED_LIMIT=1)
+    def test_limit(self):
+        """Тест что хранится не больше NEWS_RELATED_LIMIT соседей"""
+        build_related_content()
+        self.assertEqual(get_related_ids(self.source.id), [self.same_tags.id])
+        self.assertEqual(RelatedContent.objects.filter(item=self.source).count(), 1)
+
+    @override_settings(NEWS_RELATED_MAX_TAG_ITEMS=3)
+    def test_frequent_tags_are_ignored(self):
+        """Тест что слишком частые теги не дают кандидатов"""
+        build_related_content()
+        # tag-0 есть у трёх опубликованных элементов и черновика, tag-1 и tag-2 — у двух и черновика
+        self.assertNotIn(self.sibling_item.id, get_related_ids(self.source.id))
+        self.assertIn(self.same_tags.id, get_related_ids(self.source.id))
+
+    def test_incremental_update_on_publish_and_retag(self):
+        """Тест обновления индекса после публикации, смены тегов и снятия"""
+        build_related_content()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.draft.publish()
+        self.assertIn(self.source.id, get_related_ids(self.draft.id))
+        self.assertIn(self.draft.id, get_related_ids(self.source.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.unrelated.tags.add(*self.tags[:3])
+        self.assertIn(self.source.id, get_related_ids(self.unrelated.id))
+        self.assertIn(self.unrelated.id, get_related_ids(self.source.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ContentItem.hide_many([self.draft.id])
+        self.assertEqual(get_related_ids(self.draft.id), [])
+        self.assertNotIn(self.draft.id, get_related_ids(self.source.id))
+        self.assertFalse(RelatedContent.objects.filter(related=self.draft).exists())
+
+    def test_single_update_per_transaction(self):
+        """Тест что PATCH с категорией и tag_ids пересчитывает похожие один раз"""
+        self.client.force_authenticate(self.user)
+        with mock.patch("news.related.update_related_content") as update:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch(
+                    reverse("content-detail", args=[self.source.slug]),
+                    {"category": self.sibling.id, "tag_ids": [tag.id for tag in self.tags[:2]]},
+                    format="json",
+                )
+        self.assertEqual(response.status_code, 200)
+        update.assert_called_once_with({self.source.id}, "default")
+
+    def test_unrelated_edit_skips_update(self):
+        """Тест что правка без смены статуса, категории и тегов не пересчитывает похожие"""
+        with mock.patch("news.related.update_related_content") as update:
+            with self.captureOnCommitCallbacks(execute=True):
+                item = ContentItem.objects.get(pk=self.source.pk)
+                item.title = "Edited"
+                item.save()
+                item.tags.set(self.tags[:3])
+        update.assert_not_called()
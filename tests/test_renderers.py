@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+import msgpack
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+from news.models import Category, ContentItem
+
+User = get_user_model()
+
+ASYNC_URLCONF = "news.urls.apiv2_async_urls"
+
+
+class ORJSONRendererTest(SimpleTestCase):
+    """Тесты совпадения вывода ORJSONRenderer со стандартным JSONRenderer"""
+
+    def assertSameOutput(self, data, accepted_media_type=None, renderer_context=None):
+        self.assertEqual(
+            ORJSONRenderer().render(data, accepted_media_type, renderer_context),
+            JSONRenderer().render(data, accepted_media_type, renderer_context),
+        )
+
+    def test_values(self):
+        """Тест дат, ленивых строк, Decimal, Юникода и нестроковых ключей"""
+        self.assertSameOutput(
+            {
+                "utc": datetime(2025, 1, 2, 3, 4, 5, 123456, tzinfo=dt_timezone.utc),
+                "local": datetime(2025, 1, 2, 3, 4, 5, tzinfo=dt_timezone(timedelta(hours=3))),
+                "date": datetime(2025, 1, 2).date(),
+                "lazy": _("Контент отсутствует"),
+                "decimal": Decimal("1.5"),
+                "text": "Новости\u2028строка\u2029",
+                1: [None, True, 1.25],
+            }
+        )
+
+    def test_empty(self):
+        """Тест пустого тела для None"""
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+    def test_fallbacks(self):
+        """Тест отступов и целых вне 64 бит через стандартный рендерер"""
+        self.assertSameOutput({"a": [1, 2]}, "application/json; indent=4")
+        self.assertSameOutput({"a": [1, 2]}, renderer_context={"indent": 2})
+        self.assertSameOutput({"big": 2**70})
+
+
+class RendererNegotiationTest(APITestCase):
+    """Тесты согласования формата ответа для API v2 и v3"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testpass")
+        cls.root = Category.objects.create(name="Root", slug="root")
+        Category.objects.create(name="Child", slug="child", parent=cls.root)
+        now = timezone.now()
+        cls.items = [
+            ContentItem.objects.create(
+                title=f"Item {i}",
+                slug=f"item-{i}",
+                author=cls.user,
+                category=cls.root if i % 2 else None,
+                status=ContentItem.Status.PUBLISHED,
+                published_at=now - timedelta(minutes=i),
+            )
+            for i in range(5)
+        ]
+
+    def urls(self):
+        return [
+            (reverse("news-feed"), {}),
+            (reverse("news-feed"), {"include": "categories"}),
+            (reverse("news-categories"), {}),
+            ("/apiv3/contents/", {}),
+            (f"/apiv3/contents/{self.items[0].slug}/", {}),
+        ]
+
+    def test_json_parity(self):
+        """Тест что JSON-ответы совпадают байт-в-байт с выводом стандартного JSONRenderer"""
+        for url, params in self.urls():
+            with self.subTest(url=url, params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response["Content-Type"], "application/json")
+                self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_msgpack(self):
+        """Тест MessagePack по Accept и по ?format=msgpack"""
+        for url, params in self.urls():
+            with self.subTest(url=url, params=params):
+                expected = self.client.get(url, params).json()
+                response = self.client.get(url, params, HTTP_ACCEPT="application/msgpack")
+                self.assertEqual(response["Content-Type"], "application/msgpack")
+                self.assertEqual(msgpack.unpackb(response.content, strict_map_key=False), expected)
+
+        response = self.client.get("/apiv3/contents/", {"format": "msgpack"})
+        self.assertEqual(msgpack.unpackb(response.content), self.client.get("/apiv3/contents/").json())
+
+    @override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+    async def test_async_views(self):
+        """Тест согласования формата в асинхронных представлениях"""
+        url = reverse("news-feed")
+        json_response = await self.async_client.get(url)
+        self.assertEqual(json_response["Content-Type"], "application/json")
+
+        response = await self.async_client.get(url, headers={"accept": "application/msgpack"})
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content), json_response.json())
+
+        html_response = await self.async_client.get(url, headers={"accept": "text/html"})
+        self.assertEqual(html_response["Content-Type"], "application/json")
+
+    def test_renderer_bytes(self):
+        """Тест что MessagePack компактнее JSON для страницы ленты"""
+        data = self.client.get(reverse("news-feed")).data
+        self.assertLess(len(MessagePackRenderer().render(data)), len(ORJSONRenderer().render(data)))
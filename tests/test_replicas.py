@@ -0,0 +1,109 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from core.replicas import PIN_COOKIE, PrimaryReplicaRouter, _lag_cache, _RoutingState, _state
+from news.models import Category, ContentItem
+from news.utils import get_cached_feed_items
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0", "replica_1"], REPLICA_MAX_LAG_SECONDS=2.0)
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    """Тесты маршрутизации чтения и записи между primary и репликами"""
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.token = _state.set(_RoutingState())
+
+    def tearDown(self):
+        _state.reset(self.token)
+
+    @mock.patch("core.replicas.replica_lag", return_value=0.1)
+    def test_reads_go_to_replicas(self, _):
+        """Тест что чтение без записи уходит на реплику"""
+        self.assertIn(self.router.db_for_read(ContentItem), ["replica_0", "replica_1"])
+
+    @mock.patch("core.replicas.replica_lag", return_value=0.1)
+    def test_reads_after_write_stick_to_primary(self, _):
+        """Тест что после записи чтения идут в primary"""
+        self.assertEqual(self.router.db_for_write(ContentItem), "default")
+        self.assertEqual(self.router.db_for_read(ContentItem), "default")
+
+    def test_lagging_replica_is_skipped(self):
+        """Тест что отстающая реплика исключается, а при отсутствии здоровых чтение идёт в primary"""
+        with mock.patch("core.replicas.replica_lag", side_effect=lambda alias: 0 if alias == "replica_1" else 30):
+            self.assertEqual(self.router.db_for_read(ContentItem), "replica_1")
+        with mock.patch("core.replicas.replica_lag", return_value=float("inf")):
+            self.assertEqual(self.router.db_for_read(ContentItem), "default")
+
+    async def test_no_sync_lag_probe_in_event_loop(self):
+        """Тест что в цикле событий маршрутизатор не проверяет отставание синхронно, а берёт кэш"""
+        _lag_cache.clear()
+        self.addCleanup(_lag_cache.clear)
+        with mock.patch("core.replicas.connections") as connections:
+            connections.__getitem__.return_value.in_atomic_block = False
+            self.assertEqual(self.router.db_for_read(ContentItem), "default")
+            connections.__getitem__.return_value.cursor.assert_not_called()
+
+            _lag_cache["replica_0"] = _lag_cache["replica_1"] = (float("inf"), 0.1)
+            self.assertIn(self.router.db_for_read(ContentItem), ["replica_0", "replica_1"])
+
+    def test_migrations_only_on_primary(self):
+        """Тест что миграции применяются только к primary"""
+        self.assertTrue(self.router.allow_migrate("default", "news"))
+        self.assertFalse(self.router.allow_migrate("replica_0", "news"))
+
+
+# Без буферизации просмотров hit пишет в БД в том же запросе
+@override_settings(DATABASE_REPLICAS=["replica_0"], REPLICA_PIN_SECONDS=5, NEWS_VIEWS_FLUSH_SECONDS=0)
+@mock.patch("core.replicas.replica_lag", return_value=float("inf"))
+class ReplicaPinningMiddlewareTest(APITestCase):
+    """Тесты закрепления клиента за primary после записи"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.item = ContentItem.objects.create(
+            title="Item",
+            category=Category.objects.create(name="Category", slug="category"),
+            author=self.user,
+            slug="item",
+            status=ContentItem.Status.PUBLISHED,
+        )
+
+    def test_write_sets_pin_cookie(self, _):
+        """Тест что запрос с записью выставляет cookie закрепления"""
+        response = self.client.post(reverse("content-hit", args=[self.item.slug]))
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 5)
+
+    def test_read_does_not_set_pin_cookie(self, _):
+        """Тест что запрос только на чтение не закрепляет клиента"""
+        response = self.client.get(reverse("news-feed"))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"])
+class ItemCacheReplicaTest(APITestCase):
+    """Тесты заполнения кэша элементов при настроенной реплике"""
+
+    def test_cache_miss_reads_primary(self):
+        """Тест что промах кэша читается с primary, а не с реплики, которая могла отстать"""
+        item = ContentItem.objects.create(
+            title="Item",
+            category=Category.objects.create(name="Category", slug="category"),
+            author=User.objects.create_user(username="testuser", password="testpass"),
+            slug="item",
+            status=ContentItem.Status.PUBLISHED,
+        )
+        cache.clear()
+        # Алиаса replica_0 нет в DATABASES: любое чтение с реплики завершилось бы ошибкой
+        with mock.patch.object(PrimaryReplicaRouter, "db_for_read", return_value="replica_0"):
+            items, missing = get_cached_feed_items([item.id, 0])
+            self.assertEqual(([row["id"] for row in items], missing), ([item.id], [0]))
+            self.assertEqual(get_cached_feed_items([item.id])[0], items)
@@ -0,0 +1,106 @@
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from news.models import ContentItem
+from news.similar import build_similar_index, get_similar_ids, update_similar_index
+
+User = get_user_model()
+
+
+class SimilarIndexTest(APITestCase):
+    """Тесты индекса похожих по тексту и /news/<id>/similar/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testpass")
+        cls.source = cls.create_item("source", "Выборы губернатора", "Избиратели выбрали губернатора области.")
+        # Те же основы слов в других формах
+        cls.close = cls.create_item("close", "Губернаторские выборы", "Губернатор области избран избирателями.")
+        cls.partial = cls.create_item("partial", "Новый губернатор", "Губернатор посетил завод.")
+        cls.unrelated = cls.create_item("unrelated", "Футбольный матч", "Команда выиграла матч на стадионе.")
+        cls.football = cls.create_item("football", "Матч сборной", "Сборная сыграла матч на стадионе завода.")
+        # Фон, без которого общие слова маленького корпуса отсеиваются как слишком частые
+        cls.create_item("weather", "Погода в городе", "Завтра в городе дождь.")
+        cls.create_item("forecast", "Прогноз погоды", "Завтра дождь и ветер.")
+        cls.create_item("rouble", "Курс рубля", "Рубль укрепился на бирже.")
+        cls.create_item("trading", "Биржевые торги", "Торги на бирже: рубль растёт.")
+        cls.draft = ContentItem.objects.create(
+            title="Выборы губернатора области", slug="draft", body="Избиратели губернатора.", author=cls.user
+        )
+
+    @classmethod
+    def create_item(cls, slug, title, body):
+        return ContentItem.objects.create(
+            title=title,
+            slug=slug,
+            body=body,
+            author=cls.user,
+            status=ContentItem.Status.PUBLISHED,
+            published_at=timezone.now(),
+        )
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(NEWS_SIMILAR_INDEX_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def get_similar(self, item):
+        response = self.client.get(reverse("news-similar", args=[item.id]))
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.json()["data"]]
+
+    def test_build_ranks_by_shared_stems(self):
+        """Тест порядка: больше общих основ слов — выше; черновики и сам элемент не попадают"""
+        self.assertEqual(build_similar_index(), 9)
+
+        similar = get_similar_ids(self.source.id, 10)
+        self.assertEqual(similar[:2], [self.close.id, self.partial.id])
+        self.assertNotIn(self.source.id, similar)
+        self.assertNotIn(self.draft.id, similar)
+        self.assertNotIn(self.unrelated.id, similar)
+
+    def test_endpoint(self):
+        """Тест /news/<id>/similar/: пустой список без индекса, 404 для черновика, лимит"""
+        self.assertEqual(self.get_similar(self.source), [])
+
+        build_similar_index()
+        self.assertEqual(self.get_similar(self.source)[0], self.close.id)
+        with override_settings(NEWS_SIMILAR_LIMIT=1):
+            self.assertEqual(self.get_similar(self.source), [self.close.id])
+        response = self.client.get(reverse("news-similar", args=[self.draft.id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_unpublished_items_are_filtered(self):
+        """Тест: снятый с публикации после сборки элемент не возвращается"""
+        build_similar_index()
+        ContentItem.objects.filter(id=self.close.id).update(status=ContentItem.Status.DRAFT)
+
+        self.assertNotIn(self.close.id, self.get_similar(self.source))
+
+    def test_incremental_update(self):
+        """Тест сегмента новых элементов: новый элемент находится сразу, изменённый — по новому тексту"""
+        build_similar_index()
+        fresh = self.create_item("fresh", "Губернатор и выборы", "Избиратели области выбрали губернатора снова.")
+        self.football.title = "Выборы губернатора области"
+        self.football.body = "Избиратели выбрали губернатора."
+        self.football.save()
+
+        self.assertEqual(update_similar_index(), 2)
+        similar = get_similar_ids(self.source.id, 10)
+        self.assertIn(fresh.id, similar[:3])
+        self.assertIn(self.football.id, similar[:3])
+        self.assertIn(self.source.id, get_similar_ids(fresh.id, 10))
+        self.assertNotIn(self.football.id, get_similar_ids(self.unrelated.id, 10))
+
+        # Полная сборка переносит элементы в базовый сегмент; у «unrelated» не осталось общих слов с другими
+        self.assertEqual(build_similar_index(), 9)
+        self.assertIn(fresh.id, get_similar_ids(self.source.id, 10))
@@ -0,0 +1,124 @@
+import gzip
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from news.models import Category, ContentItem
+from news import snapshots
+from news.snapshots import FileSystemFeedSnapshotStorage, build_feed_snapshots
+
+User = get_user_model()
+
+
+class FeedSnapshotsTest(APITestCase):
+    """Тесты статических снимков первых страниц ленты"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testpass")
+        cls.root = Category.objects.create(name="Root", slug="root")
+        cls.child = Category.objects.create(name="Child", slug="child", parent=cls.root)
+        now = timezone.now()
+        for i in range(7):
+            ContentItem.objects.create(
+                title=f"Item {i}",
+                slug=f"item-{i}",
+                author=cls.user,
+                category=[cls.root, cls.child, None][i % 3],
+                status=ContentItem.Status.PUBLISHED,
+                published_at=now - timedelta(minutes=i),
+            )
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, NEWS_FEED_SNAPSHOT_PAGES=2, NEWS_FEED_SNAPSHOT_PAGE_SIZE=2
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.storage = FileSystemFeedSnapshotStorage()
+
+    def test_snapshots_match_dynamic_feed(self):
+        """Тест что снимки совпадают с динамическим ответом байт-в-байт и сжаты"""
+        call_command("build_feed_snapshots", stdout=StringIO())
+        url = reverse("news-feed")
+        for category_id in (None, self.root.id, self.child.id):
+            for page in (1, 2):
+                params = {"pageSize": 2, "pageNumber": page}
+                if category_id:
+                    params["categoryId"] = category_id
+                with self.subTest(params=params):
+                    name = f"feed/{category_id or 'all'}/{page}.json"
+                    snapshot = self.storage.read(name)
+                    self.assertEqual(snapshot, self.client.get(url, params).content)
+                    self.assertEqual(gzip.decompress(self.storage.read(name + ".gz")), snapshot)
+        self.assertEqual(self.storage.read("categories.json"), self.client.get(reverse("news-categories")).content)
+
+    def test_view_serves_snapshots(self):
+        """Тест что лента отдаётся из снимка без запросов к БД, глубокие страницы — динамически"""
+        build_feed_snapshots()
+        self.storage.write("feed/all/1.json", b'{"data":[],"meta":{"totalCount":0}}')
+        url = reverse("news-feed")
+        with override_settings(NEWS_FEED_SNAPSHOTS=True):
+            with self.assertNumQueries(0):
+                response = self.client.get(url, {"pageSize": 2})
+                self.assertEqual(response.content, b'{"data":[],"meta":{"totalCount":0}}')
+                self.client.get(reverse("news-categories"))
+            # Другой размер страницы, глубокая страница, include и MessagePack не покрываются снимками
+            self.assertEqual(len(self.client.get(url).json()["data"]), 7)
+            self.assertEqual(len(self.client.get(url, {"pageSize": 2, "pageNumber": 3}).json()["data"]), 2)
+            self.assertIn("included", self.client.get(url, {"pageSize": 2, "include": "categories"}).json())
+            response = self.client.get(url, {"pageSize": 2}, HTTP_ACCEPT="application/msgpack")
+            self.assertEqual(response["Content-Type"], "application/msgpack")
+
+    def test_missing_snapshot_falls_back(self):
+        """Тест динамического ответа, если снимка нет"""
+        with override_settings(NEWS_FEED_SNAPSHOTS=True):
+            response = self.client.get(reverse("news-feed"), {"pageSize": 2})
+        self.assertEqual(len(response.json()["data"]), 2)
+
+    def test_rebuild_on_publish(self):
+        """Тест пересборки снимков после коммита публикации и удаления снимков категории"""
+        item = ContentItem.objects.create(title="New", slug="new", author=self.user, category=self.child)
+        with override_settings(NEWS_FEED_SNAPSHOTS=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                item.save()
+            self.assertIsNone(self.storage.read("feed/all/1.json"))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                item.publish()
+            self.assertIn(f'"id":{item.id},'.encode(), self.storage.read(f"feed/{self.child.id}/1.json"))
+
+            child_id = self.child.id
+            with self.captureOnCommitCallbacks(execute=True):
+                self.child.delete()
+        self.assertIsNone(self.storage.read(f"feed/{child_id}/1.json"))
+        self.assertIsNotNone(self.storage.read("feed/all/1.json"))
+
+
+@override_settings(NEWS_FEED_SNAPSHOT_REBUILD_DELAY=0.2)
+class DeferredSnapshotRebuildTest(SimpleTestCase):
+    """Тесты отложенной пересборки снимков в фоновом потоке"""
+
+    def test_requests_are_coalesced(self):
+        """Тест что запросы за время задержки сливаются в одну пересборку вне потока запроса"""
+        with mock.patch("news.snapshots._rebuild") as rebuild:
+            for deleted in ([], [5], [7]):
+                snapshots._request_rebuild(deleted)
+            rebuild.assert_not_called()
+            deadline = time.monotonic() + 5
+            while not rebuild.called and time.monotonic() < deadline:
+                time.sleep(0.05)
+        rebuild.assert_called_once_with({5, 7})
+        self.assertIsNone(snapshots._pending)
@@ -0,0 +1,166 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from news.models import ContentItem, Tag
+from news.ndjson import import_content
+from news.tag_arrays import check_tag_arrays
+
+User = get_user_model()
+
+
+class TagArraysTest(APITestCase):
+    """Тесты массивов tag_ids/tag_slugs: синхронизация с M2M, фильтры по GIN-индексу и проверка расхождений"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="editor", password="testpass")
+        cls.red = Tag.objects.create(name="Red", slug="red")
+        cls.blue = Tag.objects.create(name="Blue", slug="blue")
+        cls.green = Tag.objects.create(name="Green", slug="green")
+
+    def create_item(self, slug, tags=(), **kwargs):
+        item = ContentItem.objects.create(
+            title=slug, slug=slug, author=self.user, status=ContentItem.Status.PUBLISHED, **kwargs
+        )
+        item.tags.set(tags)
+        return item
+
+    def arrays(self, item):
+        return tuple(ContentItem.objects.filter(pk=item.pk).values_list("tag_ids", "tag_slugs").get())
+
+    def test_sync_on_tags_change(self):
+        """Тест что set/add/remove/clear обновляют массивы в БД и в экземпляре"""
+        item = self.create_item("item", [self.blue, self.red])
+        expected = sorted([(self.red.id, "red"), (self.blue.id, "blue")])
+        self.assertEqual(self.arrays(item), ([pk for pk, _ in expected], [slug for _, slug in expected]))
+        self.assertEqual(item.tag_ids, [pk for pk, _ in expected])
+
+        item.tags.remove(self.red)
+        self.assertEqual(self.arrays(item), ([self.blue.id], ["blue"]))
+        item.tags.add(self.green)
+        self.assertEqual(self.arrays(item)[1], ["blue", "green"])
+        item.tags.clear()
+        self.assertEqual(self.arrays(item), ([], []))
+
+        # Полное сохранение экземпляра не возвращает старые массивы
+        item.tags.add(self.red)
+        item.save()
+        self.assertEqual(self.arrays(item), ([self.red.id], ["red"]))
+
+    def test_stale_instance_save_keeps_arrays(self):
+        """Тест что полное сохранение экземпляра, загруженного до смены тегов, не возвращает старые массивы"""
+        item = self.create_item("item", [self.red])
+        stale = ContentItem.objects.get(pk=item.pk)
+        item.tags.set([self.red, self.blue])
+
+        stale.title = "Renamed"
+        stale.save()
+        self.assertEqual(ContentItem.objects.get(pk=item.pk).title, "Renamed")
+        self.assertEqual(len(self.arrays(item)[0]), 2)
+        self.assertEqual(check_tag_arrays(), [])
+
+    def test_deferred_instance_save(self):
+        """Тест что сохранение экземпляра с отложенными полями не догружает их и не затирает"""
+        item = self.create_item("item", [self.red], lead="Lead")
+        partial = ContentItem.objects.defer("lead", "body").get(pk=item.pk)
+        partial.title = "Renamed"
+        # Тестовый раннер роняет тест при ленивой догрузке отложенного поля
+        partial.save()
+        saved = ContentItem.objects.get(pk=item.pk)
+        self.assertEqual((saved.title, saved.lead), ("Renamed", "Lead"))
+        self.assertEqual(self.arrays(item), ([self.red.id], ["red"]))
+
+    def test_clone_and_reinsert(self):
+        """Тест копирования через pk = None и повторной вставки параллельно удалённой строки"""
+        item = self.create_item("item", [self.red])
+        item.pk = None
+        item.slug = "item-copy"
+        item.save()
+        self.assertEqual(ContentItem.objects.filter(slug__startswith="item").count(), 2)
+
+        ContentItem.objects.filter(pk=item.pk).delete()
+        item.title = "Restored"
+        item.save()
+        self.assertEqual(ContentItem.objects.get(pk=item.pk).title, "Restored")
+
+    def test_sync_on_reverse_and_tag_changes(self):
+        """Тест синхронизации при изменениях со стороны тега, смене slug и удалении тега"""
+        first, second = self.create_item("first"), self.create_item("second", [self.blue])
+        self.red.contentitem_set.add(first, second)
+        self.assertEqual(self.arrays(first), ([self.red.id], ["red"]))
+
+        self.red.slug = "scarlet"
+        self.red.save()
+        self.assertIn("scarlet", self.arrays(second)[1])
+
+        self.red.contentitem_set.clear()
+        self.assertEqual(self.arrays(first), ([], []))
+
+        self.blue.delete()
+        self.assertEqual(self.arrays(second), ([], []))
+        self.assertEqual(check_tag_arrays(), [])
+
+    def test_sync_on_bulk_write_and_import(self):
+        """Тест синхронизации при пакетной записи и загрузке NDJSON, которые пишут связующую таблицу напрямую"""
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse("content-bulk"),
+            {"create": [{"title": "Bulk", "slug": "bulk", "tag_ids": [self.green.id, self.red.id]}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        expected = sorted([(self.green.id, "green"), (self.red.id, "red")])
+        self.assertEqual(ContentItem.objects.get(slug="bulk").tag_slugs, [slug for _, slug in expected])
+
+        import_content(io.BytesIO(b'{"slug": "bulk", "title": "Bulk", "author": "editor", "tags": ["blue"]}'))
+        self.assertEqual(ContentItem.objects.get(slug="bulk").tag_ids, [self.blue.id])
+        self.assertEqual(check_tag_arrays(), [])
+
+    def test_filters(self):
+        """Тест фильтров «любой из тегов» и «все теги» в ленте v2 и /apiv3/contents/"""
+        both = self.create_item("both", [self.red, self.blue])
+        red = self.create_item("red-only", [self.red])
+        self.create_item("green-only", [self.green])
+
+        def feed_ids(**params):
+            return {row["id"] for row in self.client.get(reverse("news-feed"), params).json()["data"]}
+
+        tag_ids = f"{self.red.id},{self.blue.id}"
+        self.assertEqual(feed_ids(tagIds=tag_ids), {both.id, red.id})
+        self.assertEqual(feed_ids(tagIds=tag_ids, tagMatch="all"), {both.id})
+
+        def contents_slugs(**params):
+            return {row["slug"] for row in self.client.get(reverse("content-list"), params).json()["results"]}
+
+        self.assertEqual(contents_slugs(tag="red,blue"), {"both", "red-only"})
+        self.assertEqual(contents_slugs(tag="red,blue", tag_match="all"), {"both"})
+
+    def test_contents_tags_without_prefetch(self):
+        """Тест что теги списка /apiv3/contents/ берутся одним запросом по tag_ids и сортируются по имени"""
+        for i in range(5):
+            self.create_item(f"item-{i}", [self.red, self.green, self.blue][: i % 3 + 1])
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("content-list"))
+        tags = {row["slug"]: [tag["name"] for tag in row["tags"]] for row in response.json()["results"]}
+        self.assertEqual(tags["item-2"], ["Blue", "Green", "Red"])
+        self.assertEqual(tags["item-0"], ["Red"])
+
+        response = self.client.get(reverse("content-detail", args=["item-1"]))
+        self.assertEqual([tag["slug"] for tag in response.json()["tags"]], ["green", "red"])
+
+    def test_check_command(self):
+        """Тест что команда check_tag_arrays находит расхождения, а с --fix исправляет их"""
+        item = self.create_item("item", [self.red])
+        ContentItem.objects.filter(pk=item.pk).update(tag_ids=[], tag_slugs=[])
+
+        with self.assertRaisesMessage(CommandError, "drifted for 1 items"):
+            call_command("check_tag_arrays", stdout=io.StringIO())
+        out = io.StringIO()
+        call_command("check_tag_arrays", fix=True, stdout=out)
+        self.assertIn(f"Fixed tag arrays of 1 items: {item.pk}", out.getvalue())
+        self.assertEqual(self.arrays(item), ([self.red.id], ["red"]))
+        self.assertEqual(check_tag_arrays(), [])
@@ -0,0 +1,137 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core.metrics import PENDING_VIEWS
+from news.models import ContentItem, TrendingEpoch
+from news import trending
+from news.trending import flush_views, pending_views, record_view, renormalize_trending
+
+User = get_user_model()
+
+
+@override_settings(NEWS_VIEWS_FLUSH_SECONDS=3600, NEWS_VIEWS_FLUSH_MAX_ITEMS=1000, NEWS_TRENDING_HALF_LIFE_HOURS=24)
+class TrendingTest(APITestCase):
+    """Тесты буфера просмотров, рейтинга популярности и ленты sort=trending"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testpass")
+        now = timezone.now()
+        cls.old = cls.create_item("old", now - timedelta(days=3))
+        cls.fresh = cls.create_item("fresh", now - timedelta(days=1))
+        cls.quiet = cls.create_item("quiet", now)
+
+    @classmethod
+    def create_item(cls, slug, published_at):
+        return ContentItem.objects.create(
+            title=slug, slug=slug, author=cls.user, status=ContentItem.Status.PUBLISHED, published_at=published_at
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(flush_views)
+        self.start = timezone.now()
+
+    def view(self, item, count, days=0):
+        """``count`` просмотров через ``days`` суток после начала эпохи."""
+        with mock.patch("news.trending.timezone.now", return_value=self.start + timedelta(days=days)):
+            for _ in range(count):
+                record_view(item.id)
+            flush_views()
+
+    def get_feed(self, **params):
+        response = self.client.get(reverse("news-feed"), {"sort": "trending", **params})
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.json()["data"]]
+
+    def test_views_are_buffered(self):
+        """Тест что просмотры копятся в памяти и записываются одним UPDATE"""
+        pending = PENDING_VIEWS._value.get()
+        response = self.client.post(reverse("content-hit", args=[self.old.slug]))
+        self.assertEqual(response.json(), {"views": 1})
+        self.assertEqual(pending_views(self.old.id), 1)
+        self.assertEqual(PENDING_VIEWS._value.get(), pending + 1)
+        self.old.refresh_from_db()
+        self.assertEqual(self.old.views, 0)
+
+        record_view(self.fresh.id)
+        # Блокировка эпохи, один UPDATE счётчиков, секция и COPY событий (плюс точки сохранения)
+        with self.assertNumQueries(7):
+            self.assertEqual(flush_views(), 2)
+        self.assertEqual(PENDING_VIEWS._value.get(), pending)
+        self.assertEqual(pending_views(self.old.id), 0)
+        self.old.refresh_from_db()
+        self.assertEqual(self.old.views, 1)
+        self.assertGreater(self.old.trending_score, 0)
+
+    @override_settings(NEWS_VIEWS_FLUSH_MAX_ITEMS=2)
+    def test_flush_when_buffer_is_full(self):
+        """Тест записи буфера при NEWS_VIEWS_FLUSH_MAX_ITEMS элементах"""
+        record_view(self.old.id)
+        record_view(self.old.id)
+        self.assertEqual(pending_views(self.old.id), 2)
+        record_view(self.fresh.id)
+        self.assertEqual(pending_views(self.old.id), 0)
+        self.assertEqual(ContentItem.objects.get(id=self.old.id).views, 2)
+
+    def test_trending_ranks_recent_views_higher(self):
+        """Тест что свежие просмотры весят больше старых: 10 просмотров четыре периода назад < 3 сейчас"""
+        TrendingEpoch.objects.create(id=1, started_at=self.start)
+        self.view(self.old, 10)
+        self.view(self.fresh, 3, days=4)
+
+        self.assertEqual(self.get_feed(), [self.fresh.id, self.old.id, self.quiet.id])
+        # Без sort порядок по дате публикации
+        response = self.client.get(reverse("news-feed"))
+        self.assertEqual([row["id"] for row in response.json()["data"]], [self.quiet.id, self.fresh.id, self.old.id])
+
+    def test_renormalize_preserves_ranking(self):
+        """Тест перенормировки: начало эпохи сдвигается, рейтинги делятся, порядок сохраняется"""
+        TrendingEpoch.objects.create(id=1, started_at=self.start - timedelta(days=30))
+        self.view(self.old, 1)
+        self.view(self.fresh, 2)
+        ContentItem.objects.filter(id=self.quiet.id).update(trending_score=1.0)
+        before = self.get_feed()
+
+        with mock.patch("news.trending.timezone.now", return_value=self.start):
+            self.assertEqual(renormalize_trending(), 3)
+
+        self.assertEqual(TrendingEpoch.objects.get().started_at, self.start)
+        self.assertAlmostEqual(ContentItem.objects.get(id=self.fresh.id).trending_score, 2.0)
+        # 2 ** -30 — меньше MIN_SCORE
+        self.assertEqual(ContentItem.objects.get(id=self.quiet.id).trending_score, 0)
+        self.assertEqual(self.get_feed(), before)
+
+    def test_invalid_sort(self):
+        """Тест отклонения неизвестного sort"""
+        response = self.client.get(reverse("news-feed"), {"sort": "views"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ViewsFlusherTest(SimpleTestCase):
+    """Тест фонового потока записи буфера просмотров"""
+
+    @mock.patch("news.trending.flush_views", side_effect=lambda: trending._buffer.take())
+    def test_buffer_is_flushed_without_new_views(self, flush):
+        """Тест что буфер записывается через NEWS_VIEWS_FLUSH_SECONDS без следующего просмотра"""
+        with override_settings(NEWS_VIEWS_FLUSH_THREAD=True, NEWS_VIEWS_FLUSH_SECONDS=0.05):
+            record_view(1)
+            _, thread = trending._flusher
+            for _ in range(100):
+                if flush.called:
+                    break
+                time.sleep(0.05)
+            flush.assert_called()
+            self.assertEqual(pending_views(1), 0)
+        # Поток замечает выключенную настройку и завершается
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(trending._flusher)
@@ -17,3 +17,14 @@ class CategoryUtilsLogicTest(TestCase):
         expected_ids = {root.id, child1.id, child2.id, grandchild.id}
 
         self.assertEqual(set(result_ids), expected_ids)
+
+    def test_category_descendants_with_cycle(self):
+        """Тест что цикл в дереве категорий не приводит к повторам и зацикливанию"""
+        first = Category.objects.create(name="First", slug="first")
+        second = Category.objects.create(name="Second", slug="second", parent=first)
+        Category.objects.filter(pk=first.pk).update(parent=second)
+
+        result_ids = get_category_and_descendants_ids(first.id)
+
+        self.assertIsInstance(result_ids, list)
+        self.assertEqual(sorted(result_ids), sorted([first.id, second.id]))